@@ -0,0 +1,339 @@
+"""
+-------------------------------------------------------------------------------
+Name:        benchmark
+Purpose:     Timing and peak memory benchmarks of the entry points on synthetic data sets of increasing size
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+import numpy as np
+import pandas as pd
+import sklearn
+import energeticEvaluations as enEval
+import energeticEvaluationsMultiOutputRegression as enEvalMOR
+import helpers.helperFuncs as helperFuncs
+from xgboost import XGBRegressor
+from helpers.stackingEstimator import StackingEstimator
+from helpers.staticResultIndex import loadStaticResultIndex
+from helpers.compactStaticResults import loadCompactStaticResults
+from helpers.crossValidation import CrossValidationRunner
+from helpers.dynamicResultStore import DynamicResultStore, convertDynamicResults
+from helpers.dynamicAggregation import aggregateDynamicResults
+from helpers.syntheticData import generateStaticResults, writeStaticResults, generateDynamicResults
+
+# increase whenever the structure of the report changes
+REPORT_FORMAT_VERSION = 1
+# entry points whose import time is measured in a fresh interpreter, the heavy layers should only be loaded on use
+STARTUP_MODULES = ["helpers.staticResultIndex", "energeticEvaluations", "energeticEvaluationsMultiOutputRegression",
+                   "scenarioBatch", "planningService"]
+HEAVY_MODULES = ["sklearn", "xgboost", "matplotlib", "scipy", "joblib"]
+
+
+def measure(function, repeat: int = 3):
+    """
+    Wall clock time of repeated calls and peak memory of one additional call of the function. The peak memory is
+    traced by tracemalloc in a separate call, so the tracing does not distort the timings; it covers the allocations
+    of Python and NumPy (not those inside native libraries such as xgboost).
+    :param function: callable without arguments
+    :param repeat: int: number of timed calls
+    :return: dict with the timings in seconds and the peak memory in bytes
+    """
+    seconds = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peakMemoryBytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": seconds, "minSeconds": min(seconds), "medianSeconds": float(np.median(seconds)),
+            "peakMemoryBytes": peakMemoryBytes}
+
+
+def gitCommit(repoDir: str):
+    """
+    Commit hash of the working tree the benchmarks are run on (suffixed by "-dirty" for uncommitted changes)
+    :return: str or None outside of a git repository
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=repoDir, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=repoDir,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("-dirty" if dirty else "")
+
+
+def syntheticStaticPath(workDir: str, scale: float, seed: int):
+    return os.path.join(workDir, "staticResults-x{}-seed{}.csv".format(scale, seed))
+
+
+def syntheticDynamicPath(workDir: str, scale: float, seed: int):
+    return os.path.join(workDir, "dynamicResults-x{}-seed{}.csv".format(scale, seed))
+
+
+def prepareSyntheticData(templatePath: str, workDir: str, scale: float, seed: int = 0, withDynamic: bool = False):
+    """
+    Generate the synthetic data sets of the given scale, unless they already exist in workDir
+    :param templatePath: str: path of automateSimulationStaticResults.csv
+    :param workDir: str: directory of the synthetic data sets
+    :param scale: float: size relative to the shipped data sets
+    :param seed: int: seed of the random generator
+    :param withDynamic: bool: also generate the dynamic data set
+    :return: tuple of paths (static CSV, dynamic CSV or None)
+    """
+    staticPath = syntheticStaticPath(workDir, scale, seed)
+    dynamicPath = syntheticDynamicPath(workDir, scale, seed) if withDynamic else None
+    if os.path.exists(staticPath) and (dynamicPath is None or os.path.exists(dynamicPath)):
+        return staticPath, dynamicPath
+    dfStaticResults = generateStaticResults(pd.read_csv(templatePath, index_col=0), scale=scale, seed=seed)
+    # written under a temporary name first, an interrupted generation is not reused
+    if not os.path.exists(staticPath):
+        writeStaticResults(dfStaticResults, staticPath + ".tmp")
+        os.replace(staticPath + ".tmp", staticPath)
+    if dynamicPath is not None and not os.path.exists(dynamicPath):
+        generateDynamicResults(dfStaticResults, dynamicPath + ".tmp", seed=seed)
+        os.replace(dynamicPath + ".tmp", dynamicPath)
+    return staticPath, dynamicPath
+
+
+def _queries(dfStaticResults: pd.DataFrame, nQueries: int, seed: int):
+    """Random planning scenarios within the range of the static data set"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "consideredLocation": rng.choice(dfStaticResults["location"].unique(), nQueries),
+        "scalingFactorS": rng.uniform(0.6, 8.5, nQueries),
+        "maxWasteHeatRoomW": rng.uniform(dfStaticResults["DryRoomHeatLoad"].min(),
+                                         dfStaticResults["DryRoomHeatLoad"].max(), nQueries),
+        "maxMoistureLoad": rng.uniform(dfStaticResults["DryRoomMoistureLoad"].min(),
+                                       dfStaticResults["DryRoomMoistureLoad"].max(), nQueries)})
+
+
+def staticBenchmarks(staticPath: str, workDir: str, scale: float, repeat: int = 3, withSurrogate: bool = True,
+                     nQueries: int = 10000, seed: int = 0):
+    """
+    Benchmarks of the static entry points on one synthetic data set
+    :return: list of result dicts
+    """
+    results = []
+
+    def add(name, function, repeat=repeat, **info):
+        result = {"benchmark": name, "scale": scale}
+        result.update(info)
+        result.update(measure(function, repeat))
+        results.append(result)
+
+    cacheDir = os.path.join(workDir, "cache-x{}".format(scale))
+    staticResultIndex = loadStaticResultIndex(staticPath, cacheDir=cacheDir)
+    nRows = len(staticResultIndex.dfStaticResults)
+    add("staticCsvLoadExtend", lambda: helperFuncs.extendStaticDF(pd.read_csv(staticPath, index_col=0)), nRows=nRows)
+    add("staticResultIndexCachedLoad", lambda: loadStaticResultIndex(staticPath, cacheDir=cacheDir), nRows=nRows)
+    loadCompactStaticResults(staticPath, cacheDir=cacheDir)
+    add("compactStaticLoad", lambda: loadCompactStaticResults(staticPath, cacheDir=cacheDir).toDataFrame(), nRows=nRows)
+
+    dfStaticResults = staticResultIndex.dfStaticResults
+    dfQueries = _queries(dfStaticResults, nQueries, seed)
+    query = dfQueries.iloc[0]
+    add("interpolateScalar", lambda: enEval.interpolateScalingFactorAndInternalLoads(
+        dfStaticResults, query["consideredLocation"], query["scalingFactorS"], query["maxWasteHeatRoomW"],
+        query["maxMoistureLoad"]), nRows=nRows, nQueries=1)
+    add("interpolateBatch", lambda: enEval.interpolateScalingFactorAndInternalLoadsBatch(
+        staticResultIndex.grids, dfQueries=dfQueries), nRows=nRows, nQueries=nQueries)
+
+    if withSurrogate:
+        X, y = enEvalMOR.getTrainingData(dfStaticResults)
+        model = enEvalMOR.createMultiOutputRegressionModel()
+        add("surrogateFit", lambda: model.fit(X, y), repeat=1, nRows=nRows)
+        add("surrogateFitCompact", lambda: enEvalMOR.createMultiOutputRegressionModel(compactTraining=True).fit(X, y),
+            repeat=1, nRows=nRows)
+        add("surrogateFitMultiOutput", lambda: enEvalMOR.createMultiOutputRegressionModel(multiOutput=True).fit(X, y),
+            repeat=1, nRows=nRows)
+        XPredict = X[np.random.default_rng(seed).integers(0, len(X), nQueries)]
+        add("surrogatePredict", lambda: model.predict(XPredict), nRows=nRows, nQueries=nQueries)
+
+        def crossValidate():
+            # fresh cache directory, so every call fits all folds
+            cvDir = tempfile.mkdtemp(dir=workDir)
+            try:
+                CrossValidationRunner(cvDir, n_splits=3, n_repeats=1, random_state=1, n_jobs=1).scores(
+                    enEvalMOR.createMultiOutputRegressionModel(), X, y)
+            finally:
+                shutil.rmtree(cvDir)
+        add("surrogateCrossValidation", crossValidate, repeat=1, nRows=nRows, nSplits=3)
+
+        stackingEstimator = StackingEstimator(estimator=XGBRegressor(n_estimators=100, max_depth=3, n_jobs=1,
+                                                                     verbosity=0, random_state=42))
+        stackingEstimator.fit(X, y[:, 0])
+        add("stackingEstimatorTransform", lambda: stackingEstimator.transform(X), nRows=nRows)
+    return results
+
+
+def dynamicBenchmarks(dynamicPath: str, workDir: str, scale: float, repeat: int = 3):
+    """
+    Benchmarks of the reads of one synthetic dynamic data set: plain CSV read of two columns, conversion into the
+    columnar store, column reads from the store and the aggregation over all simulation cases
+    :return: list of result dicts
+    """
+    results = []
+
+    def add(name, function, repeat=repeat, **info):
+        result = {"benchmark": name, "scale": scale}
+        result.update(info)
+        result.update(measure(function, repeat))
+        results.append(result)
+
+    header = pd.read_csv(dynamicPath, index_col=0, nrows=0)
+    columns = [header.index.name or 0] + list(header.columns[:2])
+    add("dynamicCsvRead", lambda: pd.read_csv(dynamicPath, index_col=0, usecols=columns), repeat=1,
+        nColumns=len(header.columns))
+    storeDir = os.path.join(workDir, "dynamicStore-x{}".format(scale))
+
+    def convert():
+        shutil.rmtree(storeDir, ignore_errors=True)
+        convertDynamicResults(dynamicPath, storeDir)
+    add("dynamicStoreConvert", convert, repeat=1, nColumns=len(header.columns))
+
+    store = DynamicResultStore(storeDir)
+    add("dynamicStoreColumnRead", lambda: [float(np.sum(store.column(locationVariant, "electricEnergyKwh")))
+                                           for locationVariant in store.locationVariants],
+        nVariants=len(store.locationVariants))
+    add("dynamicAggregate", lambda: aggregateDynamicResults(DynamicResultStore(storeDir), n_jobs=1), repeat=1,
+        nVariants=len(store.locationVariants))
+    return results
+
+
+def startupBenchmarks(repeat: int = 3):
+    """
+    Start-up time of the entry points: wall clock time of a fresh interpreter importing the module (as a spawned
+    worker process does), including the time of the interpreter itself, measured by the bare interpreter start
+    :param repeat: int: number of timed starts
+    :return: list of result dicts
+    """
+    repoDir = os.path.dirname(os.path.realpath(__file__))
+    results = []
+    for module in [None] + STARTUP_MODULES:
+        code = "pass" if module is None else "import {}".format(module)
+        command = [sys.executable, "-c", code]
+        result = {"benchmark": "startup" if module is None else "startup:{}".format(module), "scale": 1}
+        result.update(measure(lambda: subprocess.run(command, cwd=repoDir, check=True), repeat))
+        # heavy libraries loaded at import time
+        loaded = subprocess.run([sys.executable, "-c", "import sys; {}; print(','.join(m for m in {!r} if m in "
+                                 "sys.modules))".format(code, HEAVY_MODULES)], cwd=repoDir, check=True,
+                                capture_output=True, text=True).stdout.strip()
+        result["heavyModules"] = loaded.split(",") if loaded else []
+        results.append(result)
+    return results
+
+
+def runBenchmarks(templatePath: str, workDir: str, scales=(1, 10, 100, 1000), dynamicScales=(0.01,),
+                  surrogateMaxScale: float = 10, repeat: int = 3, seed: int = 0):
+    """
+    Run all benchmarks on synthetic data sets of the given scales (relative to the shipped data sets)
+    :param templatePath: str: path of automateSimulationStaticResults.csv
+    :param workDir: str: directory of the synthetic data sets and caches
+    :param scales: sequence of scales of the static benchmarks
+    :param dynamicScales: sequence of scales of the dynamic benchmarks (1 corresponds to about 2 GB of CSV)
+    :param surrogateMaxScale: float: the regression model benchmarks are only run up to this scale
+    :param repeat: int: number of timed calls of the fast benchmarks
+    :param seed: int: seed of the data generation and the queries
+    :return: dict: report with the environment and the list of results
+    """
+    if not os.path.exists(workDir):
+        os.makedirs(workDir)
+    repoDir = os.path.dirname(os.path.realpath(__file__))
+    report = {"formatVersion": REPORT_FORMAT_VERSION, "commit": gitCommit(repoDir),
+              "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+              "platform": platform.platform(), "cpuCount": os.cpu_count(),
+              "versions": {"numpy": np.__version__, "pandas": pd.__version__, "scikit-learn": sklearn.__version__},
+              "seed": seed, "results": startupBenchmarks(repeat=repeat)}
+    for scale in scales:
+        staticPath, _ = prepareSyntheticData(templatePath, workDir, scale, seed)
+        report["results"].extend(staticBenchmarks(staticPath, workDir, scale, repeat=repeat,
+                                                  withSurrogate=scale <= surrogateMaxScale, seed=seed))
+    for scale in dynamicScales:
+        _, dynamicPath = prepareSyntheticData(templatePath, workDir, scale, seed, withDynamic=True)
+        report["results"].extend(dynamicBenchmarks(dynamicPath, workDir, scale, repeat=repeat))
+    return report
+
+
+def saveReport(report: dict, reportPath: str):
+    """
+    Save a benchmark report as JSON
+    :param report: dict: report of runBenchmarks
+    :param reportPath: str: path of the JSON file
+    """
+    if os.path.dirname(reportPath) and not os.path.exists(os.path.dirname(reportPath)):
+        os.makedirs(os.path.dirname(reportPath))
+    with open(reportPath, "w") as f:
+        json.dump(report, f, indent=1)
+
+
+def loadReport(reportPath: str):
+    with open(reportPath) as f:
+        return json.load(f)
+
+
+def compareReports(baselineReport: dict, report: dict, tolerance: float = 1.2):
+    """
+    Compare the results of two reports, e.g. of two commits
+    :param baselineReport: dict: report of the reference
+    :param report: dict: report to be checked
+    :param tolerance: float: ratio of time or memory above which a benchmark counts as regression
+    :return: pd.DataFrame with one row per benchmark and scale present in both reports
+    """
+    keys = ["benchmark", "scale"]
+    dfBaseline = pd.DataFrame(baselineReport["results"])[keys + ["minSeconds", "peakMemoryBytes"]]
+    dfCurrent = pd.DataFrame(report["results"])[keys + ["minSeconds", "peakMemoryBytes"]]
+    dfComparison = dfBaseline.merge(dfCurrent, on=keys, suffixes=("Baseline", ""))
+    dfComparison["timeRatio"] = dfComparison["minSeconds"] / dfComparison["minSecondsBaseline"]
+    dfComparison["memoryRatio"] = dfComparison["peakMemoryBytes"] / dfComparison["peakMemoryBytesBaseline"]
+    dfComparison["regression"] = (dfComparison["timeRatio"] > tolerance) | (dfComparison["memoryRatio"] > tolerance)
+    return dfComparison
+
+
+if __name__ == "__main__":
+    ########### input declarations ############
+    current_dir = os.path.dirname(os.path.realpath(__file__))
+    staticResultPath = os.path.join(current_dir, "data", "automateSimulationStaticResults.csv")
+    # synthetic data sets are generated once per scale and seed and reused by later runs
+    workDir = os.path.join(current_dir, "data", "cache", "benchmarks")
+    scales = (1, 10, 100, 1000)
+    # a dynamic data set of scale 1 corresponds to the shipped one (more than 2 GB of CSV)
+    dynamicScales = (0.01,)
+    surrogateMaxScale = 10
+    repeat = 3
+    # report of another commit to compare with, e.g. os.path.join(current_dir, "data", "benchmarks", "<commit>.json")
+    baselineReportPath = None
+
+    ########### benchmarks ############
+    report = runBenchmarks(staticResultPath, workDir, scales=scales, dynamicScales=dynamicScales,
+                           surrogateMaxScale=surrogateMaxScale, repeat=repeat)
+    reportPath = os.path.join(current_dir, "data", "benchmarks", "{}.json".format(report["commit"] or "benchmark"))
+    saveReport(report, reportPath)
+    print(pd.DataFrame(report["results"])[["benchmark", "scale", "minSeconds", "peakMemoryBytes"]].to_string())
+    print("Report saved to {}".format(reportPath))
+    if baselineReportPath is not None:
+        dfComparison = compareReports(loadReport(baselineReportPath), report)
+        print(dfComparison.to_string())
+        print("Regressions: {}".format(list(dfComparison.loc[dfComparison["regression"], "benchmark"])))
@@ -12,9 +12,17 @@ Licence:     CC BY-SA 4.0
 """
 
 import os
+import numpy as np
 import pandas as pd
 import helpers.WetAirToolBox as WetAirToolBox
 import helpers.helperFuncs as helperFuncs
+from helpers.interpolationGrids import StaticResultGrids
+from helpers.staticResultIndex import loadStaticResultIndex
+
+### constants of the boundary parameter translation ###
+densityAirkgm3 = 1.17343
+moistureInputPerHumankgH = 0.113
+volumeFlowInRefM3H = 11000
 
 def boundaryParameters2scalingFactorMoistureLoad(maxHumansInAirFlow: int, maxHumansInRoom: int,
                                                  roomDewPointDegrees: float,
@@ -31,10 +39,6 @@ def boundaryParameters2scalingFactorMoistureLoad(maxHumansInAirFlow: int, maxHum
       :param leakagesSuctionVolumeFlowM3H: volume flow escaping through leakages and technical suction out of room in m^3/h
       :return: scaling factor s & moisture load in kg/s
       """
-      ### constants ###
-      densityAirkgm3 = 1.17343
-      moistureInputPerHumankgH = 0.113
-      volumeFlowInRefM3H = 11000
       ### calculations ###
       roomDewPointAbsHumidity = WetAirToolBox.humidity_dewpoint2abs(inletTemperatureDegrees, roomDewPointDegrees)
       inletDewPointDegreesAbsHumidity = WetAirToolBox.humidity_dewpoint2abs(inletTemperatureDegrees,
@@ -46,6 +50,42 @@ def boundaryParameters2scalingFactorMoistureLoad(maxHumansInAirFlow: int, maxHum
       maxMoistureLoad = moistureInputPerHumankgH * maxHumansInRoom / 3600
       return scalingFactorS, maxMoistureLoad
 
+def boundaryParameters2scalingFactorMoistureLoadBatch(maxHumansInAirFlow, maxHumansInRoom, roomDewPointDegrees,
+                                                      inletDewPointDegrees, inletTemperatureDegrees,
+                                                      leakagesSuctionVolumeFlowM3H, pG: float = WetAirToolBox.pG,
+                                                      out: tuple = None):
+      """
+      Vectorized version of boundaryParameters2scalingFactorMoistureLoad for many dry room design variants at once.
+      All inputs are broadcast against each other, the calculation runs in place in the two result arrays.
+      :param maxHumansInAirFlow: maximum number(s) of humans in air flow zones in room
+      :param maxHumansInRoom: total maximum amount(s) of humans in room
+      :param roomDewPointDegrees: desired dew point temperature(s) inside room in °C
+      :param inletDewPointDegrees: dew point temperature(s) of supply air into room in °C
+      :param inletTemperatureDegrees: supply air temperature(s) in °C
+      :param leakagesSuctionVolumeFlowM3H: volume flow(s) escaping through leakages and technical suction out of room in m^3/h
+      :param pG: air pressure in hPa
+      :param out: optional tuple of two preallocated float64 arrays (scaling factor s, moisture load) of the broadcast shape
+      :return: arrays of scaling factor s & moisture load in kg/s
+      """
+      shape = np.broadcast_shapes(*(np.shape(x) for x in (maxHumansInAirFlow, maxHumansInRoom, roomDewPointDegrees,
+                                                          inletDewPointDegrees, inletTemperatureDegrees,
+                                                          leakagesSuctionVolumeFlowM3H)))
+      if out is None:
+            out = (np.empty(shape, dtype=np.float64), np.empty(shape, dtype=np.float64))
+      scalingFactorS, maxMoistureLoad = out
+      # the moisture load buffer serves as scratch space for the absolute humidity of the inlet air
+      WetAirToolBox.humidity_dewpoint2abs(inletTemperatureDegrees, roomDewPointDegrees, pG=pG, out=scalingFactorS)
+      WetAirToolBox.humidity_dewpoint2abs(inletTemperatureDegrees, inletDewPointDegrees, pG=pG, out=maxMoistureLoad)
+      np.subtract(scalingFactorS, maxMoistureLoad, out=scalingFactorS)
+      np.multiply(scalingFactorS, densityAirkgm3, out=scalingFactorS)
+      np.multiply(maxHumansInAirFlow, moistureInputPerHumankgH, out=maxMoistureLoad)
+      np.divide(maxMoistureLoad, scalingFactorS, out=scalingFactorS)
+      np.add(scalingFactorS, leakagesSuctionVolumeFlowM3H, out=scalingFactorS)
+      np.divide(scalingFactorS, volumeFlowInRefM3H, out=scalingFactorS)
+      np.multiply(maxHumansInRoom, moistureInputPerHumankgH, out=maxMoistureLoad)
+      np.divide(maxMoistureLoad, 3600, out=maxMoistureLoad)
+      return scalingFactorS, maxMoistureLoad
+
 def interpolateScalingFactorAndInternalLoads(dfStaticResults: pd.DataFrame, consideredLocation: str,
                                              scalingFactorS: float, maxWasteHeatRoomW: float, maxMoistureLoad: float):
       """
@@ -84,13 +124,105 @@ def interpolateScalingFactorAndInternalLoads(dfStaticResults: pd.DataFrame, cons
       finalResultsOfInterpolation = resultDFTransposed.loc[maxWasteHeatRoomW]
       return finalResultsOfInterpolation
 
+def interpolateScalingFactorAndInternalLoadsBatch(dfStaticResults, consideredLocation=None, scalingFactorS=None,
+                                                  maxWasteHeatRoomW=None, maxMoistureLoad=None,
+                                                  dfQueries: pd.DataFrame = None):
+      """
+      This function interpolates the scaling factor and internal loads of the static result data set for many queries
+      at once. The values are the same as those of interpolateScalingFactorAndInternalLoads for each single query.
+      Scaling factors which coincide with a simulated ScalingFactorS are interpolated as well, whereas the scalar
+      path fails for them due to the duplicated index.
+      :param dfStaticResults: static results data set or StaticResultGrids built from it
+      :param consideredLocation: considered available location(s) without case number e.g. "OS"
+      :param scalingFactorS: calculated scaling factor(s) s
+      :param maxWasteHeatRoomW: max. waste heat(s) in Watt
+      :param maxMoistureLoad: max. moisture load(s) in room in kg/s
+      :param dfQueries: alternatively a pd.DataFrame with the columns consideredLocation, scalingFactorS,
+                        maxWasteHeatRoomW and maxMoistureLoad (one query per row)
+      :return: pd.DataFrame with one row of interpolated results per query
+      """
+      if isinstance(dfStaticResults, StaticResultGrids):
+            grids = dfStaticResults
+      else:
+            grids = StaticResultGrids.fromDataFrame(dfStaticResults)
+      if dfQueries is not None:
+            consideredLocation = dfQueries["consideredLocation"].to_numpy()
+            scalingFactorS = dfQueries["scalingFactorS"].to_numpy()
+            maxWasteHeatRoomW = dfQueries["maxWasteHeatRoomW"].to_numpy()
+            maxMoistureLoad = dfQueries["maxMoistureLoad"].to_numpy()
+      finalResultsOfInterpolation = grids.interpolate(consideredLocation, scalingFactorS, maxWasteHeatRoomW,
+                                                      maxMoistureLoad)
+      if dfQueries is not None:
+            finalResultsOfInterpolation.index = dfQueries.index
+      return finalResultsOfInterpolation
+
+# results of the relocation ranking
+RANKING_COLUMNS = ["OutsideTemperatureDegrees", "OutsideRelativeHumidity", "electricEnergyKwh", "naturalGasEnergyKwh",
+                   "districtHeatingEnergyKwh", "finalEnergy"]
+
+def rankLocations(dfStaticResults, scalingFactorS: float, maxWasteHeatRoomW: float, maxMoistureLoad: float,
+                  sortBy: str = "finalEnergy", locations: list = None):
+      """
+      This function ranks all locations of the static result data set as relocation candidates for one set of boundary
+      parameters. All locations are interpolated in one shared pass over the pre-sorted grids.
+      :param dfStaticResults: static results data set or StaticResultGrids built from it
+      :param scalingFactorS: calculated scaling factor s
+      :param maxWasteHeatRoomW: max. waste heat in Watt
+      :param maxMoistureLoad: max. moisture load in room in kg/s
+      :param sortBy: result the locations are sorted by e.g. "finalEnergy" or "electricEnergyKwh"
+      :param locations: locations without case number to be ranked, defaults to all locations of the data set
+      :return: pd.DataFrame indexed by location with the averaged climate, the energy demands in kWh and the rank,
+               sorted in ascending order of sortBy
+      """
+      return rankLocationsBatch(dfStaticResults, [scalingFactorS], [maxWasteHeatRoomW], [maxMoistureLoad], [sortBy],
+                                locations=locations)[0]
+
+def rankLocationsBatch(dfStaticResults, scalingFactorS, maxWasteHeatRoomW, maxMoistureLoad, sortBy,
+                       locations: list = None):
+      """
+      This function ranks all locations of the static result data set for many sets of boundary parameters at once.
+      The locations of all sets are interpolated in one shared pass over the pre-sorted grids.
+      :param dfStaticResults: static results data set or StaticResultGrids built from it
+      :param scalingFactorS: array-like: calculated scaling factor s of each set
+      :param maxWasteHeatRoomW: array-like: max. waste heat in Watt of each set
+      :param maxMoistureLoad: array-like: max. moisture load in room in kg/s of each set
+      :param sortBy: list of str: result the locations of each set are sorted by e.g. "finalEnergy"
+      :param locations: locations without case number to be ranked, defaults to all locations of the data set
+      :return: list of pd.DataFrame, one ranking per set (see rankLocations)
+      """
+      for column in sortBy:
+            if column not in RANKING_COLUMNS:
+                  raise ValueError("sortBy must be one of {}, got {}".format(RANKING_COLUMNS, column))
+      if isinstance(dfStaticResults, StaticResultGrids):
+            grids = dfStaticResults
+      else:
+            grids = StaticResultGrids.fromDataFrame(dfStaticResults)
+      if locations is None:
+            locations = grids.locations
+      locations = np.asarray(locations, dtype=object)
+      nSets = len(sortBy)
+      dfResults = grids.selectColumns(RANKING_COLUMNS).interpolate(
+            np.tile(locations, nSets), np.repeat(np.asarray(scalingFactorS, dtype=np.float64), len(locations)),
+            np.repeat(np.asarray(maxWasteHeatRoomW, dtype=np.float64), len(locations)),
+            np.repeat(np.asarray(maxMoistureLoad, dtype=np.float64), len(locations)))
+      locationIndex = pd.Index(locations.astype(str), name="location")
+      rankings = []
+      for i, column in enumerate(sortBy):
+            dfRanking = dfResults.iloc[i * len(locations):(i + 1) * len(locations)][RANKING_COLUMNS]
+            dfRanking.index = locationIndex
+            dfRanking = dfRanking.sort_values(by=column, kind="stable")
+            dfRanking["rank"] = np.arange(1, len(dfRanking) + 1)
+            rankings.append(dfRanking)
+      return rankings
+
 
 if __name__ == "__main__":
 
       ########### read in data set ############
       current_dir = os.path.dirname(os.path.realpath(__file__))
       staticResultPath = os.path.join(current_dir, "data", "automateSimulationStaticResults.csv")
-      dfStaticResults = pd.read_csv(staticResultPath, index_col=0)
+      staticResultIndex = loadStaticResultIndex(staticResultPath)
+      dfStaticResults = staticResultIndex.dfStaticResults
 
       ########### boundary parameters ############
       consideredLocation = "OS" # considered available location without case number e.g. "OS"
@@ -126,3 +258,8 @@ if __name__ == "__main__":
       print("The final results of the interpolation are:")
       print(finalResultsOfInterpolation)
 
+      dfRanking = rankLocations(staticResultIndex.grids, scalingFactorS=scalingFactorS,
+                                maxWasteHeatRoomW=maxWasteHeatRoomW, maxMoistureLoad=maxMoistureLoad)
+      print("Ranking of all locations as relocation candidates:")
+      print(dfRanking)
+
@@ -12,24 +12,349 @@ Licence:     CC BY-SA 4.0
 """
 
 import os
+import time
 import pandas as pd
 import energeticEvaluations as enEval
 import numpy as np
 import helpers.helperFuncs as helperFuncs
-from sklearn.model_selection import cross_val_score
-from sklearn.model_selection import RepeatedKFold
-from sklearn.multioutput import RegressorChain
-from xgboost import XGBRegressor
-from helpers.stackingEstimator import StackingEstimator
-from sklearn.feature_selection import VarianceThreshold
-from sklearn.pipeline import make_pipeline, make_union
-from sklearn.preprocessing import FunctionTransformer
-from sklearn.ensemble import AdaBoostRegressor
-from copy import copy
+import helpers.profiling as profiling
+from helpers.staticResultIndex import loadStaticResultIndex
+from helpers.climateInterpolation import ClimateInterpolator
+from helpers.modelRegistry import ModelRegistry
+from helpers.crossValidation import CrossValidationRunner
+from helpers.foldEnsemble import FoldEnsemble
+from copy import copy, deepcopy
+# sklearn and xgboost are imported in the functions that build or fit models, so that interpolation-only tools and
+# worker processes predicting with stored models do not pay for importing them at start-up
+
+# model inputs and outputs in the order used for training and prediction
+X_columnNames = ["ScalingFactorS","DryRoomHeatLoad","DryRoomMoistureLoad","OutsideRelativeHumidity","OutsideTemperatureDegrees"]
+y_columnNames = ["electricEnergyKwh","naturalGasEnergyKwh","districtHeatingEnergyKwh"]
+
+def createMultiOutputRegressionModel(compactTraining: bool = False, multiOutput: bool = False):
+    """
+    This function creates the (unfitted) chained multi-output regression model found by TPOT
+    :param compactTraining: bool: replace the union of input copies and the two StackingEstimators by one
+                            StackedFeatures transformer seeing every input once (no copies of the inputs and synthetic
+                            features per stage, about a quarter less training time). Predictions differ from the
+                            exported pipeline within the scatter of the model, see helpers/stackedFeatures.py
+    :param multiOutput: bool: instead of the chain of three pipelines, one pipeline predicting all targets jointly:
+                        a multi-output XGBRegressor adds its predictions of all targets as stacked features for the final
+                        multi-output XGBRegressor (AdaBoost has no multi-output mode and is left out). See
+                        compareModelModes for accuracy and cost compared to the chain. Compiled inference
+                        (CompiledMultiOutputRegression), the fold ensemble of getFoldEnsemble and
+                        warmStartMultiOutputRegressionModel support only the chain
+    :return: RegressorChain of the exported TPOT pipeline, or Pipeline if multiOutput. n_jobs of the XGBRegressors is
+             helperFuncs.innerThreads(), i.e. all cores of the compute budget when built in the main process
+    """
+    from sklearn.multioutput import RegressorChain
+    from sklearn.feature_selection import VarianceThreshold
+    from sklearn.pipeline import make_pipeline, make_union
+    from sklearn.preprocessing import FunctionTransformer
+    from sklearn.ensemble import AdaBoostRegressor
+    from xgboost import XGBRegressor
+    from helpers.stackingEstimator import StackingEstimator
+    from helpers.stackedFeatures import StackedFeatures
+
+    stackedXGB = XGBRegressor(learning_rate=0.1, max_depth=3, min_child_weight=1, n_estimators=100, n_jobs=1,
+                              objective="reg:squarederror", subsample=1.0, verbosity=0)
+    if multiOutput:
+        # the XGBRegressors fit one tree per target and boosting round on the shared stacked features
+        multiOutputModel = make_pipeline(
+            StackingEstimator(estimator=stackedXGB),
+            VarianceThreshold(threshold=0.01),
+            XGBRegressor(learning_rate=0.1, max_depth=10, min_child_weight=1, n_estimators=100, n_jobs=1,
+                         objective="reg:squarederror", subsample=1.0, verbosity=0)
+        )
+        helperFuncs.set_param_recursive(multiOutputModel.steps, 'random_state', 42)
+        return helperFuncs.setInnerThreads(multiOutputModel, helperFuncs.innerThreads())
+    stackedAdaBoost = AdaBoostRegressor(learning_rate=1.0, loss="exponential", n_estimators=100)
+    if compactTraining:
+        stackingSteps = [StackedFeatures([("xgbregressor", stackedXGB), ("adaboostregressor", stackedAdaBoost)])]
+    else:
+        stackingSteps = [
+            make_union(
+                FunctionTransformer(copy),
+                FunctionTransformer(copy)
+            ),
+            StackingEstimator(estimator=stackedXGB),
+            StackingEstimator(estimator=stackedAdaBoost)
+        ]
+    XGBSingleOutput = make_pipeline(
+        *stackingSteps,
+        VarianceThreshold(threshold=0.01),
+        XGBRegressor(learning_rate=0.1, max_depth=10, min_child_weight=1, n_estimators=100, n_jobs=1,
+                     objective="reg:squarederror", subsample=1.0, verbosity=0)
+    )
+    # Fix random state for all the steps in exported pipeline: with 5 inputs and trained with 100 tpot generations and populations
+    helperFuncs.set_param_recursive(XGBSingleOutput.steps, 'random_state', 42)
+    # define the chained multi-output wrapper model. Its XGBRegressors use the threads of the compute budget of this
+    # process: all cores in the main process (the exported pipeline pinned them to n_jobs=1), the share of a worker
+    # in the process pools
+    return helperFuncs.setInnerThreads(RegressorChain(XGBSingleOutput), helperFuncs.innerThreads())
+
+def getTrainingData(dfStaticResults: pd.DataFrame):
+    """
+    This function extracts the training inputs and outputs of the regression model from the static result data set
+    :param dfStaticResults: pd.DataFrame: static results data set
+    :return: tuple of np.ndarray X and y
+    """
+    X = dfStaticResults[X_columnNames].to_numpy()
+    y = dfStaticResults[y_columnNames].to_numpy()
+    return X, y
+
+def getFittedMultiOutputRegressionModel(dfStaticResults: pd.DataFrame, modelRegistry: ModelRegistry,
+                                        multiOutput: bool = False):
+    """
+    This function returns the multi-output regression model fitted on the static result data set. The model is only
+    fitted once per data set and pipeline configuration and afterwards loaded from the model registry.
+    :param dfStaticResults: pd.DataFrame: static results data set
+    :param modelRegistry: ModelRegistry: registry in which the fitted model is stored
+    :param multiOutput: bool: joint multi-output pipeline instead of the chain, see createMultiOutputRegressionModel
+                        (cannot be compiled or warm-started)
+    :return: tuple of fitted model and its metadata dictionary
+    """
+    X, y = getTrainingData(dfStaticResults)
+    return modelRegistry.getOrFit(createMultiOutputRegressionModel(multiOutput=multiOutput), X, y,
+                                  metadata={"X_columnNames": X_columnNames, "y_columnNames": y_columnNames})
+
+def warmStartMultiOutputRegressionModel(model, X: np.ndarray, y: np.ndarray, newSamples, nAdditionalTrees: int = 100,
+                                        validationFraction: float = 0.2, tolerance: float = 1.1,
+                                        referenceMAE: float = None, random_state: int = 42):
+    """
+    This function extends a fitted multi-output regression model by new training samples without fitting it again:
+    the final XGBRegressor of every estimator of the chain continues boosting with nAdditionalTrees further trees on
+    all samples, while the stacked estimators and the variance threshold keep their fit. A random part of the new
+    samples is held out for validation: the warm-started model is only accepted if its mean absolute error on these
+    samples is at most tolerance times a reference error, otherwise the model is fitted again on all samples.
+    The reference is referenceMAE if given (e.g. the mean of the stored cross validation scores of the model), else
+    the validation error of a model fitted again on the same training samples, i.e. the warm start has to be about as
+    good as a refit. The given model is no reference, it has never seen the new samples and is beaten almost always.
+    :param model: RegressorChain of createMultiOutputRegressionModel fitted on the samples not in newSamples
+    :param X: np.ndarray: training inputs of all (previous and new) samples
+    :param y: np.ndarray: training targets of all samples
+    :param newSamples: indices or boolean mask of the new samples in X and y
+    :param nAdditionalTrees: int: number of trees added to the final XGBRegressor of every target
+    :param validationFraction: float: fraction of the new samples held out for the validation check
+    :param tolerance: float: accepted ratio of the validation error of the warm-started model and the reference error
+    :param referenceMAE: float: reference mean absolute error in kWh, None fits a reference model on the training
+                         samples (one additional fit)
+    :param random_state: int: seed of the validation split
+    :return: tuple of fitted model and dictionary with the validation errors and whether the warm start was accepted
+    """
+    from sklearn.base import clone
+    from xgboost import XGBRegressor
+
+    if not hasattr(model, "estimators_"):
+        raise ValueError("Only the chained model can be warm-started, not {}".format(type(model).__name__))
+    newSamples = np.arange(len(X))[newSamples]
+    nValidation = min(len(newSamples) - 1, max(1, int(round(validationFraction * len(newSamples)))))
+    if nValidation < 1:
+        raise ValueError("At least two new samples are necessary for the validation of the warm start")
+    validationSamples = np.random.default_rng(random_state).choice(newSamples, size=nValidation, replace=False)
+    trainSamples = np.setdiff1d(np.arange(len(X)), validationSamples)
+
+    warmModel = deepcopy(model)
+    # the estimators of the chain are trained on the inputs and the true targets of the preceding ones
+    yChain = y[:, warmModel.order_]
+    for i, pipeline in enumerate(warmModel.estimators_):
+        finalStepName, finalXGB = pipeline.steps[-1]
+        if not isinstance(finalXGB, XGBRegressor):
+            raise ValueError("The final step {} of the pipeline cannot be warm-started".format(finalStepName))
+        booster = finalXGB.get_booster()
+        nTrees = booster.num_boosted_rounds()
+        features = pipeline[:-1].transform(np.hstack([X[trainSamples], yChain[trainSamples, :i]]))
+        finalXGB.set_params(n_estimators=nAdditionalTrees)
+        finalXGB.fit(features, yChain[trainSamples, i], xgb_model=booster)
+        finalXGB.set_params(n_estimators=nTrees + nAdditionalTrees)
+
+    def validationMAE(fittedModel):
+        return float(np.mean(np.abs(fittedModel.predict(X[validationSamples]) - y[validationSamples])))
+
+    validation = {"validationSamples": int(nValidation),
+                  "previousValidationMAE": validationMAE(model),
+                  "warmStartValidationMAE": validationMAE(warmModel)}
+    if referenceMAE is None:
+        validation["reference"] = "refit"
+        validation["referenceMAE"] = validationMAE(clone(model).fit(X[trainSamples], y[trainSamples]))
+    else:
+        validation["reference"] = "given"
+        validation["referenceMAE"] = float(referenceMAE)
+    validation["warmStarted"] = validation["warmStartValidationMAE"] <= tolerance * validation["referenceMAE"]
+    if validation["warmStarted"]:
+        return warmModel, validation
+    return clone(model).fit(X, y), validation
+
+def getExtendedMultiOutputRegressionModel(dfStaticResults: pd.DataFrame, nPreviousSamples: int,
+                                          modelRegistry: ModelRegistry, nAdditionalTrees: int = 100,
+                                          referenceMAE: float = None):
+    """
+    This function returns the multi-output regression model of a static result data set whose last rows were appended
+    after the model of its first nPreviousSamples rows was fitted (see helpers/staticResultIndex.appendStaticResults).
+    The registered model of the previous rows is warm-started with the new rows (see
+    warmStartMultiOutputRegressionModel) and registered for the extended data set, so that
+    getFittedMultiOutputRegressionModel returns it from then on.
+    :param dfStaticResults: pd.DataFrame: extended static results data set
+    :param nPreviousSamples: int: number of rows of the data set before the extension
+    :param modelRegistry: ModelRegistry: registry in which the fitted models are stored
+    :param nAdditionalTrees: int: number of trees added to the final XGBRegressor of every target
+    :param referenceMAE: float: reference error of the validation of the warm start, e.g. the mean cross validation
+                         score of the previous model; None compares with a refit on the training samples
+    :return: tuple of fitted model and its metadata dictionary (incl. the validation errors of the warm start)
+    """
+    X, y = getTrainingData(dfStaticResults)
+
+    def warmStart(estimator, XExtended, yExtended):
+        # only called if the model of the extended data set is not registered yet
+        previousModel, previousMetadata = getFittedMultiOutputRegressionModel(dfStaticResults.iloc[:nPreviousSamples],
+                                                                             modelRegistry)
+        model, validation = warmStartMultiOutputRegressionModel(previousModel, XExtended, yExtended,
+                                                                slice(nPreviousSamples, None),
+                                                                nAdditionalTrees=nAdditionalTrees,
+                                                                referenceMAE=referenceMAE)
+        validation["warmStartedFrom"] = previousMetadata["key"]
+        return model, validation
+
+    return modelRegistry.getOrFit(createMultiOutputRegressionModel(), X, y, fitFunction=warmStart,
+                                  metadata={"X_columnNames": X_columnNames, "y_columnNames": y_columnNames})
+
+def predictMultiOutputRegression(model, averageOutsideRelativeHumidity, averageOutsideTemperature, scalingFactorS,
+                                 maxWasteHeatRoomW, maxMoistureLoad):
+    """
+    This function predicts the energy demands of many scenarios at once with a fitted multi-output regression model
+    :param model: fitted multi-output regression model
+    :param averageOutsideRelativeHumidity: float or array-like: average outside relative humidity in %
+    :param averageOutsideTemperature: float or array-like: average outside temperature in °C
+    :param scalingFactorS: float or array-like: calculated scaling factor s
+    :param maxWasteHeatRoomW: float or array-like: max. waste heat in Watt
+    :param maxMoistureLoad: float or array-like: max. moisture load in room in kg/s
+    :return: pd.DataFrame with one row of predicted energy demands in kWh per scenario
+    """
+    yhat = model.predict(scenarioInputs(averageOutsideRelativeHumidity, averageOutsideTemperature, scalingFactorS,
+                                        maxWasteHeatRoomW, maxMoistureLoad))
+    return pd.DataFrame(yhat, columns=y_columnNames)
+
+def scenarioInputs(averageOutsideRelativeHumidity, averageOutsideTemperature, scalingFactorS, maxWasteHeatRoomW,
+                   maxMoistureLoad):
+    """
+    This function builds the model inputs (in the same order as X_columnNames) of many scenarios at once
+    :param averageOutsideRelativeHumidity: float or array-like: average outside relative humidity in %
+    :return: np.ndarray of shape (n_scenarios, 5)
+    """
+    columns = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (
+        scalingFactorS, maxWasteHeatRoomW, maxMoistureLoad, averageOutsideRelativeHumidity, averageOutsideTemperature)))
+    X = np.column_stack([column.ravel() for column in columns])
+    X[:, 3] /= 100
+    return X
+
+def getFoldEnsemble(dfStaticResults: pd.DataFrame, crossValidationRunner: CrossValidationRunner):
+    """
+    This function returns the models of the cross validation of the multi-output regression model as ensemble for
+    per-scenario prediction intervals. The folds are the ones stored by the cross validation, so that no model is fitted
+    if the cross validation has already run.
+    :param dfStaticResults: pd.DataFrame: static results data set
+    :param crossValidationRunner: CrossValidationRunner: runner storing the folds of the cross validation
+    :return: FoldEnsemble
+    """
+    X, y = getTrainingData(dfStaticResults)
+    return FoldEnsemble.fromCrossValidation(crossValidationRunner, createMultiOutputRegressionModel(), X, y,
+                                            targetNames=y_columnNames)
+
+def compareModelModes(dfStaticResults: pd.DataFrame, crossValidationRunner: CrossValidationRunner, modes: dict = None):
+    """
+    This function compares accuracy and cost of model variants on the same folds as the cross validation of the
+    runner. All variants are fitted one after another in this process, so the timings are comparable.
+    :param dfStaticResults: pd.DataFrame: static results data set
+    :param crossValidationRunner: CrossValidationRunner: defines the folds (n_splits, n_repeats, random_state)
+    :param modes: dict: name -> keyword arguments of createMultiOutputRegressionModel, defaults to the chain, the
+                  compact chain and the multi-output pipeline
+    :return: pd.DataFrame with one row per mode: total fit and predict time over all folds in seconds, mean absolute
+             error per target and averaged over the targets in kWh
+    """
+    if modes is None:
+        modes = {"chain": {}, "compactChain": {"compactTraining": True}, "multiOutput": {"multiOutput": True}}
+    X, y = getTrainingData(dfStaticResults)
+    splits = crossValidationRunner.splits(X)
+    records = []
+    for name, kwargs in modes.items():
+        fitSeconds, predictSeconds, errors = 0.0, 0.0, []
+        for trainIndex, testIndex in splits:
+            model = createMultiOutputRegressionModel(**kwargs)
+            start = time.perf_counter()
+            model.fit(X[trainIndex], y[trainIndex])
+            fitSeconds += time.perf_counter() - start
+            start = time.perf_counter()
+            yhat = model.predict(X[testIndex])
+            predictSeconds += time.perf_counter() - start
+            errors.append(np.mean(np.abs(yhat - y[testIndex]), axis=0))
+        meanErrors = np.mean(errors, axis=0)
+        record = {"mode": name, "fitSeconds": fitSeconds, "predictSeconds": predictSeconds}
+        record.update({"{}MAE".format(col): error for col, error in zip(y_columnNames, meanErrors)})
+        record["meanMAE"] = float(np.mean(meanErrors))
+        records.append(record)
+    return pd.DataFrame(records).set_index("mode")
+
+def predictMultiOutputRegressionInterval(foldEnsemble: FoldEnsemble, averageOutsideRelativeHumidity,
+                                         averageOutsideTemperature, scalingFactorS, maxWasteHeatRoomW, maxMoistureLoad,
+                                         alpha: float = 0.1):
+    """
+    This function predicts the energy demands of many scenarios at once together with their uncertainty
+    :param foldEnsemble: FoldEnsemble: fold models of the cross validation, see getFoldEnsemble
+    :param averageOutsideRelativeHumidity: float or array-like: average outside relative humidity in %
+    :param averageOutsideTemperature: float or array-like: average outside temperature in °C
+    :param scalingFactorS: float or array-like: calculated scaling factor s
+    :param maxWasteHeatRoomW: float or array-like: max. waste heat in Watt
+    :param maxMoistureLoad: float or array-like: max. moisture load in room in kg/s
+    :param alpha: float: miscoverage level, e.g. 0.1 for a 90 % prediction interval
+    :return: pd.DataFrame with one row per scenario: mean of the fold models, their standard deviation and the lower
+             and upper bound of the prediction interval per energy carrier in kWh (e.g. electricEnergyKwh,
+             electricEnergyKwhStd, electricEnergyKwhLower, electricEnergyKwhUpper)
+    """
+    return foldEnsemble.predict(scenarioInputs(averageOutsideRelativeHumidity, averageOutsideTemperature,
+                                               scalingFactorS, maxWasteHeatRoomW, maxMoistureLoad), alpha=alpha)
+
+def rankLocationsMultiOutputRegression(model, dfClimates: pd.DataFrame, scalingFactorS: float, maxWasteHeatRoomW: float,
+                                       maxMoistureLoad: float, dfStaticResults=None, sortBy: str = "finalEnergy"):
+    """
+    This function ranks relocation candidates with arbitrary climates for one set of boundary parameters using one
+    batch prediction of the fitted multi-output regression model. Optionally, the locations of the static result data
+    set are interpolated and ranked together with them.
+    :param model: fitted multi-output regression model
+    :param dfClimates: pd.DataFrame indexed by candidate name with the columns averageOutsideRelativeHumidity in % and
+                       averageOutsideTemperature in °C
+    :param scalingFactorS: float: calculated scaling factor s
+    :param maxWasteHeatRoomW: float: max. waste heat in Watt
+    :param maxMoistureLoad: float: max. moisture load in room in kg/s
+    :param dfStaticResults: static results data set or StaticResultGrids to rank its locations as well (optional)
+    :param sortBy: str: result the candidates are sorted by e.g. "finalEnergy" or "electricEnergyKwh"
+    :return: pd.DataFrame indexed by location with climate, energy demands in kWh, rank and source ("regression" or
+             "interpolation"), sorted in ascending order of sortBy
+    """
+    if sortBy not in enEval.RANKING_COLUMNS:
+        raise ValueError("sortBy must be one of {}, got {}".format(enEval.RANKING_COLUMNS, sortBy))
+    dfPredicted = predictMultiOutputRegression(model, dfClimates["averageOutsideRelativeHumidity"].to_numpy(),
+                                               dfClimates["averageOutsideTemperature"].to_numpy(), scalingFactorS,
+                                               maxWasteHeatRoomW, maxMoistureLoad)
+    dfPredicted.index = pd.Index(dfClimates.index, name="location")
+    dfPredicted["finalEnergy"] = dfPredicted[y_columnNames].sum(axis=1)
+    # same units as the static data set (relative humidity as fraction)
+    dfPredicted["OutsideTemperatureDegrees"] = dfClimates["averageOutsideTemperature"].to_numpy()
+    dfPredicted["OutsideRelativeHumidity"] = dfClimates["averageOutsideRelativeHumidity"].to_numpy() / 100
+    dfPredicted["source"] = "regression"
+    dfRanking = dfPredicted[enEval.RANKING_COLUMNS + ["source"]]
+    if dfStaticResults is not None:
+        dfInterpolated = enEval.rankLocations(dfStaticResults, scalingFactorS, maxWasteHeatRoomW, maxMoistureLoad)
+        dfInterpolated = dfInterpolated[enEval.RANKING_COLUMNS].assign(source="interpolation")
+        dfRanking = pd.concat([dfInterpolated, dfRanking])
+    dfRanking = dfRanking.sort_values(by=sortBy, kind="stable")
+    dfRanking.insert(len(enEval.RANKING_COLUMNS), "rank", np.arange(1, len(dfRanking) + 1))
+    return dfRanking
 
 def interpolateScalingFactorAndInternalLoadsMultiOutputRegression(dfStaticResults: pd.DataFrame, averageOutsideRelativeHumidity: float,
                                              averageOutsideTemperature: float, scalingFactorS: float,
-                                                                  maxWasteHeatRoomW: float, maxMoistureLoad: float):
+                                                                  maxWasteHeatRoomW: float, maxMoistureLoad: float,
+                                                                  modelRegistry: ModelRegistry = None,
+                                                                  crossValidationRunner: CrossValidationRunner = None):
     """
     This function interpolates the scaling factor and internal loads of the static result data set
     :param dfStaticResults: pd.DataFrame: static results data set
@@ -38,37 +363,25 @@ def interpolateScalingFactorAndInternalLoadsMultiOutputRegression(dfStaticResult
     :param scalingFactorS: float: calculated scaling factor s
     :param maxWasteHeatRoomW: float: max. waste heat in Watt
     :param maxMoistureLoad: float: max. moisture load in room in kg/s
+    :param modelRegistry: ModelRegistry: optional registry to fit the model only once and reuse it in later calls
+    :param crossValidationRunner: CrossValidationRunner: optional runner caching the scores of the cross validation
     :return: dictionary of interpolated results based on static result data set using multi-output regression model.
              Furthermore, 10-fold cross validation with 3 repetitions is performed for the model to compute uncertainties
              as mean absolute error with unit of the predicted variable (kWh)
     """
 
+    from sklearn.base import clone
+    from sklearn.model_selection import cross_val_score
+    from sklearn.model_selection import RepeatedKFold
+
     evaluateResultsKFold = True
     # create datasets
-    X_columnNames = ["ScalingFactorS","DryRoomHeatLoad","DryRoomMoistureLoad","OutsideRelativeHumidity","OutsideTemperatureDegrees"]
-    y_columnNames = ["electricEnergyKwh","naturalGasEnergyKwh","districtHeatingEnergyKwh"]
-
-    X = dfStaticResults[X_columnNames].to_numpy()
-    y = dfStaticResults[y_columnNames].to_numpy()
-
-    XGBSingleOutput = make_pipeline(
-        make_union(
-            FunctionTransformer(copy),
-            FunctionTransformer(copy)
-        ),
-        StackingEstimator(
-            estimator=XGBRegressor(learning_rate=0.1, max_depth=3, min_child_weight=1, n_estimators=100, n_jobs=1,
-                                   objective="reg:squarederror", subsample=1.0, verbosity=0)),
-        StackingEstimator(estimator=AdaBoostRegressor(learning_rate=1.0, loss="exponential", n_estimators=100)),
-        VarianceThreshold(threshold=0.01),
-        XGBRegressor(learning_rate=0.1, max_depth=10, min_child_weight=1, n_estimators=100, n_jobs=1,
-                     objective="reg:squarederror", subsample=1.0, verbosity=0)
-    )
-    # Fix random state for all the steps in exported pipeline: with 5 inputs and trained with 100 tpot generations and populations
-    helperFuncs.set_param_recursive(XGBSingleOutput.steps, 'random_state', 42)
-    # define the chained multi-output wrapper model
-    model = RegressorChain(XGBSingleOutput)
-    model.fit(X, y)
+    X, y = getTrainingData(dfStaticResults)
+    if modelRegistry is None:
+        model = createMultiOutputRegressionModel()
+        model.fit(X, y)
+    else:
+        model, _ = getFittedMultiOutputRegressionModel(dfStaticResults, modelRegistry)
     # make a prediction (in the same order as X_columnNames)
     row = [scalingFactorS, maxWasteHeatRoomW, maxMoistureLoad, averageOutsideRelativeHumidity/100, averageOutsideTemperature]
     yhat = model.predict(np.asarray([row]))
@@ -78,25 +391,57 @@ def interpolateScalingFactorAndInternalLoadsMultiOutputRegression(dfStaticResult
         d[A] = B
     # just define n_scores dummy output if evaluateResultsKFold=False
     n_scores = np.ones(5)
-    if evaluateResultsKFold:
+    if evaluateResultsKFold and crossValidationRunner is not None:
+        # stored per data set, pipeline configuration and split seed, only missing folds are fitted
+        n_scores = crossValidationRunner.scores(createMultiOutputRegressionModel(), X, y)
+    elif evaluateResultsKFold:
         # define the evaluation procedure to quantify model uncertainty
         cv = RepeatedKFold(n_splits=10, n_repeats=3, random_state=1)
         # evaluate the model and collect the scores. Available scoring for model evaluation: https://scikit-learn.org/stable/modules/model_evaluation.html
-        n_scores = cross_val_score(model, X, y, scoring='neg_mean_absolute_error', cv=cv, n_jobs=-1)
+        # split the compute budget between the parallel folds and the XGBoost threads within each fold
+        nWorkers = helperFuncs.effectiveNJobs(-1, cv.get_n_splits())
+        cvModel = helperFuncs.setInnerThreads(clone(model), helperFuncs.innerThreads(nWorkers))
+        n_scores = cross_val_score(cvModel, X, y, scoring='neg_mean_absolute_error', cv=cv, n_jobs=nWorkers)
         # force the scores to be positive => because mean absolute error is computed this n_scores has the unit of predicted values (kWh)
         n_scores = np.absolute(n_scores)
 
     return d, n_scores
 
+def interpolateScalingFactorAndInternalLoadsClimate(climateInterpolator: ClimateInterpolator, averageOutsideRelativeHumidity,
+                                                    averageOutsideTemperature, scalingFactorS, maxWasteHeatRoomW,
+                                                    maxMoistureLoad):
+    """
+    Deterministic alternative to interpolateScalingFactorAndInternalLoadsMultiOutputRegression without a fitted model:
+    interpolation on the precomputed climate triangulation of the static result data set (see
+    helpers/climateInterpolation.py). All parameters may be arrays of many scenarios.
+    :param climateInterpolator: ClimateInterpolator: e.g. StaticResultIndex.climateInterpolator
+    :param averageOutsideRelativeHumidity: float or array-like: average outside relative humidity in %
+    :param averageOutsideTemperature: float or array-like: average outside temperature in °C
+    :param scalingFactorS: float or array-like: calculated scaling factor s
+    :param maxWasteHeatRoomW: float or array-like: max. waste heat in Watt
+    :param maxMoistureLoad: float or array-like: max. moisture load in room in kg/s
+    :return: pd.DataFrame with one row of interpolated energy demands (columns as y_columnNames) per scenario
+    """
+    dfResults = climateInterpolator.interpolate(scalingFactorS, maxWasteHeatRoomW, maxMoistureLoad,
+                                                averageOutsideTemperature,
+                                                np.asarray(averageOutsideRelativeHumidity, dtype=np.float64)/100)
+    return dfResults[y_columnNames]
 
 if __name__ == "__main__":
 
+      # record timing spans of the stages (CSV load, fits, folds, ...) and export them to data/profiles at the end
+      profileRun = False
+      # compare accuracy and training/inference time of the chain and the joint multi-output model on the CV folds
+      compareModes = False
+      if profileRun:
+            profiling.enable()
+
       ########### read in data set ############
       current_dir = os.path.dirname(os.path.realpath(__file__))
       staticResultPath = os.path.join(current_dir, "data", "automateSimulationStaticResults.csv")
-      dfStaticResults = pd.read_csv(staticResultPath, index_col=0)
       # currently the locations "DU" and "LV" are outliers, thus exclude them:
-      dfStaticResults = helperFuncs.extendStaticDF(dfStaticResults)
+      staticResultIndex = loadStaticResultIndex(staticResultPath)
+      dfStaticResults = staticResultIndex.dfStaticResults
 
       ########### boundary parameters ############
       averageOutsideRelativeHumidity = 77.77662949012851 
@@ -126,12 +471,56 @@ if __name__ == "__main__":
       print("The scaling factor S is: {}, volume flow is: {} m^3/h, max. moisture load is: {} kg/s"
             .format(round(scalingFactorS, 3), round(scalingFactorS*11000, 3), round(maxMoistureLoad, 7)))
 
+      # fitted models are stored once per data set and pipeline configuration
+      modelRegistry = ModelRegistry(os.path.join(current_dir, "data", "cache", "models"))
+      crossValidationRunner = CrossValidationRunner(os.path.join(current_dir, "data", "cache", "crossValidation"),
+                                                    n_splits=10, n_repeats=3, random_state=1)
       d, n_scores = interpolateScalingFactorAndInternalLoadsMultiOutputRegression(dfStaticResults,
                                     averageOutsideRelativeHumidity=averageOutsideRelativeHumidity,
                                     averageOutsideTemperature=averageOutsideTemperatureDegrees, scalingFactorS=scalingFactorS,
-                                    maxWasteHeatRoomW=maxWasteHeatRoomW, maxMoistureLoad=maxMoistureLoad)
+                                    maxWasteHeatRoomW=maxWasteHeatRoomW, maxMoistureLoad=maxMoistureLoad,
+                                    modelRegistry=modelRegistry, crossValidationRunner=crossValidationRunner)
       print("The final results of the interpolation based on multi-output regression model are:")
       print(d)
       # summarize performance
       print("Mean Absolute Error: %.3f kWh. Standard deviation: (%.3f) kWh" % (np.mean(n_scores), np.std(n_scores)))
+      if compareModes:
+            print("Accuracy and cost of the model modes on the folds of the cross validation:")
+            print(compareModelModes(dfStaticResults, crossValidationRunner).to_string())
+      # per-scenario uncertainty from the stored fold models of the cross validation (no further fitting)
+      foldEnsemble = getFoldEnsemble(dfStaticResults, crossValidationRunner)
+      print("90 % prediction interval of the considered scenario:")
+      print(predictMultiOutputRegressionInterval(foldEnsemble, averageOutsideRelativeHumidity,
+                                                 averageOutsideTemperatureDegrees, scalingFactorS, maxWasteHeatRoomW,
+                                                 maxMoistureLoad).T)
+
+      # rank the considered climate against all locations of the static data set
+      dfClimates = pd.DataFrame({"averageOutsideRelativeHumidity": [averageOutsideRelativeHumidity],
+                                 "averageOutsideTemperature": [averageOutsideTemperatureDegrees]}, index=["candidate"])
+      model, _ = getFittedMultiOutputRegressionModel(dfStaticResults, modelRegistry)
+      dfRanking = rankLocationsMultiOutputRegression(model, dfClimates, scalingFactorS=scalingFactorS,
+                                                     maxWasteHeatRoomW=maxWasteHeatRoomW,
+                                                     maxMoistureLoad=maxMoistureLoad, dfStaticResults=dfStaticResults)
+      print("Ranking of the considered climate among the locations of the static data set:")
+      print(dfRanking)
+
+      # the same scenario interpolated between the climates of the static data set instead of predicted by the model
+      if staticResultIndex.climateInterpolator is not None:
+            print("Interpolation between the location climates of the static data set:")
+            print(interpolateScalingFactorAndInternalLoadsClimate(staticResultIndex.climateInterpolator,
+                                                                  averageOutsideRelativeHumidity,
+                                                                  averageOutsideTemperatureDegrees, scalingFactorS,
+                                                                  maxWasteHeatRoomW, maxMoistureLoad))
+
+      # compiled inference of the fitted model for repeated low-latency single scenario predictions (same values)
+      from helpers.compiledInference import CompiledMultiOutputRegression
+      compiledModel = CompiledMultiOutputRegression(model)
+      print(predictMultiOutputRegression(compiledModel, averageOutsideRelativeHumidity, averageOutsideTemperatureDegrees,
+                                         scalingFactorS, maxWasteHeatRoomW, maxMoistureLoad))
 
+      if profileRun:
+            profiling.disable()
+            profiling.exportAll(os.path.join(current_dir, "data", "profiles",
+                                             "energeticEvaluationsMultiOutputRegression"))
+            for total in profiling.summary()[:10]:
+                  print("{name}: {totalSeconds:.3f} s in {calls} calls".format(**total))
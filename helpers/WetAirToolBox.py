@@ -23,44 +23,92 @@ R_WD = 461.4 # Gas constant water vapour
 ratio_R = R_L/R_WD
 pG = 1013 # air pressure [hPa]
 
-def humidity_dewpoint2abs (T, T_TP):
-    ps = a * np.exp((b * T) / (c + T))   # Saturation vapour pressure in [hPa]
-    phi = np.exp((((T_TP*b*c)/(c+T)) - ((c*b*T)/(c+T))) / (T_TP + c))
-    pD = phi * ps
-    X = ratio_R * (pD / (pG - pD))
-    return X
-
-def humidity_dewpoint2abs2 (T, T_TP):
-    ps = a * np.exp((b * T) / (c + T))   # Saturation vapour pressure in [hPa]
-    phi = np.exp(((T_TP*b) / (T_TP+c)) - ((T*b) / (T+c)))
-    pD = phi * ps
-    X = ratio_R * (pD / (pG - pD))
-    return X
-
-
-def humidity_abs2rel(T, X):
-    ps = a * np.exp((b * T) / (c + T))
-    pD = pG*X/(ratio_R+X)
-    phi = pD/ps
-    return phi
-
-
-def humidity_rel2abs(T, phi):
-    phi = phi/100
-    ps = a * np.exp((b * T) / (c + T))
-    pD = phi * ps
-    X = ratio_R * (pD / (pG - pD))
-    return X
-
-def WaterVapurePartialPressure(X):
-    pD = pG*X/(ratio_R+X) # R_L/R_D = 0.622   p_D: Water vapour partial pressure in hPa
-    return pD # Water vapour partial pressure in hPa
-
-def humidity_abs2dewpoint(X):
-    pD = X*pG/(ratio_R+X)
-    T_TP = (c*np.log(pD/a)) / (b - np.log(pD/a))
-    return T_TP
-
-def relHumidity_Temp2dewPoint(T, phi):
+def _outBuffer(out, *arrays):
+    """Return out or a new float64 buffer with the broadcast shape of the given arrays"""
+    if out is None:
+        out = np.empty(np.broadcast_shapes(*(np.shape(x) for x in arrays)), dtype=np.float64)
+    return out
+
+
+def _result(out):
+    """0-d buffers are returned as numpy scalar like the plain expressions do"""
+    return out[()] if out.ndim == 0 else out
+
+
+def _saturationPressure(T, out):
+    np.add(c, T, out=out)
+    np.divide(T, out, out=out)
+    np.multiply(out, b, out=out)
+    np.exp(out, out=out)
+    np.multiply(out, a, out=out)
+    return out
+
+
+def _waterVapourPartialPressure(X, pG, out):
+    np.add(ratio_R, X, out=out)
+    np.divide(X, out, out=out)
+    np.multiply(out, pG, out=out)
+    return out
+
+
+def saturationPressure(T, out=None):
+    """Saturation vapour pressure in [hPa] by the Magnus formula, computed in place in out if given"""
+    return _result(_saturationPressure(T, _outBuffer(out, T)))
+
+
+def humidity_dewpoint2abs (T, T_TP, pG=pG, out=None):
+    """
+    Absolute humidity in [kg/kg] of air at temperature T with dew point T_TP (both in °C) at air pressure pG [hPa].
+    The relative humidity phi times the saturation pressure at T equals the saturation pressure at T_TP, so only
+    one exponential is evaluated; T merely enters the broadcast shape of the result.
+    """
+    out = _saturationPressure(T_TP, _outBuffer(out, T, T_TP))
+    # ratio_R * pD / (pG - pD) == ratio_R / (pG / pD - 1) without temporary arrays
+    np.divide(pG, out, out=out)
+    np.subtract(out, 1, out=out)
+    np.divide(ratio_R, out, out=out)
+    return _result(out)
+
+def humidity_dewpoint2abs2 (T, T_TP, pG=pG, out=None):
+    return humidity_dewpoint2abs(T, T_TP, pG=pG, out=out)
+
+
+def humidity_abs2rel(T, X, pG=pG, out=None):
+    pD = WaterVapurePartialPressure(X, pG=pG)
+    out = _saturationPressure(T, _outBuffer(out, T, X))
+    np.divide(pD, out, out=out)
+    return _result(out)
+
+
+def humidity_rel2abs(T, phi, pG=pG, out=None):
+    out = _saturationPressure(T, _outBuffer(out, T, phi))
+    np.multiply(out, phi, out=out)
+    np.divide(out, 100, out=out)
+    np.divide(pG, out, out=out)
+    np.subtract(out, 1, out=out)
+    np.divide(ratio_R, out, out=out)
+    return _result(out)
+
+def WaterVapurePartialPressure(X, pG=pG, out=None):
+    # R_L/R_D = 0.622   p_D: Water vapour partial pressure in hPa
+    return _result(_waterVapourPartialPressure(X, pG, _outBuffer(out, X))) # Water vapour partial pressure in hPa
+
+def humidity_abs2dewpoint(X, pG=pG, out=None):
+    out = _waterVapourPartialPressure(X, pG, _outBuffer(out, X))
+    np.divide(out, a, out=out)
+    np.log(out, out=out)
+    # c * ln / (b - ln) == c / (b / ln - 1) without temporary arrays
+    with np.errstate(divide="ignore"):
+        np.divide(b, out, out=out)
+    np.subtract(out, 1, out=out)
+    np.divide(c, out, out=out)
+    return _result(out)
+
+def relHumidity_Temp2dewPoint(T, phi, out=None):
     """Calculate dew point from temperature (°C) and relative humidity (%, e.g. 77 % => 0.77 as input)"""
-    return (109.8 + T) * (phi**(1/8.02)) - 109.8
\ No newline at end of file
+    if out is None:
+        return (109.8 + T) * (phi**(1/8.02)) - 109.8
+    np.power(phi, 1/8.02, out=out)
+    np.multiply(out, np.add(T, 109.8), out=out)
+    np.subtract(out, 109.8, out=out)
+    return _result(out)
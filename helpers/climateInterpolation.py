@@ -0,0 +1,162 @@
+"""
+-------------------------------------------------------------------------------
+Name:        climateInterpolation
+Purpose:     Precomputed interpolation of the static result data set over scaling factor, internal loads and climate
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import numpy as np
+import pandas as pd
+from helpers.interpolationGrids import StaticResultGrids
+
+# climate axes of the triangulation, the outside climate is constant within the cases of one location
+CLIMATE_COLUMNS = ["OutsideTemperatureDegrees", "OutsideRelativeHumidity"]
+
+
+class ClimateInterpolator:
+    """
+    Interpolation over (ScalingFactorS, DryRoomHeatLoad, DryRoomMoistureLoad, OutsideTemperatureDegrees,
+    OutsideRelativeHumidity). The heat and moisture loads of the data set are tied to the scaling factor and the
+    LoadScalingFactor, so the five axes do not span a volume that could be triangulated as a whole. Instead, the
+    location climates are triangulated (Delaunay, normalised axes) and every query is interpolated on the grids of
+    the three locations of its climate triangle exactly like interpolateScalingFactorAndInternalLoads does, then
+    combined with the barycentric weights. Climates outside the convex hull are projected onto the nearest hull edge.
+    At the climate of a location of the data set the result equals the interpolation of this location.
+    """
+
+    def __init__(self, grids: StaticResultGrids, climates: np.ndarray, climateMin: np.ndarray,
+                 climateScale: np.ndarray, simplices: np.ndarray, transforms: np.ndarray, hullEdges: np.ndarray):
+        """
+        :param grids: StaticResultGrids: sorted grids of the static result data set
+        :param climates: np.ndarray: (n_locations, 2) outside temperature and relative humidity of grids.locations
+        :param climateMin: np.ndarray: (2,) offset of the climate normalisation
+        :param climateScale: np.ndarray: (2,) scale of the climate normalisation
+        :param simplices: np.ndarray: (n_triangles, 3) location indices of the triangles
+        :param transforms: np.ndarray: (n_triangles, 3, 2) affine transforms to barycentric coordinates
+        :param hullEdges: np.ndarray: (n_edges, 2) location indices of the convex hull edges
+        """
+        self.grids = grids
+        self.climates = climates
+        self.climateMin = climateMin
+        self.climateScale = climateScale
+        self.simplices = simplices
+        self.transforms = transforms
+        self.hullEdges = hullEdges
+        self._points = (climates - climateMin) / climateScale
+
+    @classmethod
+    def fromGrids(cls, grids: StaticResultGrids):
+        """
+        Triangulate the location climates of the grids
+        :param grids: StaticResultGrids: sorted grids of the static result data set
+        :return: ClimateInterpolator
+        """
+        from scipy.spatial import Delaunay, QhullError
+
+        climateColumns = [grids.numericColumns.index(col) for col in CLIMATE_COLUMNS]
+        rowOffsets = grids.groupOffsets[grids.locationGroupOffsets]
+        climates = np.add.reduceat(grids.values[:, climateColumns], rowOffsets[:-1]) / np.diff(rowOffsets)[:, None]
+        if len(climates) < 3:
+            raise ValueError("At least three locations are required to triangulate the climates")
+        climateMin = climates.min(axis=0)
+        climateScale = climates.max(axis=0) - climateMin
+        climateScale[climateScale == 0] = 1.0
+        try:
+            triangulation = Delaunay((climates - climateMin) / climateScale)
+        except QhullError as e:
+            raise ValueError("The location climates cannot be triangulated: {}".format(e)) from e
+        return cls(grids, climates, climateMin, climateScale, triangulation.simplices.astype(np.int64),
+                   triangulation.transform, triangulation.convex_hull.astype(np.int64))
+
+    def toArrays(self):
+        """
+        Return the triangulation as a dictionary of plain NumPy arrays (the grids are stored separately)
+        :return: dict of np.ndarray
+        """
+        return {"climates": self.climates,
+                "climateMin": self.climateMin,
+                "climateScale": self.climateScale,
+                "simplices": self.simplices,
+                "transforms": self.transforms,
+                "hullEdges": self.hullEdges}
+
+    @classmethod
+    def fromArrays(cls, grids: StaticResultGrids, arrays):
+        """
+        Restore the interpolator from the dictionary created by toArrays
+        :param grids: StaticResultGrids: grids the interpolator was built from
+        :param arrays: dict-like of np.ndarray
+        :return: ClimateInterpolator
+        """
+        return cls(grids, arrays["climates"], arrays["climateMin"], arrays["climateScale"], arrays["simplices"],
+                   arrays["transforms"], arrays["hullEdges"])
+
+    def climateWeights(self, outsideTemperature: np.ndarray, outsideRelativeHumidity: np.ndarray):
+        """
+        Locations and barycentric weights of the climates
+        :param outsideTemperature: np.ndarray: outside temperature in °C
+        :param outsideRelativeHumidity: np.ndarray: outside relative humidity as fraction (0...1)
+        :return: tuple of np.ndarray (n_queries, 3) location indices and np.ndarray (n_queries, 3) weights
+        """
+        points = (np.column_stack([outsideTemperature, outsideRelativeHumidity]) - self.climateMin) / self.climateScale
+        # barycentric coordinates of every point in every triangle (the data set has only a few dozen triangles)
+        offsets = points[:, None, :] - self.transforms[None, :, 2, :]
+        bary = np.einsum("tij,ntj->nti", self.transforms[:, :2, :], offsets)
+        bary = np.concatenate([bary, 1.0 - bary.sum(axis=2, keepdims=True)], axis=2)
+        minBary = bary.min(axis=2)
+        triangle = np.argmax(minBary, axis=1)
+        inside = minBary[np.arange(len(points)), triangle] >= -1e-12
+        vertices = self.simplices[triangle]
+        weights = np.clip(bary[np.arange(len(points)), triangle], 0.0, 1.0)
+
+        outside = np.flatnonzero(~inside)
+        if len(outside):
+            # nearest point on the convex hull, weights on the two locations of its edge
+            edgeStart = self._points[self.hullEdges[:, 0]]
+            edgeVector = self._points[self.hullEdges[:, 1]] - edgeStart
+            offsets = points[outside, None, :] - edgeStart[None]
+            t = np.clip(np.einsum("nej,ej->ne", offsets, edgeVector) / np.einsum("ej,ej->e", edgeVector, edgeVector),
+                        0.0, 1.0)
+            distances = np.square(offsets - t[:, :, None] * edgeVector[None]).sum(axis=2)
+            edge = np.argmin(distances, axis=1)
+            tEdge = t[np.arange(len(outside)), edge]
+            vertices[outside] = self.hullEdges[edge][:, [0, 1, 0]]
+            weights[outside] = np.column_stack([1.0 - tEdge, tEdge, np.zeros(len(outside))])
+        return vertices, weights / weights.sum(axis=1, keepdims=True)
+
+    def interpolate(self, scalingFactorS, maxWasteHeatRoomW, maxMoistureLoad, outsideTemperature,
+                    outsideRelativeHumidity, chunkSize: int = 65536):
+        """
+        Interpolate the numeric columns of the static result data set for arbitrary climates
+        :param scalingFactorS: float or array-like: calculated scaling factor(s) s
+        :param maxWasteHeatRoomW: float or array-like: max. waste heat in Watt
+        :param maxMoistureLoad: float or array-like: max. moisture load in room in kg/s
+        :param outsideTemperature: float or array-like: average outside temperature in °C
+        :param outsideRelativeHumidity: float or array-like: average outside relative humidity as fraction (0...1)
+        :param chunkSize: int: number of queries processed at once to bound the memory of intermediate arrays
+        :return: pd.DataFrame with one row of interpolated numeric results per query, the climate columns contain the
+                 climate the results belong to (the nearest climate on the convex hull for climates outside of it)
+        """
+        queries = np.broadcast_arrays(*[np.asarray(value, dtype=np.float64).ravel() for value in
+                                        (scalingFactorS, maxWasteHeatRoomW, maxMoistureLoad, outsideTemperature,
+                                         outsideRelativeHumidity)])
+        nQueries = len(queries[0])
+        resultValues = np.empty((nQueries, len(self.grids.numericColumns)), dtype=np.float64)
+        for start in range(0, nQueries, chunkSize):
+            idx = slice(start, start + chunkSize)
+            S, heat, moisture, temperature, humidity = (query[idx] for query in queries)
+            vertices, weights = self.climateWeights(temperature, humidity)
+            values = np.zeros((len(S), len(self.grids.numericColumns)))
+            for k in range(vertices.shape[1]):
+                used = weights[:, k] > 0
+                vertexValues, _ = self.grids.interpolateValues(vertices[used, k], S[used], heat[used], moisture[used],
+                                                               chunkSize)
+                values[used] += weights[used, k][:, None] * vertexValues
+            resultValues[idx] = values
+        return pd.DataFrame(resultValues, columns=self.grids.numericColumns)
@@ -0,0 +1,226 @@
+"""
+-------------------------------------------------------------------------------
+Name:        compactStaticResults
+Purpose:     Compact typed, memory-mapped representation of the static result data set shared by worker processes
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+from helpers.interpolationGrids import StaticResultGrids
+from helpers.staticResultIndex import loadStaticResultIndex, fileContentHash, _cachePath
+
+INDEX_FILE = "index.json"
+INDEX_VALUES_FILE = "index.npy"
+# columns the interpolation grids are sorted and interpolated by, see StaticResultGrids
+GRID_KEY_COLUMNS = ["location", "LoadScalingFactor", "ScalingFactorS", "DryRoomHeatLoad", "DryRoomMoistureLoad"]
+# largest relative deviation |float32(x) - x| / |x| accepted for a column to be stored as float32. float32 keeps about
+# 7 significant digits (relative rounding error <= 6e-8), so only columns with values outside its range or close to
+# zero (subnormal) keep float64
+FLOAT32_RTOL = 1e-6
+
+
+def compactDtypes(dfStaticResults: pd.DataFrame, rtol: float = FLOAT32_RTOL):
+    """
+    Compact dtype of every column: float32 for float columns whose values all stay within rtol, the smallest integer
+    type for integer columns and integer-coded categories for strings (e.g. location and locationVariant)
+    :param dfStaticResults: pd.DataFrame: static result data set, e.g. extended by helperFuncs.extendStaticDF
+    :param rtol: float: accepted relative deviation of the float32 values
+    :return: dict column name -> dtype (np.dtype or "category")
+    """
+    dtypes = {}
+    for col, dtype in dfStaticResults.dtypes.items():
+        if pd.api.types.is_float_dtype(dtype):
+            values = dfStaticResults[col].to_numpy(dtype=np.float64)
+            with np.errstate(over="ignore", under="ignore"):
+                deviation = np.abs(values.astype(np.float32).astype(np.float64) - values)
+            finite = np.isfinite(values)
+            fits = bool(np.all(deviation[finite] <= rtol * np.abs(values[finite])))
+            dtypes[col] = np.dtype(np.float32) if fits else np.dtype(np.float64)
+        elif pd.api.types.is_bool_dtype(dtype):
+            dtypes[col] = np.dtype(bool)
+        elif pd.api.types.is_integer_dtype(dtype):
+            values = dfStaticResults[col].to_numpy()
+            dtypes[col] = np.result_type(np.min_scalar_type(values.min()), np.min_scalar_type(values.max())) \
+                if len(values) else np.dtype(dtype)
+        else:
+            dtypes[col] = "category"
+    return dtypes
+
+
+def compactStaticDF(dfStaticResults: pd.DataFrame, rtol: float = FLOAT32_RTOL):
+    """
+    In-memory compact copy of the static result data set, see compactDtypes
+    :param dfStaticResults: pd.DataFrame: static result data set
+    :param rtol: float: accepted relative deviation of the float32 values
+    :return: pd.DataFrame with the same columns and index
+    """
+    return dfStaticResults.astype(compactDtypes(dfStaticResults, rtol))
+
+
+def saveCompactStaticResults(dfStaticResults: pd.DataFrame, storeDir: str, rtol: float = FLOAT32_RTOL,
+                             sourceHash: str = ""):
+    """
+    Write the static result data set as compact columnar store: one .npy file per column (category codes for string
+    columns, the categories in the index file), which worker processes map read-only instead of receiving pickled
+    copies. The store is written next to storeDir and moved into place once complete.
+    :param dfStaticResults: pd.DataFrame: static result data set, e.g. extended by helperFuncs.extendStaticDF
+    :param storeDir: str: directory of the store, replaced if it exists
+    :param rtol: float: accepted relative deviation of the float32 values
+    :param sourceHash: str: content hash of the CSV file the data set was read from
+    :return: CompactStaticResults
+    """
+    tmpDir = storeDir.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmpDir, ignore_errors=True)
+    os.makedirs(tmpDir)
+    columns = []
+    for position, (col, dtype) in enumerate(compactDtypes(dfStaticResults, rtol).items()):
+        fileName = "column_{:03d}.npy".format(position)
+        column = {"name": col, "file": fileName}
+        if isinstance(dtype, str):
+            categorical = pd.Categorical(dfStaticResults[col].astype(str))
+            codes = categorical.codes.astype(np.min_scalar_type(max(len(categorical.categories) - 1, 0)))
+            np.save(os.path.join(tmpDir, fileName), codes)
+            column.update({"dtype": "category", "categories": categorical.categories.tolist()})
+        else:
+            np.save(os.path.join(tmpDir, fileName), dfStaticResults[col].to_numpy(dtype=dtype))
+            column["dtype"] = dtype.str
+        columns.append(column)
+    np.save(os.path.join(tmpDir, INDEX_VALUES_FILE), dfStaticResults.index.to_numpy())
+    index = {"sourceHash": sourceHash, "rtol": rtol, "nRows": len(dfStaticResults),
+             "indexName": dfStaticResults.index.name, "columns": columns}
+    # the index is written last, a store without index is incomplete
+    with open(os.path.join(tmpDir, INDEX_FILE), "w") as f:
+        json.dump(index, f, indent=1)
+    shutil.rmtree(storeDir, ignore_errors=True)
+    os.replace(tmpDir, storeDir)
+    return CompactStaticResults(storeDir)
+
+
+class CompactStaticResults:
+    """
+    Read-only access to a store written by saveCompactStaticResults. The columns are memory-mapped, so all processes
+    opening the same store share one copy of the data in the page cache. Pickling an instance only transfers the store
+    directory, e.g. as argument of a process pool initializer.
+    """
+
+    def __init__(self, storeDir: str):
+        """
+        :param storeDir: str: directory of the store
+        """
+        self.storeDir = storeDir
+        with open(os.path.join(storeDir, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        self.nRows = self.index["nRows"]
+        self._columns = {column["name"]: column for column in self.index["columns"]}
+        self._memmaps = {}
+
+    def __reduce__(self):
+        return CompactStaticResults, (self.storeDir,)
+
+    @staticmethod
+    def exists(storeDir: str):
+        return os.path.exists(os.path.join(storeDir, INDEX_FILE))
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    @property
+    def dtypes(self):
+        """Column name -> stored dtype ("category" for integer-coded string columns)"""
+        return {name: column["dtype"] if column["dtype"] == "category" else np.dtype(column["dtype"])
+                for name, column in self._columns.items()}
+
+    def _memmap(self, fileName: str):
+        if fileName not in self._memmaps:
+            self._memmaps[fileName] = np.load(os.path.join(self.storeDir, fileName), mmap_mode="r")
+        return self._memmaps[fileName]
+
+    def categories(self, col: str):
+        """
+        Categories of an integer-coded column e.g. the locations
+        :param col: str: column name e.g. "location"
+        :return: list of str
+        """
+        return list(self._columns[col]["categories"])
+
+    def codes(self, col: str, rows: slice = slice(None)):
+        """
+        Category codes of an integer-coded column as zero-copy view
+        :param col: str: column name e.g. "location"
+        :param rows: slice or index array of the rows
+        :return: np.ndarray
+        """
+        if self._columns[col]["dtype"] != "category":
+            raise ValueError("Column {} is not integer-coded".format(col))
+        return self._memmap(self._columns[col]["file"])[rows]
+
+    def column(self, col: str, rows: slice = slice(None)):
+        """
+        Values of one column, a zero-copy view for numeric columns and a pd.Categorical for string columns
+        :param col: str: column name
+        :param rows: slice or index array of the rows
+        :return: np.ndarray or pd.Categorical
+        """
+        column = self._columns[col]
+        values = self._memmap(column["file"])[rows]
+        if column["dtype"] == "category":
+            return pd.Categorical.from_codes(values, categories=column["categories"])
+        return values
+
+    def toDataFrame(self, columns: list = None, rows: slice = slice(None)):
+        """
+        Copy the given columns into a DataFrame with the compact dtypes
+        :param columns: list of column names, defaults to all
+        :param rows: slice or index array of the rows
+        :return: pd.DataFrame
+        """
+        index = pd.Index(self._memmap(INDEX_VALUES_FILE)[rows], name=self.index["indexName"])
+        return pd.DataFrame({col: self.column(col, rows) for col in (columns or self.columns)}, index=index)
+
+    def toGrids(self, columns: list):
+        """
+        Interpolation grids of the given result columns built from the mapped columns only, instead of a float64 copy
+        of the whole data set (same as StaticResultGrids.fromDataFrame(...).selectColumns(columns))
+        :param columns: list: result columns e.g. ["electricEnergyKwh", "finalEnergy"]
+        :return: StaticResultGrids
+        """
+        unknownColumns = set(columns) - set(self.columns)
+        if unknownColumns:
+            raise ValueError("Columns not contained in static result data set: {}".format(sorted(unknownColumns)))
+        selected = set(columns) | set(GRID_KEY_COLUMNS)
+        dfSelected = self.toDataFrame([col for col in self.columns if col in selected])
+        return StaticResultGrids.fromDataFrame(dfSelected).selectColumns(columns)
+
+
+def _compactStorePath(staticResultPath: str, cacheDir: str = None):
+    return os.path.splitext(_cachePath(staticResultPath, cacheDir))[0] + ".compact"
+
+
+def loadCompactStaticResults(staticResultPath: str, cacheDir: str = None, rtol: float = FLOAT32_RTOL):
+    """
+    Open the compact store of the static result data set (extended by helperFuncs.extendStaticDF). The store is kept
+    in the cache directory next to the index of loadStaticResultIndex and rebuilt whenever the CSV file or rtol change.
+    :param staticResultPath: str: path of automateSimulationStaticResults.csv
+    :param cacheDir: str: directory of the cache files, defaults to a "cache" folder next to the CSV file
+    :param rtol: float: accepted relative deviation of the float32 values
+    :return: CompactStaticResults
+    """
+    sourceHash = fileContentHash(staticResultPath)
+    storeDir = _compactStorePath(staticResultPath, cacheDir)
+    if CompactStaticResults.exists(storeDir):
+        store = CompactStaticResults(storeDir)
+        if store.index["sourceHash"] == sourceHash and store.index["rtol"] == rtol:
+            return store
+    dfStaticResults = loadStaticResultIndex(staticResultPath, cacheDir).dfStaticResults
+    return saveCompactStaticResults(dfStaticResults, storeDir, rtol, sourceHash)
@@ -0,0 +1,241 @@
+"""
+-------------------------------------------------------------------------------
+Name:        compiledInference
+Purpose:     Low-latency inference of the fitted chained XGBoost/AdaBoost regression model on a preallocated buffer
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import json
+import numpy as np
+from sklearn.ensemble import AdaBoostRegressor
+from sklearn.feature_selection import VarianceThreshold
+from sklearn.multioutput import RegressorChain
+from sklearn.pipeline import FeatureUnion, Pipeline
+from sklearn.preprocessing import FunctionTransformer
+from xgboost import Booster, XGBRegressor
+from helpers.stackingEstimator import StackingEstimator
+from helpers.stackedFeatures import StackedFeatures
+
+
+class _TreeEnsemble:
+    """
+    Trees of an ensemble flattened into one node array, so that all trees are traversed at once with one vectorized
+    step per tree level. Leaves point to themselves, so that shallower branches simply stay at their leaf.
+    """
+
+    def __init__(self, left, right, feature, threshold, defaultLeft, value, roots, maxDepth, strictLess: bool):
+        """
+        :param left, right: np.ndarray: global index of the child nodes (leaves: the node itself)
+        :param feature: np.ndarray: column of the feature buffer compared at each node
+        :param threshold: np.ndarray: split threshold of each node
+        :param defaultLeft: np.ndarray: direction of missing values (XGBoost only)
+        :param value: np.ndarray: leaf value of each node
+        :param roots: np.ndarray: global index of the root node of each tree
+        :param maxDepth: int: depth of the deepest tree
+        :param strictLess: bool: XGBoost splits with x < threshold, scikit-learn trees with x <= threshold
+        """
+        self.left, self.right, self.feature, self.threshold = left, right, feature, threshold
+        # children[2 * node + goLeft] is the next node
+        self.children = np.column_stack([right, left]).ravel()
+        self.defaultLeft, self.value, self.roots = defaultLeft, value, roots
+        self.maxDepth = maxDepth
+        self.strictLess = strictLess
+
+    @classmethod
+    def fromNodes(cls, trees: list, featureMap: np.ndarray, strictLess: bool, thresholdDtype):
+        """
+        :param trees: list of tuples (left, right, feature, threshold, defaultLeft, value) per tree with local node
+                      indices and -1 as child of leaves
+        :param featureMap: np.ndarray: column of the feature buffer of each input feature of the estimator
+        """
+        arrays = {name: [] for name in ("left", "right", "feature", "threshold", "defaultLeft", "value")}
+        roots, maxDepth, offset = [], 0, 0
+        for left, right, feature, threshold, defaultLeft, value in trees:
+            nodes = np.arange(len(left))
+            isLeaf = left < 0
+            depth = np.zeros(len(left), dtype=np.int64)
+            for node in nodes[~isLeaf]:
+                # children are stored behind their parents in XGBoost and scikit-learn trees
+                depth[left[node]] = depth[right[node]] = depth[node] + 1
+            maxDepth = max(maxDepth, int(depth.max()))
+            arrays["left"].append(np.where(isLeaf, nodes, left) + offset)
+            arrays["right"].append(np.where(isLeaf, nodes, right) + offset)
+            arrays["feature"].append(featureMap[np.where(isLeaf, 0, feature)])
+            arrays["threshold"].append(np.where(isLeaf, 0, threshold))
+            arrays["defaultLeft"].append(np.asarray(defaultLeft, dtype=bool))
+            arrays["value"].append(value)
+            roots.append(offset)
+            offset += len(left)
+        arrays = {name: np.concatenate(values) for name, values in arrays.items()}
+        return cls(arrays["left"], arrays["right"], arrays["feature"], arrays["threshold"].astype(thresholdDtype),
+                   arrays["defaultLeft"], arrays["value"], np.asarray(roots), maxDepth, strictLess)
+
+    def leafValues(self, buffer: np.ndarray):
+        """
+        :param buffer: np.ndarray: float32 feature buffer (n_rows, n_columns)
+        :return: np.ndarray: leaf value of every tree for every row (n_trees, n_rows)
+        """
+        node = np.repeat(self.roots[:, None], buffer.shape[0], axis=1)
+        hasMissing = self.strictLess and bool(np.isnan(buffer).any())
+        # one dimensional gathers from the flat buffer are cheaper than two dimensional fancy indexing
+        flatBuffer = buffer.ravel()
+        rowOffsets = np.arange(buffer.shape[0]) * buffer.shape[1]
+        for _ in range(self.maxDepth):
+            x = flatBuffer[self.feature[node] + rowOffsets] if buffer.shape[0] > 1 else flatBuffer[self.feature[node]]
+            # XGBoost splits with x < threshold, scikit-learn compares the float32 features with float64 thresholds
+            goLeft = x < self.threshold[node] if self.strictLess else x <= self.threshold[node]
+            if hasMissing:
+                goLeft = np.where(np.isnan(x), self.defaultLeft[node], goLeft)
+            node = self.children[2 * node + goLeft]
+        return self.value[node]
+
+
+def _compileXGBRegressor(model: XGBRegressor, featureMap: np.ndarray, bufferWidth: int):
+    """
+    Trees and base score of a fitted XGBRegressor (gbtree booster, single target) and a copy of its booster whose
+    split features are remapped onto the columns of the feature buffer, for batches
+    """
+    savedModel = json.loads(model.get_booster().save_raw("json"))
+    learner = savedModel["learner"]
+    if learner["gradient_booster"]["name"] != "gbtree":
+        raise ValueError("Only the gbtree booster is supported")
+    trees = []
+    for tree in learner["gradient_booster"]["model"]["trees"]:
+        left = np.asarray(tree["left_children"], dtype=np.int64)
+        # leaf values are stored in the split conditions of the leaves
+        splitConditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+        trees.append((left, np.asarray(tree["right_children"], dtype=np.int64),
+                      np.asarray(tree["split_indices"], dtype=np.int64), splitConditions,
+                      np.asarray(tree["default_left"], dtype=bool), splitConditions))
+        tree["split_indices"] = featureMap[np.asarray(tree["split_indices"], dtype=np.int64)].tolist()
+    baseScore = np.float32(float(learner["learner_model_param"]["base_score"]))
+    learner["learner_model_param"]["num_feature"] = str(bufferWidth)
+    learner["feature_names"], learner["feature_types"] = [], []
+    booster = Booster()
+    booster.load_model(bytearray(json.dumps(savedModel).encode()))
+    return _TreeEnsemble.fromNodes(trees, featureMap, strictLess=True, thresholdDtype=np.float32), baseScore, booster
+
+
+def _predictXGB(ensemble: _TreeEnsemble, baseScore: np.float32, booster: Booster, buffer: np.ndarray,
+                nativeBatchRows: int):
+    """Sum of the leaf values in tree order in float32 starting from the base score, as in the XGBoost CPU predictor"""
+    if buffer.shape[0] >= nativeBatchRows:
+        # the multithreaded XGBoost predictor reads the buffer directly, its call overhead only pays off for batches
+        return booster.inplace_predict(buffer)
+    leafValues = ensemble.leafValues(buffer)
+    margins = np.empty((leafValues.shape[0] + 1, leafValues.shape[1]), dtype=np.float32)
+    margins[0] = baseScore
+    margins[1:] = leafValues
+    # cumsum adds sequentially, unlike sum which uses pairwise summation
+    return np.cumsum(margins, axis=0, dtype=np.float32)[-1]
+
+
+def _compileAdaBoostRegressor(model: AdaBoostRegressor, featureMap: np.ndarray):
+    """Decision trees and estimator weights of a fitted AdaBoostRegressor"""
+    trees = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        trees.append((tree.children_left.astype(np.int64), tree.children_right.astype(np.int64),
+                      tree.feature.astype(np.int64), tree.threshold, np.zeros(tree.node_count, dtype=bool),
+                      tree.value[:, 0, 0]))
+    weights = model.estimator_weights_[:len(model.estimators_)]
+    return _TreeEnsemble.fromNodes(trees, featureMap, strictLess=False, thresholdDtype=np.float64), weights
+
+
+def _predictAdaBoost(ensemble: _TreeEnsemble, weights: np.ndarray, buffer: np.ndarray):
+    """Weighted median of the tree predictions, see AdaBoostRegressor._get_median_predict"""
+    predictions = ensemble.leafValues(buffer).T
+    sortedIdx = np.argsort(predictions, axis=1)
+    weightCdf = np.cumsum(weights[sortedIdx], axis=1, dtype=np.float64)
+    medianIdx = (weightCdf >= 0.5 * weightCdf[:, -1][:, np.newaxis]).argmax(axis=1)
+    rows = np.arange(predictions.shape[0])
+    return predictions[rows, sortedIdx[rows, medianIdx]]
+
+
+class CompiledMultiOutputRegression:
+    """
+    Inference-only form of the fitted RegressorChain of the exported TPOT pipeline
+    (union of two copies -> StackingEstimator(XGB) -> StackingEstimator(AdaBoost) -> VarianceThreshold -> XGB)
+    or of its compact training form (StackedFeatures([XGB, AdaBoost]) -> VarianceThreshold -> XGB).
+    All stages of all chain targets read from and write into one preallocated float32 buffer with the layout
+    [AdaBoost feature, XGB feature, inputs, predicted targets]: the duplicated union columns and the copies and
+    stacks of the stacking estimators are resolved at compile time by mapping the feature indices of every tree onto
+    this buffer. Since the estimators convert their inputs to float32 anyway, the predictions are the same numbers as
+    those of model.predict. Not thread-safe, as the buffer is shared between calls.
+    """
+
+    def __init__(self, model: RegressorChain, bufferRows: int = 1, nativeBatchRows: int = 32):
+        """
+        :param model: fitted RegressorChain created by createMultiOutputRegressionModel
+        :param bufferRows: int: initial number of rows of the buffer, grown on demand
+        :param nativeBatchRows: int: from this number of rows on the XGBoost stages are evaluated by the (remapped)
+                                XGBoost predictor instead of the vectorized tree traversal
+        """
+        if not isinstance(model, RegressorChain):
+            # e.g. the joint Pipeline of createMultiOutputRegressionModel(multiOutput=True), use its predict method
+            raise ValueError("Only the chained model can be compiled, not {}".format(type(model).__name__))
+        self.nFeatures = int(model.estimators_[0].n_features_in_)
+        self.nTargets = len(model.estimators_)
+        self.order = np.asarray(model.order_)
+        self.inverseOrder = np.empty_like(self.order)
+        self.inverseOrder[self.order] = np.arange(len(self.order))
+        self.nativeBatchRows = nativeBatchRows
+        bufferWidth = self.nFeatures + self.nTargets + 2
+        self.stages = [self._compileStage(pipeline, self.nFeatures + k, bufferWidth)
+                       for k, pipeline in enumerate(model.estimators_)]
+        self._buffer = np.empty((bufferRows, bufferWidth), dtype=np.float32)
+
+    @staticmethod
+    def _compileStage(pipeline: Pipeline, width: int, bufferWidth: int):
+        """Compile the pipeline of one chain target whose input has width columns (inputs and previous targets)"""
+        steps = [step for _, step in pipeline.steps]
+        if len(steps) == 3 and isinstance(steps[0], StackedFeatures) and len(steps[0].estimators_) == 2:
+            # compact training: [AdaBoost feature, XGB feature, nCopies * inputs] in one step
+            nCopies = steps[0].nCopies
+            stackedXGB, stackedAdaBoost = steps[0].estimators_
+        elif (len(steps) == 5 and isinstance(steps[0], FeatureUnion) and
+              all(isinstance(transformer, FunctionTransformer) for _, transformer in steps[0].transformer_list) and
+              isinstance(steps[1], StackingEstimator) and isinstance(steps[2], StackingEstimator)):
+            nCopies = len(steps[0].transformer_list)
+            stackedXGB, stackedAdaBoost = steps[1].estimator, steps[2].estimator
+        else:
+            raise ValueError("Only the pipeline of createMultiOutputRegressionModel can be compiled")
+        varianceThreshold, finalXGB = steps[-2:]
+        if not (isinstance(stackedXGB, XGBRegressor) and isinstance(stackedAdaBoost, AdaBoostRegressor) and
+                isinstance(varianceThreshold, VarianceThreshold) and isinstance(finalXGB, XGBRegressor)):
+            raise ValueError("Only the pipeline of createMultiOutputRegressionModel can be compiled")
+        # buffer columns: 0 AdaBoost feature, 1 XGB feature, 2.. inputs and previous targets
+        unionMap = 2 + np.tile(np.arange(width), nCopies)
+        xgbStacked = _compileXGBRegressor(stackedXGB, unionMap, bufferWidth)
+        adaStacked = _compileAdaBoostRegressor(stackedAdaBoost, np.concatenate([[1], unionMap]))
+        finalMap = np.concatenate([[0, 1], unionMap])[varianceThreshold.get_support(indices=True)]
+        xgbFinal = _compileXGBRegressor(finalXGB, finalMap, bufferWidth)
+        return xgbStacked, adaStacked, xgbFinal
+
+    def predict(self, X):
+        """
+        Predict the targets, same values as model.predict(X)
+        :param X: array-like of shape (n_samples, n_features) or (n_features,) for a single row
+        :return: np.ndarray of shape (n_samples, n_targets)
+        """
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != self.nFeatures:
+            raise ValueError("X has {} features, but the model expects {}".format(X.shape[1], self.nFeatures))
+        nRows = X.shape[0]
+        if nRows > self._buffer.shape[0]:
+            self._buffer = np.empty((nRows, self._buffer.shape[1]), dtype=np.float32)
+        buffer = self._buffer[:nRows]
+        buffer[:, 2:2 + self.nFeatures] = X
+        for k, (xgbStacked, (adaStacked, adaWeights), xgbFinal) in enumerate(self.stages):
+            buffer[:, 1] = _predictXGB(*xgbStacked, buffer, self.nativeBatchRows)
+            buffer[:, 0] = _predictAdaBoost(adaStacked, adaWeights, buffer)
+            buffer[:, 2 + self.nFeatures + k] = _predictXGB(*xgbFinal, buffer, self.nativeBatchRows)
+        return buffer[:, 2 + self.nFeatures:].astype(np.float64)[:, self.inverseOrder]
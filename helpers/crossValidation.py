@@ -0,0 +1,154 @@
+"""
+-------------------------------------------------------------------------------
+Name:        crossValidation
+Purpose:     Cached, parallel and resumable repeated k-fold cross validation of regression models
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import os
+from concurrent.futures import as_completed
+import numpy as np
+import helpers.helperFuncs as helperFuncs
+import helpers.profiling as profiling
+from helpers.modelRegistry import arrayHash, estimatorConfigHash
+
+# training data of the worker processes, set once per worker by _initWorker
+_workerData = {}
+
+
+def _initWorker(X, y):
+    _workerData["X"], _workerData["y"] = X, y
+
+
+def _fitAndScoreFold(estimator, trainIndex, testIndex, foldPath):
+    """Fit a clone of the estimator on one fold, store score and model as checkpoint and return the score"""
+    from sklearn.base import clone
+    from sklearn.metrics import mean_absolute_error
+
+    X, y = _workerData["X"], _workerData["y"]
+    with profiling.span("crossValidationFold", fold=os.path.basename(foldPath)):
+        # the XGBoost threads of the clone use the share of the compute budget of this worker
+        model = helperFuncs.setInnerThreads(clone(estimator), helperFuncs.innerThreads())
+        model.fit(X[trainIndex], y[trainIndex])
+        # same score as cross_val_score with scoring='neg_mean_absolute_error', but positive (unit of predicted values)
+        score = mean_absolute_error(y[testIndex], model.predict(X[testIndex]))
+        helperFuncs.dumpAtomic({"score": score, "model": model, "trainIndex": trainIndex, "testIndex": testIndex},
+                               foldPath)
+    return score
+
+
+class CrossValidationRunner:
+    """
+    Repeated k-fold cross validation whose folds are stored one by one, keyed by data set hash, pipeline configuration
+    hash and split seed. Missing folds are computed in a process pool; an interrupted run resumes with the folds that
+    are not stored yet and a finished run returns the stored mean absolute errors without any fitting.
+    """
+
+    def __init__(self, cacheDir: str, n_splits: int = 10, n_repeats: int = 3, random_state: int = 1,
+                 n_jobs: int = -1):
+        """
+        :param cacheDir: str: directory in which the folds of all runs are stored
+        :param n_splits: int: number of folds
+        :param n_repeats: int: number of repetitions of the k-fold split
+        :param random_state: int: seed of the splits
+        :param n_jobs: int: number of worker processes, -1 uses all cores, 1 runs in the calling process
+        """
+        self.cacheDir = cacheDir
+        self.n_splits = n_splits
+        self.n_repeats = n_repeats
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+
+    def runDir(self, estimator, X: np.ndarray, y: np.ndarray):
+        """
+        Directory of the cross validation run of the given estimator and data set
+        :return: str
+        """
+        return os.path.join(self.cacheDir, "{}-{}-cv{}x{}-seed{}".format(
+            arrayHash(X, y)[:16], estimatorConfigHash(estimator)[:16], self.n_splits, self.n_repeats,
+            self.random_state))
+
+    def splits(self, X: np.ndarray):
+        """
+        Train and test indices of all folds
+        :return: list of tuples (trainIndex, testIndex)
+        """
+        from sklearn.model_selection import RepeatedKFold
+
+        cv = RepeatedKFold(n_splits=self.n_splits, n_repeats=self.n_repeats, random_state=self.random_state)
+        return list(cv.split(X))
+
+    def foldPath(self, runDir: str, fold: int):
+        return os.path.join(runDir, "fold_{:03d}.joblib".format(fold))
+
+    def scores(self, estimator, X: np.ndarray, y: np.ndarray):
+        """
+        Mean absolute error of each fold (unit of the predicted values), computed only for folds not stored yet
+        :param estimator: unfitted scikit-learn compatible estimator
+        :param X: np.ndarray: inputs
+        :param y: np.ndarray: targets
+        :return: np.ndarray of shape (n_splits * n_repeats,)
+        """
+        runDir = self.runDir(estimator, X, y)
+        scoresPath = os.path.join(runDir, "scores.npy")
+        if os.path.exists(scoresPath):
+            return np.load(scoresPath)
+        if not os.path.exists(runDir):
+            os.makedirs(runDir)
+
+        import joblib
+
+        splits = self.splits(X)
+        scores = np.full(len(splits), np.nan)
+        missingFolds = []
+        for fold in range(len(splits)):
+            if os.path.exists(self.foldPath(runDir, fold)):
+                scores[fold] = joblib.load(self.foldPath(runDir, fold))["score"]
+            else:
+                missingFolds.append(fold)
+
+        nWorkers = helperFuncs.effectiveNJobs(self.n_jobs, len(missingFolds))
+        with profiling.span("crossValidation", nFolds=len(missingFolds), nWorkers=nWorkers):
+            if nWorkers <= 1:
+                _initWorker(X, y)
+                for fold in missingFolds:
+                    scores[fold] = _fitAndScoreFold(estimator, *splits[fold], self.foldPath(runDir, fold))
+            elif missingFolds:
+                with helperFuncs.createProcessPool(nWorkers, initializer=_initWorker, initargs=(X, y)) as executor:
+                    futures = {executor.submit(_fitAndScoreFold, estimator, *splits[fold],
+                                               self.foldPath(runDir, fold)): fold for fold in missingFolds}
+                    for future in as_completed(futures):
+                        scores[futures[future]] = future.result()
+
+        np.save(scoresPath, scores)
+        return scores
+
+    def folds(self, estimator, X: np.ndarray, y: np.ndarray):
+        """
+        Stored checkpoints of all folds, running the missing folds first
+        :param estimator: unfitted scikit-learn compatible estimator
+        :param X: np.ndarray: inputs
+        :param y: np.ndarray: targets
+        :return: list of dictionaries with score, model, trainIndex and testIndex in fold order
+        """
+        import joblib
+
+        self.scores(estimator, X, y)
+        runDir = self.runDir(estimator, X, y)
+        return [joblib.load(self.foldPath(runDir, fold)) for fold in range(self.n_splits * self.n_repeats)]
+
+    def foldModels(self, estimator, X: np.ndarray, y: np.ndarray):
+        """
+        Fitted models of all folds, running the missing folds first
+        :param estimator: unfitted scikit-learn compatible estimator
+        :param X: np.ndarray: inputs
+        :param y: np.ndarray: targets
+        :return: list of fitted models in fold order
+        """
+        return [fold["model"] for fold in self.folds(estimator, X, y)]
@@ -0,0 +1,117 @@
+"""
+-------------------------------------------------------------------------------
+Name:        dynamicAggregation
+Purpose:     Single-pass aggregation of per-variant statistics over the dynamic result data set
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import numpy as np
+import pandas as pd
+import helpers.helperFuncs as helperFuncs
+from helpers.dynamicResultStore import DynamicResultStore, intervalHourOfYear
+
+# cumulative energy data points of the energy carriers in kWh
+ENERGY_DATAPOINTS = ["electricEnergyKwh", "naturalGasEnergyKwh", "districtHeatingEnergyKwh"]
+# prefixes of the power data points of the components in W
+COMPONENT_PREFIXES = ("PowerDemand", "HeatFlow")
+# first hour of each month of the generic (non-leap) type year starting on 01.01. 00:00:00 h
+DAYS_PER_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+MONTH_STARTS_HOURS = np.concatenate([[0], np.cumsum(DAYS_PER_MONTH)[:-1]]) * 24.0
+
+TIDY_COLUMNS = ["locationVariant", "location", "datapoint", "statistic", "period", "value"]
+
+# store opened once per worker process by _initWorker
+_workerStore = {}
+
+
+def _initWorker(storeDir):
+    _workerStore["store"] = DynamicResultStore(storeDir)
+
+
+def _aggregateVariants(locationVariants, percentiles, durationPoints, rows):
+    store = _workerStore["store"]
+    return [_aggregateVariant(store, locationVariant, percentiles, durationPoints, rows)
+            for locationVariant in locationVariants]
+
+
+def _aggregateVariant(store: DynamicResultStore, locationVariant: str, percentiles, durationPoints: int,
+                      rows: slice):
+    """Compute all statistics of one simulation case with a single read of its chunk"""
+    location = store.location(locationVariant)
+    timesteps = np.asarray(store.timesteps[rows])
+    variantArray = np.asarray(store.variantArray(locationVariant, rows))
+    datapoints = store.datapoints(locationVariant)
+    records = []
+
+    def add(datapoint, statistic, periods, values):
+        for period, value in zip(np.atleast_1d(periods), np.atleast_1d(values)):
+            records.append((locationVariant, location, datapoint, statistic, float(period), float(value)))
+
+    # intervals between consecutive time steps, each assigned to the month and week of its start
+    intervalStarts = intervalHourOfYear(timesteps)
+    intervalHours = np.diff(timesteps) / 3600
+    month = np.clip(np.searchsorted(MONTH_STARTS_HOURS, intervalStarts, side="right") - 1, 0, 11)
+    week = np.minimum((intervalStarts // (7 * 24)).astype(np.int64), 52)
+    durationFractions = np.linspace(0, 1, durationPoints)
+
+    for datapoint in ENERGY_DATAPOINTS:
+        if datapoint not in datapoints:
+            continue
+        energy = np.diff(variantArray[datapoints.index(datapoint)])
+        powerKw = energy / intervalHours
+        add(datapoint, "annualEnergyKwh", np.nan, energy.sum())
+        add(datapoint, "monthlyEnergyKwh", np.arange(1, 13), np.bincount(month, weights=energy, minlength=12))
+        add(datapoint, "weeklyEnergyKwh", np.arange(53), np.bincount(week, weights=energy, minlength=53))
+        add(datapoint, "peakPowerKw", np.nan, powerKw.max())
+        add(datapoint, "powerPercentileKw", percentiles, np.percentile(powerKw, percentiles))
+        # load-duration curve: power exceeded during the given fraction of the time
+        add(datapoint, "loadDurationKw", durationFractions, np.quantile(powerKw, 1 - durationFractions))
+
+    for row, datapoint in enumerate(datapoints):
+        if datapoint.startswith(COMPONENT_PREFIXES):
+            values = variantArray[row]
+            add(datapoint, "maximum", np.nan, values.max())
+            add(datapoint, "minimum", np.nan, values.min())
+            add(datapoint, "percentile", percentiles, np.percentile(values, percentiles))
+    return records
+
+
+def aggregateDynamicResults(store: DynamicResultStore, locationVariants: list = None,
+                            percentiles=(5, 25, 50, 75, 95, 99), durationPoints: int = 25, rows: slice = slice(None),
+                            n_jobs: int = -1, variantsPerTask: int = 8):
+    """
+    Compute monthly, weekly and annual energy totals, peak power, load-duration curves and percentiles of the energy
+    carriers as well as extreme values and percentiles of the component power data points for every simulation case
+    in one pass over the columnar store. Each task reads only its own simulation cases, so the memory stays bounded
+    by the number of workers times the size of a simulation case.
+    :param store: DynamicResultStore: converted dynamic result data set
+    :param locationVariants: list: simulation cases e.g. ["OS-2"], defaults to all
+    :param percentiles: sequence of percentiles in %
+    :param durationPoints: int: number of points of the load-duration curves
+    :param rows: slice: time step rows, see DynamicResultStore.rowsForTimeRange
+    :param n_jobs: int: number of worker processes, -1 uses all cores, 1 runs in the calling process
+    :param variantsPerTask: int: number of simulation cases per task of the process pool
+    :return: pd.DataFrame in tidy format with the columns locationVariant, location, datapoint, statistic, period and
+             value; can be joined with helperFuncs.extendStaticDF(dfStaticResults) on locationVariant
+    """
+    if locationVariants is None:
+        locationVariants = store.locationVariants
+    percentiles = np.asarray(percentiles, dtype=np.float64)
+    tasks = [locationVariants[i:i + variantsPerTask] for i in range(0, len(locationVariants), variantsPerTask)]
+    nWorkers = helperFuncs.effectiveNJobs(n_jobs, len(tasks))
+    records = []
+    if nWorkers <= 1:
+        records = [_aggregateVariant(store, locationVariant, percentiles, durationPoints, rows)
+                   for locationVariant in locationVariants]
+    else:
+        with helperFuncs.createProcessPool(nWorkers, initializer=_initWorker, initargs=(store.storeDir,)) as executor:
+            for taskRecords in executor.map(_aggregateVariants, tasks, [percentiles] * len(tasks),
+                                            [durationPoints] * len(tasks), [rows] * len(tasks)):
+                records.extend(taskRecords)
+    return pd.DataFrame([record for variantRecords in records for record in variantRecords], columns=TIDY_COLUMNS)
@@ -0,0 +1,307 @@
+"""
+-------------------------------------------------------------------------------
+Name:        dynamicResultStore
+Purpose:     Columnar, memory-mapped store of the dynamic result data set and its query interface
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import os
+import re
+import json
+import numpy as np
+import pandas as pd
+
+# column names of the dynamic data set: <locationVariant>-<data point name>, e.g. "OS-2-electricEnergyKwh"
+_columnPattern = re.compile(r"^(?P<location>[A-Za-z]+)-(?P<variant>\d+)-(?P<datapoint>.+)$")
+
+INDEX_FILE = "index.json"
+TIMESTEPS_FILE = "timesteps.npy"
+
+
+def splitDynamicColumnName(columnName: str):
+    """
+    Split a column name of the dynamic data set into location, locationVariant and data point name
+    :param columnName: str: e.g. "OS-2-HeatFlowPreCooler-3-4"
+    :return: tuple (location, locationVariant, datapoint) e.g. ("OS", "OS-2", "HeatFlowPreCooler-3-4")
+    """
+    match = _columnPattern.match(columnName)
+    if match is None:
+        raise ValueError("Column {} does not follow the <locationVariant>-<data point> format".format(columnName))
+    location = match.group("location")
+    return location, "{}-{}".format(location, match.group("variant")), match.group("datapoint")
+
+
+def intervalHourOfYear(timesteps: np.ndarray, hoursPerYear: float = 8760):
+    """
+    Hour of the (generic type) year at the start of each interval between consecutive time steps. The time steps of
+    the data set span the year from 01.01. 00:00:00 h to 31.12. 24:00:00 h, so the span is scaled to hoursPerYear.
+    :param timesteps: np.ndarray: time steps in seconds
+    :param hoursPerYear: float: hours of the year
+    :return: np.ndarray of shape (len(timesteps) - 1,)
+    """
+    timesteps = np.asarray(timesteps, dtype=np.float64)
+    # rounded to remove the floating point error of the scaling, e.g. 167.99999999999997 instead of 168
+    return np.round((timesteps[:-1] - timesteps[0]) * (hoursPerYear / (timesteps[-1] - timesteps[0])), 6)
+
+
+def _countDataRows(csvPath: str, blockSize: int = 1 << 24):
+    """Count the non-empty lines after the header without parsing them"""
+    nLines, lastByte = 0, b"\n"
+    with open(csvPath, "rb") as f:
+        for block in iter(lambda: f.read(blockSize), b""):
+            nLines += block.count(b"\n")
+            lastByte = block[-1:]
+    if lastByte != b"\n":
+        nLines += 1
+    return nLines - 1
+
+
+def convertDynamicResults(csvPath: str, storeDir: str, dtype=np.float64, chunkRows: int = 1024):
+    """
+    One-time streaming conversion of automateSimulationDynamicResults.csv into a columnar store with one
+    memory-mapped .npy chunk per locationVariant (shape: data points x time steps, i.e. every column contiguous).
+    Only chunkRows rows of the CSV are held in memory at once.
+    :param csvPath: str: path of the dynamic result CSV file
+    :param storeDir: str: directory of the store to be created
+    :param dtype: numpy dtype of the stored values, float64 keeps the values of the CSV exactly
+    :param chunkRows: int: number of CSV rows parsed at once
+    :return: DynamicResultStore
+    """
+    header = pd.read_csv(csvPath, index_col=0, nrows=0)
+    variantColumns = {}
+    for position, columnName in enumerate(header.columns):
+        location, locationVariant, datapoint = splitDynamicColumnName(columnName)
+        variantColumns.setdefault(locationVariant, (location, [], []))
+        variantColumns[locationVariant][1].append(datapoint)
+        variantColumns[locationVariant][2].append(position)
+
+    if not os.path.exists(storeDir):
+        os.makedirs(storeDir)
+    nRows = _countDataRows(csvPath)
+    timesteps = np.lib.format.open_memmap(os.path.join(storeDir, TIMESTEPS_FILE), mode="w+", dtype=np.float64,
+                                          shape=(nRows,))
+    chunks, memmaps = [], {}
+    for locationVariant, (location, datapoints, positions) in variantColumns.items():
+        fileName = "{}.npy".format(locationVariant)
+        memmaps[locationVariant] = np.lib.format.open_memmap(os.path.join(storeDir, fileName), mode="w+",
+                                                             dtype=dtype, shape=(len(datapoints), nRows))
+        chunks.append({"location": location, "locationVariant": locationVariant, "file": fileName,
+                       "datapoints": datapoints})
+
+    rowsWritten = 0
+    for dfChunk in pd.read_csv(csvPath, index_col=0, chunksize=chunkRows):
+        values = dfChunk.to_numpy(dtype=dtype)
+        rowSlice = slice(rowsWritten, rowsWritten + len(dfChunk))
+        timesteps[rowSlice] = dfChunk.index.to_numpy(dtype=np.float64)
+        for locationVariant, (_, _, positions) in variantColumns.items():
+            memmaps[locationVariant][:, rowSlice] = values[:, positions].T
+        rowsWritten += len(dfChunk)
+    for memmap in list(memmaps.values()) + [timesteps]:
+        memmap.flush()
+    del memmaps, timesteps
+
+    index = {"source": os.path.basename(csvPath), "indexName": header.index.name, "nRows": rowsWritten,
+             "dtype": np.dtype(dtype).str, "chunks": chunks}
+    # the index is written last, a store without index is incomplete
+    with open(os.path.join(storeDir, INDEX_FILE), "w") as f:
+        json.dump(index, f, indent=1)
+    return DynamicResultStore(storeDir)
+
+
+def appendDynamicResults(csvPath: str, storeDir: str, chunkRows: int = 1024):
+    """
+    Extend a store created by convertDynamicResults in place by the columns of a further dynamic result CSV file with
+    the same time steps (e.g. of a new simulation campaign). New simulation cases get a chunk of their own, new data
+    points of existing simulation cases are appended to the rows of their chunk; all other chunks are not touched.
+    :param csvPath: str: path of the dynamic result CSV file with the new columns
+    :param storeDir: str: directory of the existing store
+    :param chunkRows: int: number of CSV rows parsed at once
+    :return: DynamicResultStore
+    """
+    store = DynamicResultStore(storeDir)
+    dtype = np.dtype(store.index["dtype"])
+    header = pd.read_csv(csvPath, index_col=0, nrows=0)
+    variantColumns = {}
+    for position, columnName in enumerate(header.columns):
+        location, locationVariant, datapoint = splitDynamicColumnName(columnName)
+        if locationVariant in store._datapointRows and datapoint in store._datapointRows[locationVariant]:
+            raise ValueError("Column {} is already contained in the store {}".format(columnName, storeDir))
+        variantColumns.setdefault(locationVariant, (location, [], []))
+        variantColumns[locationVariant][1].append(datapoint)
+        variantColumns[locationVariant][2].append(position)
+    nRows = _countDataRows(csvPath)
+    if nRows != store.nRows:
+        raise ValueError("{} has {} time steps, the store has {}".format(csvPath, nRows, store.nRows))
+
+    # every affected chunk is written to a temporary file first, rows of existing data points are copied over
+    memmaps, tmpPaths = {}, {}
+    try:
+        for locationVariant, (_, datapoints, _) in variantColumns.items():
+            nExisting = len(store.datapoints(locationVariant)) if locationVariant in store._chunks else 0
+            tmpPaths[locationVariant] = os.path.join(storeDir, "{}.npy.tmp".format(locationVariant))
+            memmaps[locationVariant] = np.lib.format.open_memmap(tmpPaths[locationVariant], mode="w+", dtype=dtype,
+                                                                 shape=(nExisting + len(datapoints), nRows))
+            if nExisting:
+                memmaps[locationVariant][:nExisting] = store.variantArray(locationVariant)
+        rowsWritten = 0
+        for dfChunk in pd.read_csv(csvPath, index_col=0, chunksize=chunkRows):
+            rowSlice = slice(rowsWritten, rowsWritten + len(dfChunk))
+            if not np.array_equal(dfChunk.index.to_numpy(dtype=np.float64), store.timesteps[rowSlice]):
+                raise ValueError("The time steps of {} differ from the ones of the store".format(csvPath))
+            values = dfChunk.to_numpy(dtype=dtype)
+            for locationVariant, (_, datapoints, positions) in variantColumns.items():
+                memmaps[locationVariant][-len(datapoints):, rowSlice] = values[:, positions].T
+            rowsWritten += len(dfChunk)
+        for memmap in memmaps.values():
+            memmap.flush()
+    except BaseException:
+        del memmaps
+        for tmpPath in tmpPaths.values():
+            os.remove(tmpPath)
+        raise
+    del memmaps
+    store._memmaps.clear()
+
+    index = store.index
+    for locationVariant, (location, datapoints, _) in variantColumns.items():
+        if locationVariant not in store._chunks:
+            store._chunks[locationVariant] = {"location": location, "locationVariant": locationVariant,
+                                              "file": "{}.npy".format(locationVariant), "datapoints": []}
+            index["chunks"].append(store._chunks[locationVariant])
+        store._chunks[locationVariant]["datapoints"].extend(datapoints)
+        # existing data points keep their rows, so the store stays readable until the index is replaced as well
+        os.replace(tmpPaths[locationVariant], os.path.join(storeDir, store._chunks[locationVariant]["file"]))
+    index.setdefault("appendedSources", []).append(os.path.basename(csvPath))
+    tmpIndexPath = os.path.join(storeDir, INDEX_FILE + ".tmp")
+    with open(tmpIndexPath, "w") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmpIndexPath, os.path.join(storeDir, INDEX_FILE))
+    return DynamicResultStore(storeDir)
+
+
+class DynamicResultStore:
+    """
+    Read access to a store created by convertDynamicResults. All returned arrays are read-only views into the
+    memory-mapped chunks, only the touched pages are read from disk.
+    """
+
+    def __init__(self, storeDir: str):
+        """
+        :param storeDir: str: directory of the store
+        """
+        self.storeDir = storeDir
+        with open(os.path.join(storeDir, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        self.nRows = self.index["nRows"]
+        self._chunks = {chunk["locationVariant"]: chunk for chunk in self.index["chunks"]}
+        self._datapointRows = {chunk["locationVariant"]: {datapoint: row for row, datapoint
+                                                          in enumerate(chunk["datapoints"])}
+                               for chunk in self.index["chunks"]}
+        self._memmaps = {}
+        self._timesteps = None
+
+    @staticmethod
+    def exists(storeDir: str):
+        return os.path.exists(os.path.join(storeDir, INDEX_FILE))
+
+    @property
+    def timesteps(self):
+        """Time steps in seconds (index column of the CSV file)"""
+        if self._timesteps is None:
+            self._timesteps = np.load(os.path.join(self.storeDir, TIMESTEPS_FILE), mmap_mode="r")[:self.nRows]
+        return self._timesteps
+
+    @property
+    def locationVariants(self):
+        return list(self._chunks)
+
+    @property
+    def locations(self):
+        return sorted({chunk["location"] for chunk in self.index["chunks"]})
+
+    def location(self, locationVariant: str):
+        """
+        Location without case number of a simulation case e.g. "OS" for "OS-2"
+        """
+        return self._chunks[locationVariant]["location"]
+
+    def datapoints(self, locationVariant: str):
+        """
+        Data point names available for a simulation case
+        :param locationVariant: str: simulation case e.g. "OS-2"
+        :return: list of str
+        """
+        return list(self._chunks[locationVariant]["datapoints"])
+
+    def rowsForTimeRange(self, startSeconds: float = None, stopSeconds: float = None):
+        """
+        Row slice of all time steps t with startSeconds <= t < stopSeconds
+        :return: slice
+        """
+        start = 0 if startSeconds is None else int(np.searchsorted(self.timesteps, startSeconds, side="left"))
+        stop = self.nRows if stopSeconds is None else int(np.searchsorted(self.timesteps, stopSeconds, side="left"))
+        return slice(start, stop)
+
+    def variantArray(self, locationVariant: str, rows: slice = slice(None)):
+        """
+        All data points of a simulation case as zero-copy view
+        :param locationVariant: str: simulation case e.g. "OS-2"
+        :param rows: slice: time step rows
+        :return: np.ndarray of shape (n_datapoints, n_timesteps), rows in the order of datapoints(locationVariant)
+        """
+        if locationVariant not in self._memmaps:
+            chunk = self._chunks[locationVariant]
+            self._memmaps[locationVariant] = np.load(os.path.join(self.storeDir, chunk["file"]),
+                                                     mmap_mode="r")[:, :self.nRows]
+        return self._memmaps[locationVariant][:, rows]
+
+    def column(self, locationVariant: str, datapoint: str, rows: slice = slice(None)):
+        """
+        One column of the dynamic data set as zero-copy view
+        :param locationVariant: str: simulation case e.g. "OS-2"
+        :param datapoint: str: data point name e.g. "electricEnergyKwh"
+        :param rows: slice: time step rows
+        :return: np.ndarray of shape (n_timesteps,)
+        """
+        return self.variantArray(locationVariant, rows)[self._datapointRows[locationVariant][datapoint]]
+
+    def query(self, locationVariants=None, locations=None, datapoints=None, rows: slice = slice(None)):
+        """
+        Select any subset of simulation cases, data points and time steps
+        :param locationVariants: list of simulation cases e.g. ["OS-2"], defaults to all
+        :param locations: list of locations without case number e.g. ["OS"], restricts the simulation cases
+        :param datapoints: list of data point names, defaults to all of each simulation case
+        :param rows: slice: time step rows, see rowsForTimeRange
+        :return: dict (locationVariant, datapoint) -> zero-copy np.ndarray view
+        """
+        if locationVariants is None:
+            locationVariants = self.locationVariants
+        if locations is not None:
+            locationVariants = [lv for lv in locationVariants if self.location(lv) in set(locations)]
+        result = {}
+        for locationVariant in locationVariants:
+            variantArray = self.variantArray(locationVariant, rows)
+            datapointRows = self._datapointRows[locationVariant]
+            for datapoint in (datapointRows if datapoints is None else datapoints):
+                if datapoint in datapointRows:
+                    result[(locationVariant, datapoint)] = variantArray[datapointRows[datapoint]]
+        return result
+
+    def toDataFrame(self, columns: list, rows: slice = slice(None)):
+        """
+        Copy the given columns into a DataFrame structured like the CSV file (e.g. for plotting)
+        :param columns: list of column names of the CSV file e.g. ["JK-1-electricEnergyKwh"]
+        :param rows: slice: time step rows
+        :return: pd.DataFrame indexed by the time steps
+        """
+        data = {}
+        for columnName in columns:
+            _, locationVariant, datapoint = splitDynamicColumnName(columnName)
+            data[columnName] = self.column(locationVariant, datapoint, rows)
+        return pd.DataFrame(data, index=pd.Index(self.timesteps[rows], name=self.index["indexName"]))
@@ -0,0 +1,148 @@
+"""
+-------------------------------------------------------------------------------
+Name:        figureRendering
+Purpose:     Parallel headless rendering of figures with skipping of unchanged figures
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import os
+import json
+import hashlib
+import inspect
+import tempfile
+from concurrent.futures import as_completed
+import pandas as pd
+import helpers.helperFuncs as helperFuncs
+import helpers.profiling as profiling
+
+MANIFEST_FILE = ".renderManifest.json"
+
+
+class FigureSpec:
+    """
+    Description of a figure: the plot function is called as plotFunction(data, **plotKwargs) in a worker process with
+    the given rc parameters and locale and has to return the matplotlib figure. The plot function must be importable
+    (module level) to be sent to the worker processes.
+    """
+
+    def __init__(self, fileName: str, plotFunction, data: pd.DataFrame, plotKwargs: dict = None,
+                 rcParams: dict = None, localeName: str = None):
+        """
+        :param fileName: str: name of the file the figure is saved in (see helperFuncs.save_plot_to_file)
+        :param plotFunction: callable creating the figure
+        :param data: pd.DataFrame: input data of the figure
+        :param plotKwargs: dict: further keyword arguments of the plot function
+        :param rcParams: dict: matplotlib rc parameters e.g. from helpers.rc_parameters_matplotlib
+        :param localeName: str: locale of the axes formatter ('axes.formatter.use_locale') e.g. "german", applied with
+                           rc_parameters_matplotlib.applyLocale in the worker processes. None keeps the process locale
+        """
+        self.fileName = fileName
+        self.plotFunction = plotFunction
+        self.data = data
+        self.plotKwargs = plotKwargs or {}
+        self.rcParams = rcParams or {}
+        self.localeName = localeName
+
+    def outputFileName(self):
+        """File name including the extension given by savefig.format, as written by matplotlib"""
+        if os.path.splitext(self.fileName)[1]:
+            return self.fileName
+        return "{}.{}".format(self.fileName, self.rcParams.get("savefig.format", "png"))
+
+    def contentHash(self):
+        """
+        Hash of everything the figure depends on: input data, plot function (name and source code) and arguments, rc
+        parameters and locale
+        :return: str: hex digest
+        """
+        sha256 = hashlib.sha256()
+        sha256.update(repr(list(self.data.columns)).encode())
+        sha256.update(pd.util.hash_pandas_object(self.data, index=True).to_numpy().tobytes())
+        sha256.update("{}.{}".format(self.plotFunction.__module__, self.plotFunction.__qualname__).encode())
+        try:
+            sha256.update(inspect.getsource(self.plotFunction).encode())
+        except (OSError, TypeError):
+            # source not available (e.g. interactive session), the byte code changes with the function as well
+            sha256.update(self.plotFunction.__code__.co_code)
+        sha256.update(repr(sorted(self.plotKwargs.items())).encode())
+        sha256.update(repr(sorted(self.rcParams.items())).encode())
+        sha256.update(repr(self.localeName).encode())
+        return sha256.hexdigest()
+
+
+def _renderFigure(spec: FigureSpec, savedir: str):
+    """Render one figure on the non-interactive Agg backend and save it, only called in the worker processes"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    if spec.localeName is not None:
+        # spawned workers start with the default locale, not the one of the calling process
+        import helpers.rc_parameters_matplotlib as rc_params
+        rc_params.applyLocale(spec.localeName)
+    with profiling.span("renderFigure", fileName=spec.fileName), plt.rc_context(spec.rcParams):
+        fig = spec.plotFunction(spec.data, **spec.plotKwargs)
+        helperFuncs.save_plot_to_file(file_name=spec.fileName, fig=fig, savedir=savedir)
+    return spec.fileName
+
+
+def _loadManifest(savedir: str):
+    manifestPath = os.path.join(savedir, MANIFEST_FILE)
+    if os.path.exists(manifestPath):
+        with open(manifestPath) as f:
+            return json.load(f)
+    return {}
+
+
+def _saveManifest(savedir: str, manifest: dict):
+    fd, tmpPath = tempfile.mkstemp(dir=savedir, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmpPath, os.path.join(savedir, MANIFEST_FILE))
+
+
+def renderFigures(specs: list, savedir: str, n_jobs: int = -1, force: bool = False):
+    """
+    Render and save the given figures in a process pool, also a single figure, so that the backend and locale of the
+    calling process are never changed. Every figure is written to disk as soon as it is finished and its figure is
+    closed right away. Figures whose input data, arguments and rc parameters did not change since
+    the last run (and whose file still exists) are skipped.
+    :param specs: list of FigureSpec
+    :param savedir: str: directory the figures are saved in
+    :param n_jobs: int: number of worker processes, -1 uses all cores
+    :param force: bool: render all figures regardless of the manifest of the last run
+    :return: tuple of lists (rendered file names, skipped file names)
+    """
+    if not os.path.exists(savedir):
+        os.makedirs(savedir)
+    manifest = _loadManifest(savedir)
+    pendingSpecs, skipped, hashes = [], [], {}
+    for spec in specs:
+        hashes[spec.fileName] = spec.contentHash()
+        upToDate = manifest.get(spec.fileName) == hashes[spec.fileName] and \
+                   os.path.exists(os.path.join(savedir, spec.outputFileName()))
+        if upToDate and not force:
+            skipped.append(spec.fileName)
+        else:
+            pendingSpecs.append(spec)
+
+    rendered = []
+
+    def finished(fileName):
+        # the manifest is updated after every figure, so an interrupted run keeps the finished figures
+        manifest[fileName] = hashes[fileName]
+        _saveManifest(savedir, manifest)
+        rendered.append(fileName)
+
+    nWorkers = helperFuncs.effectiveNJobs(n_jobs, len(pendingSpecs))
+    if pendingSpecs:
+        with helperFuncs.createProcessPool(nWorkers) as executor:
+            futures = [executor.submit(_renderFigure, spec, savedir) for spec in pendingSpecs]
+            for future in as_completed(futures):
+                finished(future.result())
+    return rendered, skipped
@@ -0,0 +1,96 @@
+"""
+-------------------------------------------------------------------------------
+Name:        foldEnsemble
+Purpose:     Per-query prediction intervals from the fold models of a (cached) repeated k-fold cross validation
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import numpy as np
+import pandas as pd
+from helpers.crossValidation import CrossValidationRunner
+
+
+class FoldEnsemble:
+    """
+    Ensemble of the models fitted on the folds of a cross validation. The point estimate is the mean of the fold
+    models, the spread their standard deviation. The prediction interval follows the CV+ method (Barber et al. 2021,
+    "Predictive inference with the jackknife+"): every training sample contributes the prediction of the fold model
+    that did not see it, shifted by the out-of-fold absolute residual of the sample, and the interval bounds are order
+    statistics of these values. With repeated k-fold splits the residuals of all repetitions are pooled. No model is
+    fitted: the residuals are computed once from the stored test indices of the folds.
+    """
+
+    def __init__(self, models: list, testIndices: list, X: np.ndarray, y: np.ndarray, targetNames: list = None):
+        """
+        :param models: list of fitted fold models
+        :param testIndices: list of np.ndarray: test indices of each fold, i.e. the samples its model did not see
+        :param X: np.ndarray: inputs of the cross validation
+        :param y: np.ndarray: targets of the cross validation, shape (n_samples,) or (n_samples, n_targets)
+        :param targetNames: list of str: names of the targets used as column names
+        """
+        y = y.reshape(len(y), -1)
+        self.models = models
+        self.targetNames = targetNames if targetNames is not None else ["y{}".format(i) for i in range(y.shape[1])]
+        # fold model and out-of-fold absolute residual of every (repeated) training sample
+        self.residualFold = np.concatenate([np.full(len(testIndex), fold) for fold, testIndex in enumerate(testIndices)])
+        self.residuals = np.concatenate([
+            np.abs(y[testIndex] - model.predict(X[testIndex]).reshape(len(testIndex), -1))
+            for model, testIndex in zip(models, testIndices)])
+
+    @classmethod
+    def fromCrossValidation(cls, crossValidationRunner: CrossValidationRunner, estimator, X: np.ndarray,
+                            y: np.ndarray, targetNames: list = None):
+        """
+        Fold ensemble of the cross validation of the estimator, only folds not stored yet are fitted
+        :param crossValidationRunner: CrossValidationRunner storing the folds
+        :param estimator: unfitted scikit-learn compatible estimator
+        """
+        folds = crossValidationRunner.folds(estimator, X, y)
+        return cls([fold["model"] for fold in folds], [fold["testIndex"] for fold in folds], X, y, targetNames)
+
+    def predictFolds(self, X: np.ndarray):
+        """
+        :param X: np.ndarray: query inputs
+        :return: np.ndarray of shape (n_folds, n_queries, n_targets) with the prediction of every fold model
+        """
+        return np.stack([model.predict(X).reshape(len(X), -1) for model in self.models])
+
+    def predict(self, X: np.ndarray, alpha: float = 0.1, chunkRows: int = 1024):
+        """
+        Point estimate, spread and (1 - alpha) prediction interval of every query and target
+        :param X: np.ndarray: query inputs
+        :param alpha: float: miscoverage level, e.g. 0.1 for a 90 % prediction interval
+        :param chunkRows: int: number of queries whose interval is computed at once, the temporary array has
+                          n_residuals * chunkRows values
+        :return: pd.DataFrame with the columns <target>, <target>Std, <target>Lower and <target>Upper per target
+        """
+        foldPredictions = self.predictFolds(X)
+        nResiduals = len(self.residualFold)
+        # order statistics of CV+ (infinite, if there are too few residuals for the level)
+        kLower = int(np.floor(alpha * (nResiduals + 1))) - 1
+        kUpper = int(np.ceil((1 - alpha) * (nResiduals + 1))) - 1
+        lower = np.full(foldPredictions.shape[1:], -np.inf)
+        upper = np.full(foldPredictions.shape[1:], np.inf)
+        for start in range(0, len(X), chunkRows):
+            rows = slice(start, start + chunkRows)
+            for target in range(foldPredictions.shape[2]):
+                residualPredictions = foldPredictions[self.residualFold, rows, target]
+                residuals = self.residuals[:, target][:, np.newaxis]
+                if kLower >= 0:
+                    lower[rows, target] = np.partition(residualPredictions - residuals, kLower, axis=0)[kLower]
+                if kUpper < nResiduals:
+                    upper[rows, target] = np.partition(residualPredictions + residuals, kUpper, axis=0)[kUpper]
+
+        columns = {}
+        for target, name in enumerate(self.targetNames):
+            columns[name] = foldPredictions[:, :, target].mean(axis=0)
+            columns[name + "Std"] = foldPredictions[:, :, target].std(axis=0)
+            columns[name + "Lower"] = lower[:, target]
+            columns[name + "Upper"] = upper[:, target]
+        return pd.DataFrame(columns)
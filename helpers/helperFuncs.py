@@ -12,9 +12,12 @@ Licence:     CC BY-SA 4.0
 """
 
 import os
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import matplotlib.pyplot as plt
 import helpers.WetAirToolBox as wetTB
+import helpers.profiling as profiling
 
 def interpolateDataFrameBasedOnIndex(df: pd.DataFrame, column: str, value: float,
                                      fillnaMethod: str = "backfill"):
@@ -28,11 +31,12 @@ def interpolateDataFrameBasedOnIndex(df: pd.DataFrame, column: str, value: float
     :param fillnaMethod: Fill
     :return: df
     """
-    df.loc[-1, column] = value
-    df.sort_values(by=column, inplace=True)
-    df.index = df[column].values
-    df.interpolate(method='index', axis=0, inplace=True)
-    df.fillna(method=fillnaMethod, inplace=True)
+    with profiling.span("interpolateDataFrameBasedOnIndex", column=column):
+        df.loc[-1, column] = value
+        df.sort_values(by=column, inplace=True)
+        df.index = df[column].values
+        df.interpolate(method='index', axis=0, inplace=True)
+        df.fillna(method=fillnaMethod, inplace=True)
     return df
 
 def extendStaticDF(dfStaticResults: pd.DataFrame):
@@ -41,17 +45,16 @@ def extendStaticDF(dfStaticResults: pd.DataFrame):
     :param dfStaticResults: result data set
     :return: dfStaticResults: extended result data set
     """
-    def getLocation(row):
-        return row['locationVariant'][:2]
-
-    def calculateDewPoint(row):
-        return wetTB.relHumidity_Temp2dewPoint(row["OutsideTemperatureDegrees"], row["OutsideRelativeHumidity"])
-
-    dfStaticResults["location"] = dfStaticResults.apply(lambda row: getLocation(row), axis=1)
-    dfStaticResults["finalEnergy"] = dfStaticResults["electricEnergyKwh"] + dfStaticResults["naturalGasEnergyKwh"] + \
-                                     dfStaticResults["districtHeatingEnergyKwh"]
-    dfStaticResults["OutsideDewPointTemperatureDegrees"] = dfStaticResults.apply(lambda row: calculateDewPoint(row),
-                                                                                 axis=1)
+    with profiling.span("extendStaticDF", nRows=len(dfStaticResults)):
+        dfStaticResults["location"] = dfStaticResults["locationVariant"].str[:2]
+        dfStaticResults["finalEnergy"] = dfStaticResults["electricEnergyKwh"] + \
+                                         dfStaticResults["naturalGasEnergyKwh"] + \
+                                         dfStaticResults["districtHeatingEnergyKwh"]
+        # scalar evaluation keeps the results bit-identical to the former row-wise apply (vectorized pow may differ)
+        dfStaticResults["OutsideDewPointTemperatureDegrees"] = [
+            wetTB.relHumidity_Temp2dewPoint(T, phi)
+            for T, phi in zip(dfStaticResults["OutsideTemperatureDegrees"].tolist(),
+                              dfStaticResults["OutsideRelativeHumidity"].tolist())]
     return dfStaticResults
 
 # save plot to local file
@@ -73,11 +76,136 @@ def save_plot_to_file(file_name, fig, savedir=os.path.join(os.path.dirname(os.pa
             None
                 saves image to given local path location.
     """
+    import matplotlib.pyplot as plt  # plotting layer, not needed by the numeric helpers
+
     if not os.path.exists(savedir):
         os.makedirs(savedir)
-    fig.savefig(os.path.join(savedir, file_name))
+    with profiling.span("savePlot", fileName=file_name):
+        fig.savefig(os.path.join(savedir, file_name))
     plt.close('all')  # close all current open figures to avoid memory overload
 
+def dumpAtomic(obj, path: str):
+    """
+    Dump an object with joblib to a temporary file next to path and move it into place afterwards, so that readers
+    never see partially written files (e.g. when a run is interrupted)
+    :param obj: object to be stored
+    :param path: str: target file path
+    """
+    import joblib
+
+    fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    os.close(fd)
+    try:
+        joblib.dump(obj, tmpPath)
+        os.replace(tmpPath, path)
+    except BaseException:
+        os.remove(tmpPath)
+        raise
+
+# compute budget of the evaluations, see setComputeBudget. In the workers of createProcessPool, cores is the share of
+# the worker, so nested pools and estimators stay within the budget of the pool
+_computeBudget = {"cores": None, "innerThreads": 1}
+# names of the thread count parameters of the estimators (XGBoost, scikit-learn), which do not change a fitted model
+THREAD_PARAMETERS = ("n_jobs", "nthread")
+
+def setComputeBudget(cores: int = None, innerThreads: int = 1):
+    """
+    Set how many cores the evaluations use and how they are split between outer parallelism (worker processes for
+    folds, scenario chunks, data set chunks, figures) and inner parallelism (XGBoost and BLAS threads in each process)
+    :param cores: int: total number of cores, None uses all cores
+    :param innerThreads: int: threads per worker process of pools created with n_jobs=-1, i.e. n_jobs=-1 starts
+                         cores // innerThreads workers. Pools with fewer workers (fewer tasks or an explicit n_jobs)
+                         give each worker cores // nWorkers threads
+    """
+    if cores is not None and cores < 1 or innerThreads < 1:
+        raise ValueError("The compute budget needs at least one core and one thread per worker")
+    _computeBudget["cores"] = cores
+    _computeBudget["innerThreads"] = innerThreads
+
+def budgetCores():
+    """
+    Number of cores of the compute budget of this process
+    :return: int
+    """
+    return _computeBudget["cores"] or os.cpu_count() or 1
+
+def innerThreads(nWorkers: int = 1):
+    """
+    Threads per process when nWorkers processes of this budget run at the same time
+    :param nWorkers: int: number of concurrently running worker processes
+    :return: int: number of threads (at least 1)
+    """
+    return max(budgetCores() // max(nWorkers, 1), 1)
+
+def setInnerThreads(estimator, nThreads: int):
+    """
+    Set n_jobs of all (nested) XGBoost estimators of an unfitted estimator, e.g. the XGBRegressors of the exported
+    pipeline. Other n_jobs parameters (e.g. of the FeatureUnion of the input copies) keep their value, joblib workers
+    for cheap transformers would only add overhead.
+    :param estimator: scikit-learn compatible estimator
+    :param nThreads: int: number of threads
+    :return: estimator
+    """
+    def isXGBoost(obj):
+        # by module, so that the check does not import xgboost
+        return type(obj).__module__.split(".")[0] == "xgboost"
+
+    params = estimator.get_params(deep=True)
+    estimator.set_params(**{key: nThreads for key in params if key.endswith("__n_jobs") and
+                            isXGBoost(params[key[:-len("__n_jobs")]])})
+    if isXGBoost(estimator):
+        estimator.set_params(n_jobs=nThreads)
+    return estimator
+
+def limitThreads(nThreads: int):
+    """
+    Limit this process to nThreads: BLAS/OpenMP thread pools (via threadpoolctl, if installed) and the compute budget
+    used by innerThreads and effectiveNJobs
+    :param nThreads: int: number of threads
+    """
+    _computeBudget["cores"] = nThreads
+    _computeBudget["innerThreads"] = 1
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    threadpool_limits(limits=nThreads)
+
+def _initWorkerThreads(nThreads: int, initializer, initargs: tuple):
+    limitThreads(nThreads)
+    if initializer is not None:
+        initializer(*initargs)
+
+def effectiveNJobs(n_jobs: int, nTasks: int = None):
+    """
+    Translate a scikit-learn style n_jobs value (-1 = all cores of the compute budget) into a number of worker processes
+    :param n_jobs: int: requested number of jobs
+    :param nTasks: int: number of tasks, no more workers than tasks are used
+    :return: int: number of workers (at least 1)
+    """
+    nWorkers = budgetCores() // _computeBudget["innerThreads"] if n_jobs is None or n_jobs < 0 else n_jobs
+    if nTasks is not None:
+        nWorkers = min(nWorkers, nTasks)
+    return max(nWorkers, 1)
+
+def createProcessPool(nWorkers: int, initializer=None, initargs: tuple = ()):
+    """
+    Create the process pool used for folds, data set chunks etc. Each worker is limited to its share of the compute
+    budget (innerThreads(nWorkers)) before the initializer runs.
+    :param nWorkers: int: number of worker processes
+    :param initializer: callable run once in each worker
+    :param initargs: tuple: arguments of initializer
+    :return: concurrent.futures.ProcessPoolExecutor
+    """
+    initargs = (innerThreads(nWorkers), initializer, initargs)
+    # spawn instead of fork, forking after OpenMP (xgboost) was initialised may deadlock the workers
+    if profiling.isEnabled():
+        # the tasks record their spans below the span they were submitted from
+        return profiling.ProfiledProcessPoolExecutor(nWorkers, multiprocessing.get_context("spawn"),
+                                                     _initWorkerThreads, initargs)
+    return ProcessPoolExecutor(max_workers=nWorkers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_initWorkerThreads, initargs=initargs)
+
 def set_param_recursive(pipeline_steps, parameter, value):
     """Recursively iterate through all objects in the pipeline and set a given parameter.
 
@@ -0,0 +1,294 @@
+"""
+-------------------------------------------------------------------------------
+Name:        hourlySurrogate
+Purpose:     Out-of-core training of an hourly surrogate model on the dynamic result data set
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+import helpers.helperFuncs as helperFuncs
+import helpers.WetAirToolBox as wetTB
+from helpers.dynamicResultStore import DynamicResultStore
+from helpers.dynamicAggregation import ENERGY_DATAPOINTS
+from helpers.operatingSchedules import intervalCalendar
+
+# boundary parameters of a simulation case (constant over the year) and hourly ambient conditions
+CASE_FEATURES = ["ScalingFactorS", "DryRoomHeatLoad", "DryRoomMoistureLoad"]
+CLIMATE_DATAPOINTS = ["OutsideTemperatureDegrees", "OutsideRelativeHumidity"]
+HOURLY_FEATURES = CASE_FEATURES + CLIMATE_DATAPOINTS + ["OutsideDewPointTemperatureDegrees",
+                                                        "OutsideTemperatureDegreesMean24h", "hourOfDay", "weekday"]
+DEFAULT_PARAMS = {"tree_method": "hist", "objective": "reg:squarederror", "max_depth": 8, "eta": 0.1,
+                  "subsample": 0.8, "min_child_weight": 1, "max_bin": 256, "seed": 42}
+METADATA_FILE = "metadata.json"
+
+
+def hourlyFeatures(timesteps: np.ndarray, outsideTemperature: np.ndarray, outsideRelativeHumidity: np.ndarray,
+                   scalingFactorS: float, maxWasteHeatRoomW: float, maxMoistureLoad: float, firstWeekday: int = 0):
+    """
+    Feature matrix of the intervals between consecutive time steps (columns as HOURLY_FEATURES)
+    :param timesteps: np.ndarray: time steps in seconds (one more than intervals)
+    :param outsideTemperature: np.ndarray: outside temperature in °C at the start of each interval
+    :param outsideRelativeHumidity: np.ndarray: outside relative humidity as fraction (0...1) at the start of each
+                                    interval
+    :param scalingFactorS: float: scaling factor s
+    :param maxWasteHeatRoomW: float: max. waste heat in Watt
+    :param maxMoistureLoad: float: max. moisture load in room in kg/s
+    :param firstWeekday: int: weekday of 01.01. of the year (0 = Monday)
+    :return: np.ndarray of shape (n_intervals, len(HOURLY_FEATURES)), float32
+    """
+    outsideTemperature = np.asarray(outsideTemperature, dtype=np.float64)
+    outsideRelativeHumidity = np.asarray(outsideRelativeHumidity, dtype=np.float64)
+    nIntervals = len(timesteps) - 1
+    if len(outsideTemperature) != nIntervals or len(outsideRelativeHumidity) != nIntervals:
+        raise ValueError("Expected {} climate values (one per interval), got {} and {}".format(
+            nIntervals, len(outsideTemperature), len(outsideRelativeHumidity)))
+    weekday, hourOfDay, _ = intervalCalendar(timesteps, firstWeekday)
+    # trailing mean of the last 24 intervals as simple measure of the thermal history
+    cumulative = np.concatenate([[0], np.cumsum(outsideTemperature)])
+    windowStart = np.maximum(np.arange(nIntervals) - 23, 0)
+    mean24h = (cumulative[1:] - cumulative[windowStart]) / (np.arange(nIntervals) + 1 - windowStart)
+
+    features = np.empty((nIntervals, len(HOURLY_FEATURES)), dtype=np.float32)
+    features[:, 0:3] = [scalingFactorS, maxWasteHeatRoomW, maxMoistureLoad]
+    features[:, 3] = outsideTemperature
+    features[:, 4] = outsideRelativeHumidity
+    features[:, 5] = wetTB.relHumidity_Temp2dewPoint(outsideTemperature, np.clip(outsideRelativeHumidity, 0, None))
+    features[:, 6] = mean24h
+    features[:, 7] = hourOfDay
+    features[:, 8] = weekday
+    return features
+
+
+def variantTrainingData(store: DynamicResultStore, locationVariant: str, rows: slice = slice(None)):
+    """
+    Features and interval energies of one simulation case of the dynamic data set
+    :param store: DynamicResultStore: converted dynamic result data set
+    :param locationVariant: str: simulation case e.g. "OS-2"
+    :param rows: slice: time step rows
+    :return: tuple of np.ndarray features (n_intervals, n_features) and energies in kWh (n_intervals, 3) in the order
+             of ENERGY_DATAPOINTS
+    """
+    datapoints = store.datapoints(locationVariant)
+    missing = set(CASE_FEATURES + CLIMATE_DATAPOINTS + ENERGY_DATAPOINTS) - set(datapoints)
+    if missing:
+        raise ValueError("Simulation case {} lacks the data points {}".format(locationVariant, sorted(missing)))
+    variantArray = store.variantArray(locationVariant, rows)
+    row = {datapoint: i for i, datapoint in enumerate(datapoints)}
+    caseValues = [float(variantArray[row[datapoint], 0]) for datapoint in CASE_FEATURES]
+    features = hourlyFeatures(np.asarray(store.timesteps[rows]), variantArray[row[CLIMATE_DATAPOINTS[0]], :-1],
+                              variantArray[row[CLIMATE_DATAPOINTS[1]], :-1], *caseValues)
+    energies = np.stack([np.diff(variantArray[row[datapoint]]) for datapoint in ENERGY_DATAPOINTS], axis=1)
+    return features, energies.astype(np.float32)
+
+
+class _VariantBatchIterator(xgb.DataIter):
+    """Feeds the simulation cases batch by batch into an external memory DMatrix, caching its pages on disk"""
+
+    def __init__(self, store: DynamicResultStore, locationVariants: list, target: int, variantsPerBatch: int,
+                 cachePrefix: str):
+        self.store = store
+        self.batches = [locationVariants[i:i + variantsPerBatch]
+                        for i in range(0, len(locationVariants), variantsPerBatch)]
+        self.target = target
+        self._position = 0
+        super().__init__(cache_prefix=cachePrefix)
+
+    def next(self, input_data):
+        if self._position == len(self.batches):
+            return 0
+        batch = [variantTrainingData(self.store, locationVariant) for locationVariant in self.batches[self._position]]
+        input_data(data=np.concatenate([features for features, _ in batch]),
+                   label=np.concatenate([energies[:, self.target] for _, energies in batch]),
+                   feature_names=HOURLY_FEATURES)
+        self._position += 1
+        return 1
+
+    def reset(self):
+        self._position = 0
+
+
+class HourlySurrogate:
+    """
+    One gradient boosted tree model per energy carrier predicting the energy demand of every hour of the year from the
+    hourly ambient conditions of a site and the boundary parameters of the dry room
+    """
+
+    def __init__(self, boosters: dict, metadata: dict):
+        """
+        :param boosters: dict: energy data point (see ENERGY_DATAPOINTS) -> xgboost.Booster
+        :param metadata: dict: training parameters, simulation cases and validation errors
+        """
+        self.boosters = boosters
+        self.metadata = metadata
+
+    @staticmethod
+    def exists(modelDir: str):
+        return os.path.exists(os.path.join(modelDir, METADATA_FILE))
+
+    def save(self, modelDir: str):
+        """
+        Save the boosters in the xgboost JSON format and the metadata, the metadata file is written last
+        :param modelDir: str: directory of the model
+        """
+        if not os.path.exists(modelDir):
+            os.makedirs(modelDir)
+        elif self.exists(modelDir):
+            # a model without metadata is incomplete, so an interrupted save never mixes boosters of two models
+            os.remove(os.path.join(modelDir, METADATA_FILE))
+        for datapoint, booster in self.boosters.items():
+            booster.save_model(os.path.join(modelDir, "{}.json".format(datapoint)))
+        with open(os.path.join(modelDir, METADATA_FILE), "w") as f:
+            json.dump(self.metadata, f, indent=1)
+
+    @classmethod
+    def load(cls, modelDir: str):
+        """
+        Load a model saved by save
+        :param modelDir: str: directory of the model
+        :return: HourlySurrogate
+        """
+        with open(os.path.join(modelDir, METADATA_FILE)) as f:
+            metadata = json.load(f)
+        boosters = {}
+        for datapoint in metadata["targets"]:
+            boosters[datapoint] = xgb.Booster()
+            boosters[datapoint].load_model(os.path.join(modelDir, "{}.json".format(datapoint)))
+        return cls(boosters, metadata)
+
+    def predictFeatures(self, features: np.ndarray):
+        """
+        Interval energies of a feature matrix of hourlyFeatures
+        :return: np.ndarray of shape (n_intervals, n_targets) in kWh
+        """
+        matrix = xgb.DMatrix(features, feature_names=HOURLY_FEATURES)
+        return np.stack([self.boosters[datapoint].predict(matrix) for datapoint in self.metadata["targets"]], axis=1)
+
+    def predictHourlyProfiles(self, outsideTemperature, outsideRelativeHumidity, scalingFactorS: float,
+                              maxWasteHeatRoomW: float, maxMoistureLoad: float, timesteps: np.ndarray = None,
+                              firstWeekday: int = 0):
+        """
+        Hourly energy demands of a new site from its weather series, e.g. a typical meteorological year
+        :param outsideTemperature: array-like: hourly outside temperature in °C
+        :param outsideRelativeHumidity: array-like: hourly outside relative humidity in %
+        :param scalingFactorS: float: calculated scaling factor s
+        :param maxWasteHeatRoomW: float: max. waste heat in Watt
+        :param maxMoistureLoad: float: max. moisture load in room in kg/s
+        :param timesteps: np.ndarray: time steps in seconds (one more than weather values), defaults to hourly steps
+        :param firstWeekday: int: weekday of 01.01. of the year (0 = Monday)
+        :return: pd.DataFrame with the energy demand in kWh of each interval, indexed by the start time step in seconds
+        """
+        outsideTemperature = np.asarray(outsideTemperature, dtype=np.float64)
+        if timesteps is None:
+            timesteps = np.arange(len(outsideTemperature) + 1) * 3600.0
+        features = hourlyFeatures(timesteps, outsideTemperature,
+                                  np.asarray(outsideRelativeHumidity, dtype=np.float64) / 100, scalingFactorS,
+                                  maxWasteHeatRoomW, maxMoistureLoad, firstWeekday)
+        return pd.DataFrame(self.predictFeatures(features), columns=self.metadata["targets"],
+                            index=pd.Index(np.asarray(timesteps[:-1], dtype=np.float64), name="timestep (s)"))
+
+    def evaluate(self, store: DynamicResultStore, locationVariants: list):
+        """
+        Errors of the model on simulation cases of the dynamic data set, read one case at a time
+        :param store: DynamicResultStore: converted dynamic result data set
+        :param locationVariants: list: simulation cases e.g. ["OS-2"]
+        :return: pd.DataFrame with the hourly mean absolute error and the relative error of the annual energy per
+                 simulation case and energy carrier
+        """
+        records = []
+        for locationVariant in locationVariants:
+            features, energies = variantTrainingData(store, locationVariant)
+            predicted = self.predictFeatures(features)
+            for i, datapoint in enumerate(self.metadata["targets"]):
+                annual = float(energies[:, i].sum())
+                records.append({"locationVariant": locationVariant, "datapoint": datapoint,
+                                "hourlyMAEKwh": float(np.mean(np.abs(predicted[:, i] - energies[:, i]))),
+                                "annualEnergyKwh": annual, "predictedAnnualEnergyKwh": float(predicted[:, i].sum()),
+                                "annualRelativeError": float(predicted[:, i].sum() / annual - 1) if annual else np.nan})
+        return pd.DataFrame(records)
+
+
+def trainHourlySurrogate(store: DynamicResultStore, locationVariants: list = None, validationLocations: list = None,
+                         params: dict = None, numBoostRound: int = 300, variantsPerBatch: int = 8,
+                         cacheDir: str = None, n_jobs: int = -1):
+    """
+    Train the hourly surrogate out of core: the simulation cases are streamed from the memory-mapped store in batches
+    of variantsPerBatch cases into xgboost's external memory DMatrix, whose pages are cached on disk. Only one batch and
+    the labels of the current energy carrier are held in memory, independent of the size of the data set.
+    :param store: DynamicResultStore: converted dynamic result data set (see convertDynamicResults)
+    :param locationVariants: list: simulation cases used, defaults to all
+    :param validationLocations: list: locations e.g. ["OS"] held out of the training and used for the validation
+    :param params: dict: xgboost training parameters updating DEFAULT_PARAMS
+    :param numBoostRound: int: number of trees per energy carrier
+    :param variantsPerBatch: int: number of simulation cases per batch of the external memory iterator
+    :param cacheDir: str: directory of the page cache, defaults to a temporary directory removed afterwards
+    :param n_jobs: int: number of threads, -1 uses all cores of the compute budget (helperFuncs.setComputeBudget)
+    :return: HourlySurrogate
+    """
+    if locationVariants is None:
+        locationVariants = store.locationVariants
+    validationLocations = sorted(validationLocations or [])
+    validationVariants = [lv for lv in locationVariants if store.location(lv) in validationLocations]
+    trainVariants = [lv for lv in locationVariants if store.location(lv) not in validationLocations]
+    if not trainVariants:
+        raise ValueError("No simulation cases left for the training")
+    trainParams = dict(DEFAULT_PARAMS, nthread=helperFuncs.innerThreads() if n_jobs < 0 else n_jobs)
+    trainParams.update(params or {})
+
+    boosters = {}
+    pageCacheDir = tempfile.mkdtemp(dir=cacheDir)
+    try:
+        for target, datapoint in enumerate(ENERGY_DATAPOINTS):
+            iterator = _VariantBatchIterator(store, trainVariants, target, variantsPerBatch,
+                                             os.path.join(pageCacheDir, datapoint))
+            matrix = xgb.DMatrix(iterator)
+            boosters[datapoint] = xgb.train(trainParams, matrix, num_boost_round=numBoostRound)
+            del matrix, iterator
+    finally:
+        shutil.rmtree(pageCacheDir, ignore_errors=True)
+
+    metadata = {"features": HOURLY_FEATURES, "targets": ENERGY_DATAPOINTS, "params": trainParams,
+                "numBoostRound": numBoostRound, "source": store.index.get("source"),
+                "trainVariants": trainVariants, "validationLocations": validationLocations}
+    surrogate = HourlySurrogate(boosters, metadata)
+    if validationVariants:
+        dfValidation = surrogate.evaluate(store, validationVariants)
+        metadata["validation"] = {datapoint: {"hourlyMAEKwh": float(df["hourlyMAEKwh"].mean()),
+                                              "annualMeanAbsoluteRelativeError":
+                                                  float(df["annualRelativeError"].abs().mean())}
+                                  for datapoint, df in dfValidation.groupby("datapoint")}
+    return surrogate
+
+
+def loadOrTrainHourlySurrogate(store: DynamicResultStore, modelDir: str, **kwargs):
+    """
+    Load the hourly surrogate from modelDir if it was trained on the same data set with the same arguments, otherwise
+    train and save it
+    :param store: DynamicResultStore: converted dynamic result data set
+    :param modelDir: str: directory of the model
+    :param kwargs: arguments of trainHourlySurrogate (except store)
+    :return: HourlySurrogate
+    """
+    configuration = {"source": store.index.get("source"), "nRows": store.nRows,
+                     "locationVariants": kwargs.get("locationVariants") or store.locationVariants,
+                     "arguments": {key: value for key, value in sorted(kwargs.items())
+                                   if key not in ("locationVariants", "cacheDir", "n_jobs")}}
+    if HourlySurrogate.exists(modelDir):
+        surrogate = HourlySurrogate.load(modelDir)
+        if surrogate.metadata.get("configuration") == json.loads(json.dumps(configuration)):
+            return surrogate
+    surrogate = trainHourlySurrogate(store, **kwargs)
+    surrogate.metadata["configuration"] = configuration
+    surrogate.save(modelDir)
+    return surrogate
@@ -0,0 +1,338 @@
+"""
+-------------------------------------------------------------------------------
+Name:        interpolationGrids
+Purpose:     Pre-sorted per-location grids of the static result data set for vectorized batch interpolation
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import numpy as np
+import pandas as pd
+import helpers.helperFuncs as helperFuncs
+
+
+class StaticResultGrids:
+    """
+    Static result data set reorganised as one value matrix sorted by location, LoadScalingFactor and ScalingFactorS.
+    The interpolation performed by energeticEvaluations.interpolateScalingFactorAndInternalLoads is reproduced with
+    a few NumPy passes over these grids, so that many queries can be answered at once.
+    """
+
+    def __init__(self, columns: list, numericColumns: list, objectColumns: list, values: np.ndarray,
+                 objectValues: np.ndarray, locations: np.ndarray, locationGroupOffsets: np.ndarray,
+                 groupKeys: np.ndarray, groupOffsets: np.ndarray, rowPositions: np.ndarray = None):
+        """
+        :param columns: list: column order of the extended static result DataFrame
+        :param numericColumns: list: numeric columns stored in values
+        :param objectColumns: list: non-numeric columns stored in objectValues
+        :param values: np.ndarray: (n_rows, n_numeric) sorted numeric values
+        :param objectValues: np.ndarray: (n_rows, n_object) non-numeric values in the same row order
+        :param locations: np.ndarray: sorted unique locations without case number e.g. "OS"
+        :param locationGroupOffsets: np.ndarray: offsets of each location into groupKeys (len(locations) + 1)
+        :param groupKeys: np.ndarray: LoadScalingFactor of each group
+        :param groupOffsets: np.ndarray: row offsets of each group into values (len(groupKeys) + 1)
+        :param rowPositions: np.ndarray: position of each sorted row in the original DataFrame
+        """
+        self.columns = list(columns)
+        self.numericColumns = list(numericColumns)
+        self.objectColumns = list(objectColumns)
+        self.values = values
+        self.objectValues = objectValues
+        self.locations = locations
+        self.locationGroupOffsets = locationGroupOffsets
+        self.groupKeys = groupKeys
+        self.groupOffsets = groupOffsets
+        self.rowPositions = np.arange(len(values)) if rowPositions is None else rowPositions
+        self._locationIndex = {location: i for i, location in enumerate(self.locations)}
+        self._sColumn = self.numericColumns.index("ScalingFactorS")
+        self._heatColumn = self.numericColumns.index("DryRoomHeatLoad")
+        self._moistureColumn = self.numericColumns.index("DryRoomMoistureLoad")
+        # all locations with the same number of LoadScalingFactor groups of the same size (as in the shipped data set)
+        groupSizes = np.diff(self.groupOffsets)
+        groupsPerLocation = np.diff(self.locationGroupOffsets)
+        self._uniformLayout = len(groupSizes) > 0 and bool(np.all(groupSizes == groupSizes[0])) and \
+                              bool(np.all(groupsPerLocation == groupsPerLocation[0]))
+
+    @classmethod
+    def fromDataFrame(cls, dfStaticResults: pd.DataFrame):
+        """
+        Build the grids from the static result data set
+        :param dfStaticResults: pd.DataFrame: static results data set, extended by helperFuncs.extendStaticDF if necessary
+        :return: StaticResultGrids
+        """
+        if "location" not in dfStaticResults:
+            dfStaticResults = helperFuncs.extendStaticDF(dfStaticResults.copy())
+        columns = list(dfStaticResults.columns)
+        numericColumns = [col for col in columns if pd.api.types.is_numeric_dtype(dfStaticResults[col])]
+        objectColumns = [col for col in columns if col not in numericColumns]
+        # stable sort keeps the original row order for identical keys just like the scalar path
+        rowPositions = dfStaticResults.reset_index(drop=True).sort_values(
+            by=["location", "LoadScalingFactor", "ScalingFactorS"], kind="mergesort").index.to_numpy()
+        dfSorted = dfStaticResults.iloc[rowPositions]
+        values = dfSorted[numericColumns].to_numpy(dtype=np.float64)
+        objectValues = dfSorted[objectColumns].to_numpy(dtype=object)
+
+        locationCodes = dfSorted["location"].to_numpy()
+        loadScalingFactors = dfSorted["LoadScalingFactor"].to_numpy(dtype=np.float64)
+        newGroup = np.ones(len(dfSorted), dtype=bool)
+        newGroup[1:] = (locationCodes[1:] != locationCodes[:-1]) | (loadScalingFactors[1:] != loadScalingFactors[:-1])
+        groupStarts = np.flatnonzero(newGroup)
+        groupOffsets = np.append(groupStarts, len(dfSorted))
+        groupKeys = loadScalingFactors[groupStarts]
+        groupLocations = locationCodes[groupStarts]
+        newLocation = np.ones(len(groupStarts), dtype=bool)
+        newLocation[1:] = groupLocations[1:] != groupLocations[:-1]
+        locationStarts = np.flatnonzero(newLocation)
+        locations = groupLocations[locationStarts].astype(str)
+        locationGroupOffsets = np.append(locationStarts, len(groupStarts))
+        return cls(columns, numericColumns, objectColumns, values, objectValues, locations, locationGroupOffsets,
+                   groupKeys, groupOffsets, rowPositions)
+
+    def toArrays(self):
+        """
+        Return the grids as a dictionary of plain NumPy arrays (strings as fixed-width unicode) for binary storage
+        :return: dict of np.ndarray
+        """
+        return {"columns": np.asarray(self.columns, dtype=str),
+                "numericColumns": np.asarray(self.numericColumns, dtype=str),
+                "objectColumns": np.asarray(self.objectColumns, dtype=str),
+                "values": self.values,
+                "objectValues": self.objectValues.astype(str),
+                "locations": np.asarray(self.locations, dtype=str),
+                "locationGroupOffsets": self.locationGroupOffsets,
+                "groupKeys": self.groupKeys,
+                "groupOffsets": self.groupOffsets,
+                "rowPositions": self.rowPositions}
+
+    @classmethod
+    def fromArrays(cls, arrays):
+        """
+        Restore the grids from the dictionary created by toArrays
+        :param arrays: dict-like of np.ndarray
+        :return: StaticResultGrids
+        """
+        return cls(arrays["columns"].tolist(), arrays["numericColumns"].tolist(), arrays["objectColumns"].tolist(),
+                   arrays["values"], arrays["objectValues"].astype(object), arrays["locations"],
+                   arrays["locationGroupOffsets"], arrays["groupKeys"], arrays["groupOffsets"], arrays["rowPositions"])
+
+    def replaceLocations(self, locationGrids):
+        """
+        Grids in which the locations of locationGrids replace (or are added to) the locations of these grids, e.g.
+        after new simulation cases were appended to the static result data set. Only the affected locations need to be
+        sorted, the blocks of all other locations are copied unchanged. The result equals fromDataFrame of the whole
+        data set if locationGrids was built from all rows of its locations (in their original row order) and its
+        rowPositions refer to the whole data set.
+        :param locationGrids: StaticResultGrids: grids of the new or changed locations with the same columns
+        :return: StaticResultGrids
+        """
+        if locationGrids.columns != self.columns or locationGrids.numericColumns != self.numericColumns:
+            raise ValueError("The grids to be merged have different columns")
+        blocks = [(location, self, i) for i, location in enumerate(self.locations)
+                  if location not in locationGrids._locationIndex]
+        blocks += [(location, locationGrids, i) for i, location in enumerate(locationGrids.locations)]
+        blocks.sort(key=lambda block: block[0])
+
+        rowSlices, groupSlices = [], []
+        for _, grids, i in blocks:
+            firstGroup, stopGroup = grids.locationGroupOffsets[i], grids.locationGroupOffsets[i + 1]
+            groupSlices.append((grids, slice(firstGroup, stopGroup)))
+            rowSlices.append((grids, slice(grids.groupOffsets[firstGroup], grids.groupOffsets[stopGroup])))
+        groupSizes = np.concatenate([np.diff(grids.groupOffsets[groups.start:groups.stop + 1])
+                                     for grids, groups in groupSlices])
+        groupsPerLocation = [groups.stop - groups.start for _, groups in groupSlices]
+        return StaticResultGrids(self.columns, self.numericColumns, self.objectColumns,
+                                 np.concatenate([grids.values[rows] for grids, rows in rowSlices]),
+                                 np.concatenate([grids.objectValues[rows] for grids, rows in rowSlices]),
+                                 np.asarray([location for location, _, _ in blocks], dtype=str),
+                                 np.append(0, np.cumsum(groupsPerLocation)),
+                                 np.concatenate([grids.groupKeys[groups] for grids, groups in groupSlices]),
+                                 np.append(0, np.cumsum(groupSizes)),
+                                 np.concatenate([grids.rowPositions[rows] for grids, rows in rowSlices]))
+
+    def selectColumns(self, columns: list):
+        """
+        Grids restricted to the given result columns and the interpolation keys, which reduces the work per query when
+        only a few results are needed (e.g. the energy demands of many samples)
+        :param columns: list: result columns e.g. ["electricEnergyKwh", "finalEnergy"]
+        :return: StaticResultGrids
+        """
+        unknownColumns = set(columns) - set(self.columns)
+        if unknownColumns:
+            raise ValueError("Columns not contained in static result data set: {}".format(sorted(unknownColumns)))
+        selected = set(columns) | {"ScalingFactorS", "DryRoomHeatLoad", "DryRoomMoistureLoad"}
+        numericPositions = [j for j, col in enumerate(self.numericColumns) if col in selected]
+        objectPositions = [j for j, col in enumerate(self.objectColumns) if col in selected]
+        return StaticResultGrids([col for col in self.columns if col in selected],
+                                 [self.numericColumns[j] for j in numericPositions],
+                                 [self.objectColumns[j] for j in objectPositions],
+                                 np.ascontiguousarray(self.values[:, numericPositions]),
+                                 self.objectValues[:, objectPositions], self.locations, self.locationGroupOffsets,
+                                 self.groupKeys, self.groupOffsets, self.rowPositions)
+
+    def locationGroups(self, consideredLocation: str):
+        """
+        Return the (LoadScalingFactor, row slice) pairs of a location in ascending order of LoadScalingFactor
+        :param consideredLocation: str: considered available location without case number e.g. "OS"
+        :return: list of tuples (LoadScalingFactor, slice)
+        """
+        i = self._locationIndex[consideredLocation]
+        return [(self.groupKeys[g], slice(self.groupOffsets[g], self.groupOffsets[g + 1]))
+                for g in range(self.locationGroupOffsets[i], self.locationGroupOffsets[i + 1])]
+
+    def interpolate(self, consideredLocation, scalingFactorS, maxWasteHeatRoomW, maxMoistureLoad,
+                    chunkSize: int = 65536):
+        """
+        Vectorized counterpart of energeticEvaluations.interpolateScalingFactorAndInternalLoads
+        :param consideredLocation: str or array-like: location(s) without case number e.g. "OS"
+        :param scalingFactorS: float or array-like: calculated scaling factor(s) s
+        :param maxWasteHeatRoomW: float or array-like: max. waste heat in Watt
+        :param maxMoistureLoad: float or array-like: max. moisture load in room in kg/s
+        :param chunkSize: int: number of queries processed at once to bound the memory of intermediate arrays
+        :return: pd.DataFrame with one row of interpolated results per query
+        """
+        locations, scalingFactorS, maxWasteHeatRoomW, maxMoistureLoad = np.broadcast_arrays(
+            np.asarray(consideredLocation, dtype=object), np.asarray(scalingFactorS, dtype=np.float64),
+            np.asarray(maxWasteHeatRoomW, dtype=np.float64), np.asarray(maxMoistureLoad, dtype=np.float64))
+        locations, scalingFactorS = locations.ravel(), scalingFactorS.ravel()
+        maxWasteHeatRoomW, maxMoistureLoad = maxWasteHeatRoomW.ravel(), maxMoistureLoad.ravel()
+        unknownLocations = set(locations) - set(self._locationIndex)
+        if unknownLocations:
+            raise ValueError("Locations not contained in static result data set: {}".format(sorted(unknownLocations)))
+
+        locationIndices = np.fromiter((self._locationIndex[location] for location in locations), dtype=np.int64,
+                                      count=len(locations))
+        resultValues, resultSources = self.interpolateValues(locationIndices, scalingFactorS, maxWasteHeatRoomW,
+                                                             maxMoistureLoad, chunkSize)
+
+        dfResults = pd.DataFrame(resultValues, columns=self.numericColumns)
+        missing = resultSources < 0
+        for j, col in enumerate(self.objectColumns):
+            colValues = self.objectValues[np.where(missing, 0, resultSources), j]
+            colValues[missing] = np.nan
+            dfResults[col] = colValues
+        return dfResults[self.columns]
+
+    def interpolateValues(self, locationIndices: np.ndarray, scalingFactorS: np.ndarray,
+                          maxWasteHeatRoomW: np.ndarray, maxMoistureLoad: np.ndarray, chunkSize: int = 65536):
+        """
+        Numeric core of interpolate for queries given as 1-D arrays
+        :param locationIndices: np.ndarray: index of the location of each query into locations
+        :param chunkSize: int: number of queries processed at once to bound the memory of intermediate arrays
+        :return: tuple of np.ndarray (n_queries, n_numeric) of the interpolated values and np.ndarray (n_queries,) of
+                 the sorted row each non-numeric value is taken from (-1 if there is none)
+        """
+        nQueries = len(locationIndices)
+        resultValues = np.empty((nQueries, len(self.numericColumns)), dtype=np.float64)
+        resultSources = np.empty(nQueries, dtype=np.int64)
+        uniqueLocationIndices = np.unique(locationIndices)
+        if self._uniformLayout and len(uniqueLocationIndices) > 1:
+            # one shared pass over all locations, the grid rows of each query are gathered per chunk
+            chunkSize = max(1, chunkSize // int(self.groupOffsets[1] - self.groupOffsets[0]))
+            for start in range(0, nQueries, chunkSize):
+                idx = slice(start, start + chunkSize)
+                resultValues[idx], resultSources[idx] = self._interpolateUniformLayout(
+                    locationIndices[idx], scalingFactorS[idx], maxWasteHeatRoomW[idx], maxMoistureLoad[idx])
+        else:
+            for i in uniqueLocationIndices:
+                queryIdx = np.flatnonzero(locationIndices == i)
+                for start in range(0, len(queryIdx), chunkSize):
+                    idx = queryIdx[start:start + chunkSize]
+                    resultValues[idx], resultSources[idx] = self._interpolateLocation(
+                        self.locations[i], scalingFactorS[idx], maxWasteHeatRoomW[idx], maxMoistureLoad[idx])
+        return resultValues, resultSources
+
+    def _interpolateLocation(self, location, scalingFactorS, maxWasteHeatRoomW, maxMoistureLoad):
+        groups = self.locationGroups(location)
+        nQueries, nGroups = len(scalingFactorS), len(groups)
+        # knots: all LoadScalingFactor rows plus the moisture row interpolated from them
+        knotValues = np.empty((nQueries, nGroups + 1, len(self.numericColumns)), dtype=np.float64)
+        knotSources = np.empty((nQueries, nGroups + 1), dtype=np.int64)
+
+        # interpolate results regarding scaling factor S within each LoadScalingFactor group
+        for g, (_, rows) in enumerate(groups):
+            knotValues[:, g], knotSources[:, g] = _interpolateSharedGrid(
+                self.values[rows, self._sColumn], self.values[rows], np.arange(rows.start, rows.stop),
+                scalingFactorS)
+            knotValues[:, g, self._sColumn] = scalingFactorS
+        return self._interpolateMoistureAndHeat(knotValues, knotSources, maxWasteHeatRoomW, maxMoistureLoad)
+
+    def _interpolateUniformLayout(self, locationIndices, scalingFactorS, maxWasteHeatRoomW, maxMoistureLoad):
+        """Same as _interpolateLocation for queries of different locations, requires the uniform grid layout"""
+        nQueries = len(scalingFactorS)
+        nGroups = int(self.locationGroupOffsets[1] - self.locationGroupOffsets[0])
+        knotValues = np.empty((nQueries, nGroups + 1, len(self.numericColumns)), dtype=np.float64)
+        knotSources = np.empty((nQueries, nGroups + 1), dtype=np.int64)
+        groupRows = np.arange(self.groupOffsets[1] - self.groupOffsets[0])
+        for g in range(nGroups):
+            rows = self.groupOffsets[self.locationGroupOffsets[locationIndices] + g][:, None] + groupRows[None, :]
+            knotValues[:, g], knotSources[:, g], _ = _interpolateKnots(
+                self.values[rows, self._sColumn], self.values[rows], rows, scalingFactorS)
+            knotValues[:, g, self._sColumn] = scalingFactorS
+        return self._interpolateMoistureAndHeat(knotValues, knotSources, maxWasteHeatRoomW, maxMoistureLoad)
+
+    def _interpolateMoistureAndHeat(self, knotValues, knotSources, maxWasteHeatRoomW, maxMoistureLoad):
+        nGroups = knotValues.shape[1] - 1
+        # interpolate results regarding moisture load
+        order = np.argsort(knotValues[:, :nGroups, self._moistureColumn], axis=1, kind="stable")
+        moistureValues = np.take_along_axis(knotValues[:, :nGroups], order[:, :, None], axis=1)
+        moistureSources = np.take_along_axis(knotSources[:, :nGroups], order, axis=1)
+        knotValues[:, nGroups], knotSources[:, nGroups], position = _interpolateKnots(
+            moistureValues[:, :, self._moistureColumn], moistureValues, moistureSources, maxMoistureLoad)
+        knotValues[:, nGroups, self._moistureColumn] = maxMoistureLoad
+
+        # interpolate results regarding heat load last; the knot order before sorting is the moisture sorted frame
+        # with the interpolated moisture row placed behind all rows of equal or lower moisture load
+        slots = np.arange(nGroups + 1)[None, :]
+        insertSlot = position[:, None] + 1
+        knotOrder = np.take_along_axis(order, np.clip(np.where(slots < insertSlot, slots, slots - 1), 0, nGroups - 1),
+                                       axis=1)
+        knotOrder = np.where(slots == insertSlot, nGroups, knotOrder)
+        heatKeys = np.take_along_axis(knotValues[:, :, self._heatColumn], knotOrder, axis=1)
+        order = np.take_along_axis(knotOrder, np.argsort(heatKeys, axis=1, kind="stable"), axis=1)
+        heatValues = np.take_along_axis(knotValues, order[:, :, None], axis=1)
+        heatSources = np.take_along_axis(knotSources, order, axis=1)
+        resultValues, resultSources, _ = _interpolateKnots(heatValues[:, :, self._heatColumn], heatValues, heatSources,
+                                                           maxWasteHeatRoomW)
+        resultValues[:, self._heatColumn] = maxWasteHeatRoomW
+        return resultValues, resultSources
+
+
+def _linearInterpolation(x, xLo, xHi, fLo, fHi, interior):
+    """Linear interpolation with the arithmetic of np.interp, which is used by DataFrame.interpolate(method='index')"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (fHi - fLo) / (xHi - xLo)[:, None]
+        result = slope * (x - xLo)[:, None] + fLo
+    return np.where((interior & (xLo != x))[:, None], result, fLo)
+
+
+def _interpolateSharedGrid(xp, fp, sources, x):
+    """
+    Interpolate fp (n_knots, n_columns) on the sorted keys xp for every query x, clamping at the grid edges like
+    helperFuncs.interpolateDataFrameBasedOnIndex (backfill of the leading and forward interpolation of the trailing rows)
+    """
+    nKnots = len(xp)
+    j = np.searchsorted(xp, x, side="right") - 1
+    lo, hi = np.clip(j, 0, nKnots - 1), np.clip(j + 1, 0, nKnots - 1)
+    values = _linearInterpolation(x, xp[lo], xp[hi], fp[lo], fp[hi], (j >= 0) & (j < nKnots - 1))
+    # non-numeric columns are backfilled from the next row behind the inserted one
+    valueSources = np.where(j + 1 < nKnots, sources[np.minimum(j + 1, nKnots - 1)], -1)
+    return values, valueSources
+
+
+def _interpolateKnots(xp, fp, sources, x):
+    """Same as _interpolateSharedGrid for per-query knots xp (n_queries, n_knots) and fp (n_queries, n_knots, n_columns)"""
+    nQueries, nKnots = xp.shape
+    j = (xp <= x[:, None]).sum(axis=1) - 1
+    lo, hi = np.clip(j, 0, nKnots - 1), np.clip(j + 1, 0, nKnots - 1)
+    rows = np.arange(nQueries)
+    values = _linearInterpolation(x, xp[rows, lo], xp[rows, hi], fp[rows, lo], fp[rows, hi],
+                                  (j >= 0) & (j < nKnots - 1))
+    valueSources = np.full(nQueries, -1, dtype=np.int64)
+    for k in range(nKnots - 1, -1, -1):
+        valueSources = np.where((k > j) & (sources[:, k] >= 0), sources[:, k], valueSources)
+    return values, valueSources, j
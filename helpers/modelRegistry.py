@@ -0,0 +1,157 @@
+"""
+-------------------------------------------------------------------------------
+Name:        modelRegistry
+Purpose:     Fit-once registry of fitted regression models keyed by data set hash and pipeline configuration
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import numpy as np
+import helpers.helperFuncs as helperFuncs
+
+
+def arrayHash(*arrays):
+    """
+    Compute a sha256 hash over the shape, dtype and content of the given arrays
+    :param arrays: np.ndarray
+    :return: str: hex digest
+    """
+    sha256 = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        sha256.update(str((array.shape, array.dtype.str)).encode())
+        sha256.update(array.tobytes())
+    return sha256.hexdigest()
+
+
+def estimatorConfigHash(estimator):
+    """
+    Compute a sha256 hash of all (nested) parameters of a scikit-learn estimator. Nested estimators are covered by
+    their parameters, functions by their qualified name. Thread counts (helperFuncs.THREAD_PARAMETERS) are left out,
+    they depend on the compute budget and not on the fitted model.
+    :param estimator: scikit-learn compatible estimator
+    :return: str: hex digest
+    """
+    def describe(value):
+        if hasattr(value, "get_params"):
+            return type(value).__module__ + "." + type(value).__qualname__
+        if callable(value):
+            return getattr(value, "__module__", "") + "." + getattr(value, "__qualname__", repr(value))
+        if isinstance(value, (list, tuple)):
+            # e.g. steps and transformer_list of pipelines, whose estimators are covered by the nested parameters
+            return "[{}]".format(", ".join(describe(item) for item in value))
+        return repr(value)
+
+    params = estimator.get_params(deep=True)
+    description = [describe(estimator)] + ["{}={}".format(key, describe(params[key])) for key in sorted(params)
+                                           if key.split("__")[-1] not in helperFuncs.THREAD_PARAMETERS]
+    return hashlib.sha256("\n".join(description).encode()).hexdigest()
+
+
+class ModelRegistry:
+    """
+    Registry storing each fitted model once per (data set hash, pipeline configuration hash) on disk together with
+    a JSON metadata file. Models are fitted on the first request and afterwards loaded from disk (and kept in memory).
+    """
+
+    def __init__(self, registryDir: str):
+        """
+        :param registryDir: str: directory in which fitted models and metadata are stored
+        """
+        self.registryDir = registryDir
+        self._loadedModels = {}
+
+    def modelKey(self, estimator, X: np.ndarray, y: np.ndarray):
+        """
+        Key of a model in the registry
+        :param estimator: unfitted scikit-learn compatible estimator
+        :param X: np.ndarray: training inputs
+        :param y: np.ndarray: training targets
+        :return: str: "<data set hash>-<configuration hash>" (shortened)
+        """
+        return "{}-{}".format(arrayHash(X, y)[:16], estimatorConfigHash(estimator)[:16])
+
+    def modelPath(self, key: str):
+        return os.path.join(self.registryDir, "{}.joblib".format(key))
+
+    def metadataPath(self, key: str):
+        return os.path.join(self.registryDir, "{}.json".format(key))
+
+    def get(self, key: str):
+        """
+        Return a registered model without fitting
+        :param key: str: registry key, see modelKey
+        :return: tuple of fitted model and its metadata dictionary, None if the key is not registered
+        """
+        if key in self._loadedModels:
+            return self._loadedModels[key]
+        if os.path.exists(self.modelPath(key)) and os.path.exists(self.metadataPath(key)):
+            import joblib
+
+            with open(self.metadataPath(key)) as f:
+                modelMetadata = json.load(f)
+            self._loadedModels[key] = joblib.load(self.modelPath(key)), modelMetadata
+            return self._loadedModels[key]
+        return None
+
+    def getOrFit(self, estimator, X: np.ndarray, y: np.ndarray, metadata: dict = None, fitFunction=None):
+        """
+        Return the fitted model for the given estimator configuration and data set, fitting it only if it is not
+        registered yet
+        :param estimator: unfitted scikit-learn compatible estimator (it is fitted in place if necessary)
+        :param X: np.ndarray: training inputs
+        :param y: np.ndarray: training targets
+        :param metadata: dict: additional JSON serialisable information stored with a newly fitted model
+        :param fitFunction: callable (estimator, X, y) -> (fitted model, dict of further metadata) used instead of
+                            estimator.fit(X, y), e.g. to warm-start a previously fitted model
+        :return: tuple of fitted model and its metadata dictionary
+        """
+        key = self.modelKey(estimator, X, y)
+        registered = self.get(key)
+        if registered is not None:
+            return registered
+
+        configHash = estimatorConfigHash(estimator)
+        startTime = time.perf_counter()
+        if fitFunction is None:
+            model, fitMetadata = estimator.fit(X, y), {}
+        else:
+            model, fitMetadata = fitFunction(estimator, X, y)
+        modelMetadata = dict(metadata or {})
+        modelMetadata.update({"key": key,
+                              "dataSetHash": arrayHash(X, y),
+                              "configHash": configHash,
+                              "estimator": type(estimator).__name__,
+                              "nSamples": int(X.shape[0]),
+                              "nFeatures": int(X.shape[1]),
+                              "fitSeconds": time.perf_counter() - startTime,
+                              "created": time.strftime("%Y-%m-%dT%H:%M:%S")})
+        modelMetadata.update(fitMetadata)
+        self.register(key, model, modelMetadata)
+        return model, modelMetadata
+
+    def register(self, key: str, model, modelMetadata: dict):
+        """
+        Store a fitted model and its metadata under the given key
+        :param key: str: registry key, see modelKey
+        :param model: fitted model
+        :param modelMetadata: dict: JSON serialisable metadata
+        """
+        if not os.path.exists(self.registryDir):
+            os.makedirs(self.registryDir)
+        helperFuncs.dumpAtomic(model, self.modelPath(key))
+        fd, tmpPath = tempfile.mkstemp(dir=self.registryDir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(modelMetadata, f, indent=2)
+        os.replace(tmpPath, self.metadataPath(key))
+        self._loadedModels[key] = model, modelMetadata
@@ -0,0 +1,140 @@
+"""
+-------------------------------------------------------------------------------
+Name:        operatingSchedules
+Purpose:     Re-aggregation of the annual energy demands for other operating schedules based on the dynamic data set
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import numpy as np
+import pandas as pd
+from helpers.dynamicResultStore import DynamicResultStore, intervalHourOfYear
+from helpers.dynamicAggregation import ENERGY_DATAPOINTS
+
+# production days of the simulated schedule: five-day week (0 = Monday), economy mode on the weekend
+SIMULATED_PRODUCTION_WEEKDAYS = (0, 1, 2, 3, 4)
+
+
+def intervalCalendar(timesteps: np.ndarray, firstWeekday: int = 0):
+    """
+    Weekday and hour of the day at the start of each interval between consecutive time steps
+    :param timesteps: np.ndarray: time steps in seconds
+    :param firstWeekday: int: weekday of 01.01. of the simulated year (0 = Monday)
+    :return: tuple of np.ndarray (weekday, hourOfDay, dayOfYear)
+    """
+    hourOfYear = np.floor(intervalHourOfYear(timesteps)).astype(np.int64)
+    dayOfYear = hourOfYear // 24
+    return (dayOfYear + firstWeekday) % 7, hourOfYear % 24, dayOfYear
+
+
+def shiftPatternWeights(timesteps: np.ndarray, weekPattern, firstWeekday: int = 0):
+    """
+    Interval weights of a weekly shift pattern repeated over the whole year
+    :param timesteps: np.ndarray: time steps in seconds
+    :param weekPattern: array-like of shape (7, 24): weight of each hour of each weekday (0 = Monday), e.g. 1 for
+                        hours to be counted and 0 for hours to be left out
+    :param firstWeekday: int: weekday of 01.01. of the simulated year (0 = Monday)
+    :return: np.ndarray: weight of each interval
+    """
+    weekPattern = np.asarray(weekPattern, dtype=np.float64)
+    if weekPattern.shape != (7, 24):
+        raise ValueError("weekPattern must have the shape (7, 24), got {}".format(weekPattern.shape))
+    weekday, hourOfDay, _ = intervalCalendar(timesteps, firstWeekday)
+    return weekPattern[weekday, hourOfDay]
+
+
+def productionDaySubstitution(timesteps: np.ndarray, productionWeekdays=(0, 1, 2, 3, 4, 5, 6),
+                              simulatedProductionWeekdays=SIMULATED_PRODUCTION_WEEKDAYS, firstWeekday: int = 0):
+    """
+    Source interval of each interval for a schedule with other production days than the simulated one. Hours of
+    additional production days (e.g. weekend production) take the energy demand of the same hour of the closest
+    simulated production day, hours of dropped production days that of the closest simulated economy day (preceding
+    days are preferred, following ones are used at the start of the year).
+    :param timesteps: np.ndarray: time steps in seconds
+    :param productionWeekdays: sequence of weekdays with production in the considered schedule (0 = Monday)
+    :param simulatedProductionWeekdays: sequence of weekdays with production in the simulation
+    :param firstWeekday: int: weekday of 01.01. of the simulated year (0 = Monday)
+    :return: np.ndarray: index of the source interval of each interval
+    """
+    weekday, _, dayOfYear = intervalCalendar(timesteps, firstWeekday)
+    nIntervals = len(weekday)
+    simulatedProduction = np.isin(weekday, simulatedProductionWeekdays)
+    targetProduction = np.isin(weekday, productionWeekdays)
+    intervals = np.arange(nIntervals)
+    sourceIntervals = intervals.copy()
+    for production in (True, False):
+        substitute = (targetProduction == production) & (simulatedProduction != production)
+        for dayShift in range(1, 8):
+            # same hour dayShift days earlier (or later at the start of the year) with the required operating mode
+            for direction in (-1, 1):
+                candidates = intervals + direction * 24 * dayShift
+                valid = substitute & (candidates >= 0) & (candidates < nIntervals)
+                valid[valid] &= simulatedProduction[candidates[valid]] == production
+                valid[valid] &= dayOfYear[candidates[valid]] == dayOfYear[valid] + direction * dayShift
+                sourceIntervals[valid] = candidates[valid]
+                substitute &= ~valid
+    return sourceIntervals
+
+
+def reaggregateEnergy(store: DynamicResultStore, weights: np.ndarray = None, sourceIntervals: np.ndarray = None,
+                      locationVariants: list = None, datapoints: list = ENERGY_DATAPOINTS,
+                      variantsPerBatch: int = 128):
+    """
+    Re-aggregate the cumulative energy data points of all simulation cases for another operating schedule:
+    energy = sum_t weights[t] * increment[sourceIntervals[t]], evaluated as one matrix-vector product per batch of
+    simulation cases and energy carrier
+    :param store: DynamicResultStore: converted dynamic result data set
+    :param weights: np.ndarray: weight of each interval, e.g. a calendar mask or shiftPatternWeights (default: 1)
+    :param sourceIntervals: np.ndarray: source interval of each interval, e.g. productionDaySubstitution (default: identity)
+    :param locationVariants: list: simulation cases e.g. ["OS-2"], defaults to all
+    :param datapoints: list: cumulative energy data points in kWh
+    :param variantsPerBatch: int: number of simulation cases held in memory at once
+    :return: pd.DataFrame indexed by locationVariant with one column of aggregated energy in kWh per data point
+    """
+    if locationVariants is None:
+        locationVariants = store.locationVariants
+    nIntervals = store.nRows - 1
+    weights = np.ones(nIntervals) if weights is None else np.asarray(weights, dtype=np.float64)
+    if sourceIntervals is not None:
+        # accumulate the weights on the source intervals: sum_t w[t] * e[src[t]] == sum_s (sum_{src[t]=s} w[t]) * e[s]
+        weights = np.bincount(sourceIntervals, weights=weights, minlength=nIntervals)
+    if len(weights) != nIntervals:
+        raise ValueError("Expected {} interval weights, got {}".format(nIntervals, len(weights)))
+
+    result = np.empty((len(locationVariants), len(datapoints)), dtype=np.float64)
+    for start in range(0, len(locationVariants), variantsPerBatch):
+        batch = locationVariants[start:start + variantsPerBatch]
+        for j, datapoint in enumerate(datapoints):
+            cumulative = np.stack([store.column(locationVariant, datapoint) for locationVariant in batch])
+            result[start:start + len(batch), j] = np.diff(cumulative, axis=1) @ weights
+    return pd.DataFrame(result, index=pd.Index(locationVariants, name="locationVariant"), columns=datapoints)
+
+
+def scheduleStaticResults(dfStaticResults: pd.DataFrame, store: DynamicResultStore, weights: np.ndarray = None,
+                          sourceIntervals: np.ndarray = None):
+    """
+    Static result data set with the energy demands of the energy carriers replaced by those of another operating
+    schedule. The returned frame can be used in place of dfStaticResults by the interpolation and regression functions.
+    :param dfStaticResults: pd.DataFrame: static results data set
+    :param store: DynamicResultStore: converted dynamic result data set
+    :param weights: np.ndarray: weight of each interval, see reaggregateEnergy
+    :param sourceIntervals: np.ndarray: source interval of each interval, see reaggregateEnergy
+    :return: pd.DataFrame shaped like dfStaticResults
+    """
+    missingVariants = set(dfStaticResults["locationVariant"]) - set(store.locationVariants)
+    if missingVariants:
+        raise ValueError("Simulation cases missing in the dynamic data set: {}".format(sorted(missingVariants)))
+    dfEnergy = reaggregateEnergy(store, weights=weights, sourceIntervals=sourceIntervals,
+                                 locationVariants=list(dict.fromkeys(dfStaticResults["locationVariant"])))
+    dfScheduled = dfStaticResults.copy()
+    for datapoint in ENERGY_DATAPOINTS:
+        dfScheduled[datapoint] = dfEnergy[datapoint].reindex(dfScheduled["locationVariant"]).to_numpy()
+    if "finalEnergy" in dfScheduled:
+        dfScheduled["finalEnergy"] = dfScheduled["electricEnergyKwh"] + dfScheduled["naturalGasEnergyKwh"] + \
+                                     dfScheduled["districtHeatingEnergyKwh"]
+    return dfScheduled
@@ -0,0 +1,387 @@
+"""
+-------------------------------------------------------------------------------
+Name:        profiling
+Purpose:     Opt-in timing and memory spans of the evaluation stages, nested across process pool workers and
+             exportable as JSON, Chrome trace and folded stacks (flame graphs)
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import tracemalloc
+import sys
+import functools
+import itertools
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+# configuration of this process, set by enable (or by _initWorker in the workers of a process pool)
+_state = {"enabled": False, "trackMemory": False, "traceDir": None, "isWorker": False}
+_spans = []
+_spanIds = itertools.count()
+_local = threading.local()
+
+# fit methods of other libraries wrapped in a span while profiling is enabled, as soon as their module is imported:
+# (module, class, method, span name); the pipelines are the links of the RegressorChain
+_instrumentedMethods = [("sklearn.multioutput", "RegressorChain", "fit", "regressorChainFit"),
+                        ("sklearn.pipeline", "Pipeline", "fit", "pipelineFit")]
+
+
+class _NullSpan:
+    """Shared span used while profiling is disabled, entering and leaving it does nothing"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+
+    def __init__(self, name: str, attributes: dict, parent: str = None):
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+
+    def __enter__(self):
+        _wrapImportedMethods()
+        stack = _stack()
+        if self.parent is None and stack:
+            self.parent = stack[-1].id
+        self.id = "{}-{}".format(os.getpid(), next(_spanIds))
+        if _state["trackMemory"]:
+            # the peak of the enclosing span is saved before the peak is reset for this span
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].observeMemory(current, peak)
+            self.tracedPeakStart = _resetPeak(current, peak)
+            self.memoryStart = self.memoryPeak = current
+        stack.append(self)
+        self.startUs = time.time_ns() // 1000
+        self.startCounter = time.perf_counter()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        durationUs = (time.perf_counter() - self.startCounter) * 1e6
+        stack = _stack()
+        stack.pop()
+        record = {"id": self.id, "parent": self.parent, "name": self.name, "pid": os.getpid(),
+                  "tid": threading.get_ident(), "startUs": self.startUs, "durationUs": durationUs}
+        if self.attributes:
+            record["attributes"] = self.attributes
+        if excType is not None:
+            record["error"] = excType.__name__
+        if _state["trackMemory"]:
+            current, peak = tracemalloc.get_traced_memory()
+            self.observeMemory(current, peak)
+            record["memoryPeakBytes"] = self.memoryPeak - self.memoryStart
+            if stack:
+                stack[-1].memoryPeak = max(stack[-1].memoryPeak, self.memoryPeak)
+            _resetPeak(current, peak)
+        _spans.append(record)
+        if _state["isWorker"] and not stack:
+            _flushWorkerSpans()
+        return False
+
+    def observeMemory(self, current: int, peak: int):
+        """Raise the memory peak of the span to the traced peak, if that was reached while the span was open"""
+        if hasattr(tracemalloc, "reset_peak") or peak > self.tracedPeakStart:
+            self.memoryPeak = max(self.memoryPeak, peak)
+        else:
+            # the traced peak stems from before the span, only the current allocation is known to belong to it
+            self.memoryPeak = max(self.memoryPeak, current)
+
+
+def _resetPeak(current: int, peak: int):
+    """
+    Reset the traced peak to the current allocation; tracemalloc.reset_peak only exists from Python 3.9 on, before
+    the traced peak stays the maximum since the start of tracing
+    :return: int: traced peak after the reset
+    """
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+        return current
+    return peak
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def isEnabled():
+    return _state["enabled"]
+
+
+def span(name: str, **attributes):
+    """
+    Timing (and memory) span of a stage, used as context manager: with profiling.span("csvLoad", path=path): ...
+    Spans opened inside another span are its children, also in the workers of helperFuncs.createProcessPool.
+    While profiling is disabled a shared no-op object is returned, so spans can stay in hot paths.
+    :param name: str: name of the stage
+    :param attributes: JSON serialisable details of the span e.g. the number of rows
+    :return: context manager
+    """
+    if not _state["enabled"]:
+        return _NULL_SPAN
+    return _Span(name, attributes)
+
+
+def currentSpanId():
+    """Id of the innermost open span of this thread, None if there is none"""
+    stack = _stack()
+    return stack[-1].id if stack else None
+
+
+def _wrapImportedMethods():
+    for moduleName, className, methodName, spanName in _instrumentedMethods:
+        module = sys.modules.get(moduleName)
+        if module is None:
+            continue
+        cls = getattr(module, className)
+        method = cls.__dict__[methodName]
+        if getattr(method, "_profilingOriginal", None) is None:
+            setattr(cls, methodName, _wrappedMethod(method, spanName))
+
+
+def _wrappedMethod(method, spanName: str):
+    @functools.wraps(method)
+    def wrapped(self, *args, **kwargs):
+        X = args[0] if args else kwargs.get("X")
+        with span(spanName, estimator=type(self).__name__, shape=list(getattr(X, "shape", ()))):
+            return method(self, *args, **kwargs)
+    wrapped._profilingOriginal = method
+    return wrapped
+
+
+def _unwrapMethods():
+    for moduleName, className, methodName, _ in _instrumentedMethods:
+        cls = getattr(sys.modules.get(moduleName), className, None)
+        original = getattr(cls.__dict__.get(methodName), "_profilingOriginal", None) if cls is not None else None
+        if original is not None:
+            setattr(cls, methodName, original)
+
+
+def _configure(trackMemory: bool, traceDir: str, isWorker: bool):
+    _state.update({"enabled": True, "trackMemory": trackMemory, "traceDir": traceDir, "isWorker": isWorker})
+    if trackMemory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def enable(trackMemory: bool = False):
+    """
+    Start recording spans in this process and in the workers of process pools created from now on
+    :param trackMemory: bool: record the peak of the memory allocated within each span (tracemalloc, which slows
+                        down allocation heavy code noticeably). Before Python 3.9 the peak cannot be reset, so a span
+                        whose peak stays below an earlier peak reports only its allocation at the end.
+    """
+    if _state["enabled"]:
+        return
+    _spans.clear()
+    # the workers append their spans to one file each in this directory
+    _configure(trackMemory, tempfile.mkdtemp(prefix="tbsProfile"), isWorker=False)
+
+
+def disable():
+    """
+    Stop recording; the recorded spans (including those of the workers) remain available for the export
+    """
+    if not _state["enabled"]:
+        return
+    _spans[:] = spans()
+    _unwrapMethods()
+    if _state["trackMemory"]:
+        tracemalloc.stop()
+    shutil.rmtree(_state["traceDir"], ignore_errors=True)
+    _state.update({"enabled": False, "trackMemory": False, "traceDir": None})
+
+
+def spans():
+    """
+    Recorded spans of this process and of the finished tasks of its workers
+    :return: list of dicts with id, parent, name, pid, tid, startUs, durationUs and optionally attributes, error and
+             memoryPeakBytes
+    """
+    records = list(_spans)
+    traceDir = _state["traceDir"]
+    if traceDir is not None and os.path.isdir(traceDir):
+        for fileName in sorted(os.listdir(traceDir)):
+            with open(os.path.join(traceDir, fileName)) as f:
+                records.extend(json.loads(line) for line in f if line.strip())
+    return sorted(records, key=lambda record: record["startUs"])
+
+
+def _flushWorkerSpans():
+    """Append the finished spans of a worker to its file in the trace directory"""
+    with open(os.path.join(_state["traceDir"], "spans-{}.jsonl".format(os.getpid())), "a") as f:
+        for record in _spans:
+            f.write(json.dumps(record) + "\n")
+    _spans.clear()
+
+
+def _initWorker(trackMemory: bool, traceDir: str, parentSpanId: str, initializer, initargs: tuple):
+    _configure(trackMemory, traceDir, isWorker=True)
+    if initializer is not None:
+        with _Span("workerInit:" + getattr(initializer, "__name__", "initializer"), {}, parent=parentSpanId):
+            initializer(*initargs)
+
+
+def _taskName(fn):
+    """Name of the function run by a task, map submits partial(_process_chunk, fn) running fn on chunks of items"""
+    while isinstance(fn, functools.partial):
+        # _process_chunk is private to concurrent.futures.process, so it is recognised by its name only
+        isChunk = getattr(fn.func, "__name__", None) == "_process_chunk"
+        fn = fn.args[0] if isChunk and fn.args else fn.func
+    return getattr(fn, "__name__", "task")
+
+
+def _runTask(parentSpanId: str, fn, args: tuple, kwargs: dict):
+    with _Span("task:" + _taskName(fn), {}, parent=parentSpanId):
+        return fn(*args, **kwargs)
+
+
+class ProfiledProcessPoolExecutor(ProcessPoolExecutor):
+    """
+    Process pool whose tasks run in a span that is a child of the span open at their submission (the initializer of
+    the workers in a child of the span open at the creation of the pool), created by helperFuncs.createProcessPool
+    while profiling is enabled
+    """
+
+    def __init__(self, max_workers: int, mp_context=None, initializer=None, initargs: tuple = ()):
+        super().__init__(max_workers=max_workers, mp_context=mp_context, initializer=_initWorker,
+                         initargs=(_state["trackMemory"], _state["traceDir"], currentSpanId(), initializer,
+                                   initargs))
+
+    def submit(self, fn, *args, **kwargs):
+        # map submits its tasks through submit as well
+        return super().submit(_runTask, currentSpanId(), fn, args, kwargs)
+
+
+def _stackPaths(records: list):
+    """Name path from the root span to every span, following the parents across processes"""
+    byId = {record["id"]: record for record in records}
+    paths = {}
+
+    def path(record):
+        if record["id"] not in paths:
+            parent = byId.get(record["parent"])
+            paths[record["id"]] = (path(parent) if parent is not None else ()) + (record["name"],)
+        return paths[record["id"]]
+    for record in records:
+        path(record)
+    return paths
+
+
+def summary(records: list = None):
+    """
+    Total time, number of calls and largest memory peak per span name
+    :param records: list of span dicts, defaults to spans()
+    :return: list of dicts sorted in descending order of the total time
+    """
+    totals = {}
+    for record in spans() if records is None else records:
+        total = totals.setdefault(record["name"], {"name": record["name"], "calls": 0, "totalSeconds": 0.0})
+        total["calls"] += 1
+        total["totalSeconds"] += record["durationUs"] / 1e6
+        if "memoryPeakBytes" in record:
+            total["memoryPeakBytes"] = max(total.get("memoryPeakBytes", 0), record["memoryPeakBytes"])
+    return sorted(totals.values(), key=lambda total: total["totalSeconds"], reverse=True)
+
+
+def exportJson(path: str, records: list = None):
+    """
+    Write the spans and their summary as JSON
+    :param path: str: path of the JSON file
+    :param records: list of span dicts, defaults to spans()
+    """
+    records = spans() if records is None else records
+    with open(path, "w") as f:
+        json.dump({"spans": records, "summary": summary(records)}, f, indent=1)
+
+
+def exportChromeTrace(path: str, records: list = None):
+    """
+    Write the spans in the Trace Event Format of Chrome (chrome://tracing, Perfetto, speedscope), which shows every
+    process and thread as flame chart over time
+    :param path: str: path of the JSON file
+    :param records: list of span dicts, defaults to spans()
+    """
+    records = spans() if records is None else records
+    events = []
+    for record in records:
+        args = dict(record.get("attributes", {}), id=record["id"], parent=record["parent"])
+        if "memoryPeakBytes" in record:
+            args["memoryPeakBytes"] = record["memoryPeakBytes"]
+        events.append({"name": record["name"], "ph": "X", "ts": record["startUs"], "dur": record["durationUs"],
+                       "pid": record["pid"], "tid": record["tid"], "args": args})
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def exportFoldedStacks(path: str, records: list = None):
+    """
+    Write the self time of the spans in microseconds as folded stacks ("csvLoad;extendStaticDF 1234" per line) for
+    flamegraph.pl or speedscope. Worker tasks appear below the span they were submitted from.
+    :param path: str: path of the text file
+    :param records: list of span dicts, defaults to spans()
+    """
+    records = spans() if records is None else records
+    paths = _stackPaths(records)
+    selfTimes = {record["id"]: record["durationUs"] for record in records}
+    for record in records:
+        if record["parent"] in selfTimes:
+            selfTimes[record["parent"]] -= record["durationUs"]
+    folded = {}
+    for record in records:
+        stack = ";".join(paths[record["id"]])
+        # children running in parallel workers may add up to more than their parent
+        folded[stack] = folded.get(stack, 0) + max(selfTimes[record["id"]], 0)
+    with open(path, "w") as f:
+        for stack, selfTime in folded.items():
+            f.write("{} {}\n".format(stack, int(round(selfTime))))
+
+
+def exportAll(outputPrefix: str):
+    """
+    Write the recorded spans in all formats: <outputPrefix>.json, <outputPrefix>.trace.json and <outputPrefix>.folded
+    :param outputPrefix: str: path of the output files without extension
+    """
+    outputDir = os.path.dirname(os.path.abspath(outputPrefix))
+    if not os.path.exists(outputDir):
+        os.makedirs(outputDir)
+    records = spans()
+    exportJson(outputPrefix + ".json", records)
+    exportChromeTrace(outputPrefix + ".trace.json", records)
+    exportFoldedStacks(outputPrefix + ".folded", records)
+
+
+@contextmanager
+def profileRun(outputPrefix: str, trackMemory: bool = False):
+    """
+    Profile a block and export its spans on exit, e.g. with profiling.profileRun("data/profiles/run"): ... writes
+    run.json, run.trace.json and run.folded
+    :param outputPrefix: str: path of the output files without extension
+    :param trackMemory: bool: record the memory peak of every span, see enable
+    """
+    enable(trackMemory=trackMemory)
+    try:
+        with span("run"):
+            yield
+    finally:
+        disable()
+        exportAll(outputPrefix)
@@ -14,9 +14,15 @@ Licence:     CC BY-SA 4.0
 import locale
 from cycler import cycler
 
-locale.setlocale(locale.LC_NUMERIC, 'english') # or 'english' or "german". Important for axes.formatter
-# format the dates according to german language:
-locale.setlocale(locale.LC_ALL, "english")
+def applyLocale(localeName: str = "english"):
+    """
+    Set the locale used by the axes formatter ('axes.formatter.use_locale') and for dates. Called explicitly by the
+    plotting scripts instead of at import time, as it changes the locale of the whole process.
+    :param localeName: str: e.g. "english" or "german"
+    """
+    locale.setlocale(locale.LC_NUMERIC, localeName) # or 'english' or "german". Important for axes.formatter
+    # format the dates according to german language:
+    locale.setlocale(locale.LC_ALL, localeName)
 
 # latex_base = fullpage width
 latex_base = {'figure.figsize'   : [7.48,3]    # 6.220,3.5# figure size in inches
@@ -0,0 +1,104 @@
+"""
+-------------------------------------------------------------------------------
+Name:        requestBatching
+Purpose:     Coalescing of concurrent asyncio requests into batches for vectorized evaluation functions
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _evaluateBatch(batchFunction, requests: list):
+    """
+    Evaluate a batch; if it fails, evaluate its requests one by one, so that one invalid request does not fail the
+    others of the batch
+    :return: list of results or exceptions, one per request
+    """
+    try:
+        return list(batchFunction(requests))
+    except Exception:
+        if len(requests) == 1:
+            raise
+    results = []
+    for request in requests:
+        try:
+            results.append(batchFunction([request])[0])
+        except Exception as exception:
+            results.append(exception)
+    return results
+
+
+class RequestBatcher:
+    """
+    Collects the requests submitted by concurrent coroutines and evaluates them together with one call of the batch
+    function, which maps a list of requests onto a list of results in the same order. A batch is started as soon as
+    maxBatchSize requests are pending or maxDelaySeconds after its first request; requests arriving while a batch is
+    evaluated form the next batch. The batch function runs in one worker thread, so the event loop keeps accepting
+    requests and the batch function is never called concurrently (e.g. for models with a shared buffer).
+    """
+
+    def __init__(self, batchFunction, maxBatchSize: int = 1024, maxDelaySeconds: float = 0.001):
+        """
+        :param batchFunction: callable list of requests -> list of results
+        :param maxBatchSize: int: maximum number of requests per batch
+        :param maxDelaySeconds: float: maximum time the first request of a batch waits for further requests
+        """
+        self.batchFunction = batchFunction
+        self.maxBatchSize = maxBatchSize
+        self.maxDelaySeconds = maxDelaySeconds
+        self._pending = []
+        self._flushHandle = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._tasks = set()
+
+    async def submit(self, request):
+        """
+        Submit one request and wait for its result
+        :param request: request as expected by the batch function
+        :return: result of the request, exceptions of the batch function are raised
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((request, future))
+        if len(self._pending) >= self.maxBatchSize:
+            self._flush()
+        elif self._flushHandle is None:
+            self._flushHandle = loop.call_later(self.maxDelaySeconds, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flushHandle is not None:
+            self._flushHandle.cancel()
+            self._flushHandle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._runBatch(batch))
+            # keep a reference until the task is done
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _runBatch(self, batch: list):
+        requests = [request for request, _ in batch]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self._executor, _evaluateBatch,
+                                                                       self.batchFunction, requests)
+        except Exception as exception:
+            results = [exception] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def close(self):
+        """Stop the worker thread after the running batch"""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,18 @@
+"""
+-------------------------------------------------------------------------------
+Name:        scenarioColumns
+Purpose:     Column names of planning scenarios and of their evaluated energy demands shared by the batch tools
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+# boundary parameters of boundaryParameters2scalingFactorMoistureLoad and the waste heat
+BOUNDARY_PARAMETERS = ["maxHumansInAirFlow", "maxHumansInRoom", "roomDewPointDegrees", "inletDewPointDegrees",
+                       "inletTemperatureDegrees", "leakagesSuctionVolumeFlowM3H", "maxWasteHeatRoomW"]
+# energy demands of a scenario in kWh
+OUTPUT_COLUMNS = ["electricEnergyKwh", "naturalGasEnergyKwh", "districtHeatingEnergyKwh", "finalEnergy"]
@@ -0,0 +1,106 @@
+"""
+-------------------------------------------------------------------------------
+Name:        stackedFeatures
+Purpose:     Copy-free stacking of estimator predictions as synthetic features in one preallocated array
+             (compact form of nested StackingEstimators behind a union of input copies)
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import numpy as np
+from sklearn.base import TransformerMixin, clone
+from sklearn.utils import check_array
+from sklearn.utils.metaestimators import _BaseComposition
+import helpers.profiling as profiling
+
+
+class StackedFeatures(_BaseComposition, TransformerMixin):
+    """
+    Transformer equivalent to make_pipeline(StackingEstimator(estimator0), StackingEstimator(estimator1), ...) for
+    regressors: the output has the layout [prediction of the last estimator, ..., prediction of the first one, X],
+    where every estimator is fitted on and predicts from the columns right of its own prediction. The inputs are
+    written once into a preallocated array and every estimator sees a view of it; its predictions of the training set
+    are written into its column right after fitting, instead of a new np.copy and np.hstack per stage.
+    With nCopies > 1 the inputs are stored nCopies times, as by a preceding make_union of nCopies copy transformers,
+    which gives the same numbers as the nested StackingEstimators. With nCopies = 1 the estimators see every input
+    only once: XGBoost splits on the first of identical columns and ends up with the same trees, but the decision trees
+    of AdaBoost draw their random feature order over fewer columns and may break ties between equally good splits
+    differently, so the predictions differ within the scatter of the model.
+    """
+
+    def __init__(self, estimators: list, nCopies: int = 1, chunkRows: int = 8192):
+        """
+        :param estimators: list of (name, regressor) tuples whose predictions are stacked, in the order of the
+                           StackingEstimators
+        :param nCopies: int: number of copies of the inputs
+        :param chunkRows: int: number of rows predicted at once, bounds the temporary arrays of the estimators e.g. the
+                          (n_samples, n_estimators) arrays of the weighted median of AdaBoostRegressor
+        """
+        self.estimators = estimators
+        self.nCopies = nCopies
+        self.chunkRows = chunkRows
+
+    def get_params(self, deep=True):
+        """Parameters including those of the named estimators (e.g. xgbregressor__max_depth), as for pipelines"""
+        return self._get_params("estimators", deep=deep)
+
+    def set_params(self, **params):
+        self._set_params("estimators", **params)
+        return self
+
+    def _stackedArray(self, X):
+        X = check_array(X)
+        nStacked = len(self.estimators)
+        stacked = np.empty((X.shape[0], nStacked + self.nCopies * X.shape[1]), dtype=np.float64)
+        for copy in range(self.nCopies):
+            stacked[:, nStacked + copy * X.shape[1]:nStacked + (copy + 1) * X.shape[1]] = X
+        return stacked
+
+    def _predictInto(self, estimator, stacked: np.ndarray, column: int):
+        """Write the predictions of the estimator from the columns right of column into column, chunk by chunk"""
+        with profiling.span("stackedFeaturesPredict", estimator=type(estimator).__name__, nRows=stacked.shape[0]):
+            for start in range(0, stacked.shape[0], self.chunkRows):
+                rows = slice(start, start + self.chunkRows)
+                stacked[rows, column] = estimator.predict(stacked[rows, column + 1:])
+
+    def fit_transform(self, X, y=None, **fit_params):
+        """
+        Fit the estimators one after another and return the stacked features of the training set
+        :param X: array-like of shape (n_samples, n_features): training inputs
+        :param y: array-like of shape (n_samples,): target values
+        :param fit_params: further parameters passed to the fit of every estimator
+        :return: np.ndarray of shape (n_samples, n_estimators + nCopies * n_features)
+        """
+        stacked = self._stackedArray(X)
+        self.estimators_ = []
+        for column in reversed(range(len(self.estimators))):
+            estimator = clone(self.estimators[len(self.estimators_)][1])
+            estimator.fit(stacked[:, column + 1:], y, **fit_params)
+            self._predictInto(estimator, stacked, column)
+            self.estimators_.append(estimator)
+        self.n_features_in_ = (stacked.shape[1] - len(self.estimators)) // self.nCopies
+        return stacked
+
+    def fit(self, X, y=None, **fit_params):
+        """
+        Fit the estimators one after another
+        :return: self
+        """
+        self.fit_transform(X, y, **fit_params)
+        return self
+
+    def transform(self, X):
+        """
+        Stack the predictions of the fitted estimators as synthetic features
+        :param X: array-like of shape (n_samples, n_features)
+        :return: np.ndarray of shape (n_samples, n_estimators + nCopies * n_features)
+        """
+        stacked = self._stackedArray(X)
+        for estimator, column in zip(self.estimators_, reversed(range(len(self.estimators_)))):
+            self._predictInto(estimator, stacked, column)
+        return stacked
@@ -26,6 +26,7 @@ License along with TPOT. If not, see <http://www.gnu.org/licenses/>.
 import numpy as np
 from sklearn.base import BaseEstimator, TransformerMixin, is_classifier
 from sklearn.utils import check_array
+import helpers.profiling as profiling
 
 
 class StackingEstimator(BaseEstimator, TransformerMixin):
@@ -80,15 +81,16 @@ class StackingEstimator(BaseEstimator, TransformerMixin):
         X_transformed: array-like, shape (n_samples, n_features + 1) or (n_samples, n_features + 1 + n_classes) for classifier with predict_proba attribute
             The transformed feature set.
         """
-        X = check_array(X)
-        X_transformed = np.copy(X)
-        # add class probabilities as a synthetic feature
-        if is_classifier(self.estimator) and hasattr(self.estimator, 'predict_proba'):
-            y_pred_proba = self.estimator.predict_proba(X)
-            # check all values that should be not infinity or not NAN
-            if np.all(np.isfinite(y_pred_proba)):
-                X_transformed = np.hstack((y_pred_proba, X))
-
-        # add class prediction as a synthetic feature
-        X_transformed = np.hstack((np.reshape(self.estimator.predict(X), (-1, 1)), X_transformed))
+        with profiling.span("stackingEstimatorTransform", estimator=type(self.estimator).__name__, nRows=len(X)):
+            X = check_array(X)
+            X_transformed = np.copy(X)
+            # add class probabilities as a synthetic feature
+            if is_classifier(self.estimator) and hasattr(self.estimator, 'predict_proba'):
+                y_pred_proba = self.estimator.predict_proba(X)
+                # check all values that should be not infinity or not NAN
+                if np.all(np.isfinite(y_pred_proba)):
+                    X_transformed = np.hstack((y_pred_proba, X))
+
+            # add class prediction as a synthetic feature (one per target of multi-output estimators)
+            X_transformed = np.hstack((np.reshape(self.estimator.predict(X), (len(X), -1)), X_transformed))
         return X_transformed
@@ -0,0 +1,241 @@
+"""
+-------------------------------------------------------------------------------
+Name:        staticResultIndex
+Purpose:     Preprocessed and persistently cached index of the static result data set
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import io
+import os
+import hashlib
+import tempfile
+import numpy as np
+import pandas as pd
+import helpers.helperFuncs as helperFuncs
+import helpers.profiling as profiling
+from helpers.interpolationGrids import StaticResultGrids
+from helpers.climateInterpolation import ClimateInterpolator
+
+# increase whenever the content of the cache file changes
+CACHE_FORMAT_VERSION = 2
+
+
+class StaticResultIndex:
+    """
+    Extended static result DataFrame together with its per-location/per-LoadScalingFactor sorted grids and the
+    column dtype map and the triangulation of the location climates. Built once from the CSV and afterwards reloaded
+    from a binary cache without parsing.
+    """
+
+    def __init__(self, dfStaticResults: pd.DataFrame, grids: StaticResultGrids, dtypes: dict, sourceHash: str,
+                 climateInterpolator: ClimateInterpolator = None):
+        """
+        :param dfStaticResults: pd.DataFrame: static result data set extended by helperFuncs.extendStaticDF
+        :param grids: StaticResultGrids: sorted grids for batch interpolation
+        :param dtypes: dict: column name -> dtype string of dfStaticResults
+        :param sourceHash: str: sha256 content hash of the CSV file the index was built from
+        :param climateInterpolator: ClimateInterpolator: interpolation for arbitrary climates, None if the locations
+                                    cannot be triangulated
+        """
+        self.dfStaticResults = dfStaticResults
+        self.grids = grids
+        self.dtypes = dtypes
+        self.sourceHash = sourceHash
+        self.climateInterpolator = climateInterpolator
+
+    @classmethod
+    def fromDataFrame(cls, dfStaticResults: pd.DataFrame, sourceHash: str = ""):
+        """
+        Build the index from a (not yet extended) static result DataFrame
+        :param dfStaticResults: pd.DataFrame: static result data set as read from the CSV
+        :param sourceHash: str: content hash of the source file
+        :return: StaticResultIndex
+        """
+        dfStaticResults = helperFuncs.extendStaticDF(dfStaticResults)
+        dtypes = {col: str(dtype) for col, dtype in dfStaticResults.dtypes.items()}
+        grids = StaticResultGrids.fromDataFrame(dfStaticResults)
+        return cls(dfStaticResults, grids, dtypes, sourceHash, _buildClimateInterpolator(grids))
+
+    def append(self, dfNewResults: pd.DataFrame, sourceHash: str = ""):
+        """
+        Index of the data set extended by new result rows (e.g. a new simulation campaign with new locations or
+        variants). Only the new rows are extended by helperFuncs.extendStaticDF and only the grids of the locations
+        they belong to are rebuilt; the result is the same as fromDataFrame of the whole data set.
+        :param dfNewResults: pd.DataFrame: new rows with the columns of the CSV file and index labels not contained yet
+        :param sourceHash: str: content hash of the extended source file
+        :return: StaticResultIndex
+        """
+        overlap = dfNewResults.index.intersection(self.dfStaticResults.index)
+        if len(overlap):
+            raise ValueError("Index labels already contained in the static result data set: {}".format(
+                list(overlap[:10])))
+        dfNewResults = helperFuncs.extendStaticDF(dfNewResults.copy())
+        missingColumns = set(self.dfStaticResults.columns).symmetric_difference(dfNewResults.columns)
+        if missingColumns:
+            raise ValueError("New results do not match the columns of the data set: {}".format(sorted(missingColumns)))
+        dfNewResults = dfNewResults[self.dfStaticResults.columns].astype(self.dtypes)
+        dfStaticResults = pd.concat([self.dfStaticResults, dfNewResults])
+
+        # all rows of the affected locations in their original order, positions refer to the extended data set
+        rowPositions = np.flatnonzero(dfStaticResults["location"].isin(dfNewResults["location"].unique()).to_numpy())
+        locationGrids = StaticResultGrids.fromDataFrame(dfStaticResults.iloc[rowPositions])
+        locationGrids.rowPositions = rowPositions[locationGrids.rowPositions]
+        grids = self.grids.replaceLocations(locationGrids)
+        return StaticResultIndex(dfStaticResults, grids, self.dtypes, sourceHash, _buildClimateInterpolator(grids))
+
+    def save(self, cachePath: str):
+        """
+        Save the index as uncompressed .npz file (written atomically, no pickled objects)
+        :param cachePath: str: path of the cache file
+        """
+        arrays = {"grid_" + key: value for key, value in self.grids.toArrays().items()}
+        if self.climateInterpolator is not None:
+            arrays.update({"climate_" + key: value for key, value in self.climateInterpolator.toArrays().items()})
+        arrays["formatVersion"] = np.asarray(CACHE_FORMAT_VERSION)
+        arrays["sourceHash"] = np.asarray(self.sourceHash)
+        arrays["dtypeColumns"] = np.asarray(list(self.dtypes), dtype=str)
+        arrays["dtypeValues"] = np.asarray(list(self.dtypes.values()), dtype=str)
+        arrays["index"] = self.dfStaticResults.index.to_numpy()
+        arrays["indexName"] = np.asarray("" if self.dfStaticResults.index.name is None
+                                         else self.dfStaticResults.index.name)
+        cacheDir = os.path.dirname(os.path.abspath(cachePath))
+        if not os.path.exists(cacheDir):
+            os.makedirs(cacheDir)
+        fd, tmpPath = tempfile.mkstemp(dir=cacheDir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmpPath, cachePath)
+        except BaseException:
+            os.remove(tmpPath)
+            raise
+
+    @classmethod
+    def load(cls, cachePath: str):
+        """
+        Load an index saved by save
+        :param cachePath: str: path of the cache file
+        :return: StaticResultIndex
+        """
+        with np.load(cachePath, allow_pickle=False) as npz:
+            if int(npz["formatVersion"]) != CACHE_FORMAT_VERSION:
+                raise ValueError("Cache file {} has an outdated format".format(cachePath))
+            arrays = {key: npz[key] for key in npz.files}
+        grids = StaticResultGrids.fromArrays({key[len("grid_"):]: value for key, value in arrays.items()
+                                              if key.startswith("grid_")})
+        climateArrays = {key[len("climate_"):]: value for key, value in arrays.items() if key.startswith("climate_")}
+        climateInterpolator = ClimateInterpolator.fromArrays(grids, climateArrays) if climateArrays else None
+        dtypes = dict(zip(arrays["dtypeColumns"].tolist(), arrays["dtypeValues"].tolist()))
+        # restore the original row order from the sorted grid rows
+        numericValues = np.empty_like(grids.values)
+        numericValues[grids.rowPositions] = grids.values
+        objectValues = np.empty_like(grids.objectValues)
+        objectValues[grids.rowPositions] = grids.objectValues
+        index = pd.Index(arrays["index"], name=str(arrays["indexName"]) or None)
+        dfStaticResults = pd.concat([pd.DataFrame(numericValues, columns=grids.numericColumns, index=index),
+                                     pd.DataFrame(objectValues, columns=grids.objectColumns, index=index)], axis=1)
+        dfStaticResults = dfStaticResults[grids.columns].astype(dtypes)
+        return cls(dfStaticResults, grids, dtypes, str(arrays["sourceHash"]), climateInterpolator)
+
+
+def _buildClimateInterpolator(grids: StaticResultGrids):
+    try:
+        return ClimateInterpolator.fromGrids(grids)
+    except ValueError:
+        return None  # less than three locations or all climates on one line
+
+
+def fileContentHash(filePath: str, blockSize: int = 1 << 20):
+    """
+    Compute the sha256 hash of the content of a file
+    :param filePath: str: path of the file
+    :param blockSize: int: number of bytes read at once
+    :return: str: hex digest
+    """
+    sha256 = hashlib.sha256()
+    with open(filePath, "rb") as f:
+        for block in iter(lambda: f.read(blockSize), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def _cachePath(staticResultPath: str, cacheDir: str = None):
+    if cacheDir is None:
+        cacheDir = os.path.join(os.path.dirname(os.path.abspath(staticResultPath)), "cache")
+    baseName = os.path.splitext(os.path.basename(staticResultPath))[0]
+    return os.path.join(cacheDir, "{}.index.npz".format(baseName))
+
+
+def loadStaticResultIndex(staticResultPath: str, cacheDir: str = None, useCache: bool = True):
+    """
+    Load the static result data set as StaticResultIndex. The preprocessed index is cached next to the data set and
+    rebuilt automatically whenever the content hash of the CSV file changes.
+    :param staticResultPath: str: path of automateSimulationStaticResults.csv
+    :param cacheDir: str: directory of the cache files, defaults to a "cache" folder next to the CSV file
+    :param useCache: bool: read and write the cache, otherwise always parse the CSV file
+    :return: StaticResultIndex
+    """
+    sourceHash = fileContentHash(staticResultPath)
+    cachePath = _cachePath(staticResultPath, cacheDir)
+    if useCache and os.path.exists(cachePath):
+        try:
+            with profiling.span("staticResultIndexCacheLoad"):
+                index = StaticResultIndex.load(cachePath)
+            if index.sourceHash == sourceHash:
+                return index
+        except (OSError, ValueError, KeyError):
+            pass  # unreadable or outdated cache => rebuild
+    with profiling.span("csvLoad", path=os.path.basename(staticResultPath)):
+        dfStaticResults = pd.read_csv(staticResultPath, index_col=0)
+    index = StaticResultIndex.fromDataFrame(dfStaticResults, sourceHash=sourceHash)
+    if useCache:
+        index.save(cachePath)
+    return index
+
+
+def appendStaticResults(staticResultPath: str, dfNewResults: pd.DataFrame, cacheDir: str = None,
+                        renumber: bool = True):
+    """
+    Append new result rows (e.g. of a new simulation campaign) to the static result CSV file and update the cached
+    index incrementally instead of parsing and extending the whole file again, see StaticResultIndex.append
+    :param staticResultPath: str: path of automateSimulationStaticResults.csv
+    :param dfNewResults: pd.DataFrame: new rows with the columns of the CSV file
+    :param cacheDir: str: directory of the cache files, defaults to a "cache" folder next to the CSV file
+    :param renumber: bool: number the new rows on from the last index label of the data set, otherwise their index
+                     labels are kept and must not be contained yet
+    :return: StaticResultIndex of the extended data set
+    """
+    index = loadStaticResultIndex(staticResultPath, cacheDir)
+    csvColumns = list(pd.read_csv(staticResultPath, index_col=0, nrows=0).columns)
+    missingColumns = set(csvColumns).symmetric_difference(dfNewResults.columns)
+    if missingColumns:
+        raise ValueError("New results do not match the columns of {}: {}".format(staticResultPath,
+                                                                               sorted(missingColumns)))
+    dfNewResults = dfNewResults[csvColumns]
+    if renumber:
+        start = int(index.dfStaticResults.index.max()) + 1 if len(index.dfStaticResults) else 0
+        dfNewResults = dfNewResults.set_axis(pd.RangeIndex(start, start + len(dfNewResults),
+                                                           name=index.dfStaticResults.index.name))
+    csvRows = dfNewResults.to_csv(header=False, lineterminator="\n")
+    # parsed back like the whole file would be (the default float parser of read_csv is not exactly round-trip), so
+    # that the index equals a rebuild from the file; validated before the CSV file is touched
+    dfParsed = pd.read_csv(io.StringIO(dfNewResults.iloc[:0].to_csv(lineterminator="\n") + csvRows), index_col=0)
+    extendedIndex = index.append(dfParsed.rename_axis(index.dfStaticResults.index.name))
+
+    with open(staticResultPath, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        lastByte = f.read(1)
+    with open(staticResultPath, "a", newline="") as f:
+        if lastByte != b"\n":
+            f.write("\n")
+        f.write(csvRows)
+    # if the process stops before the cache is saved, the hash of the cache does not match and it is rebuilt once
+    extendedIndex.sourceHash = fileContentHash(staticResultPath)
+    extendedIndex.save(_cachePath(staticResultPath, cacheDir))
+    return extendedIndex
@@ -0,0 +1,191 @@
+"""
+-------------------------------------------------------------------------------
+Name:        syntheticData
+Purpose:     Generation of synthetic static and dynamic result data sets of scalable size with the real schemas
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import os
+import string
+import numpy as np
+import pandas as pd
+from helpers.dynamicAggregation import ENERGY_DATAPOINTS
+
+# boundary parameters of a simulation case, constant over the year in the dynamic data set
+CONSTANT_DATAPOINTS = ["ScalingFactorS", "LoadScalingFactor", "volumeFlowMainVentilatorM3H",
+                       "volumeFlowRegenerationVentilatorM3H", "DryRoomHeatLoad", "DryRoomMoistureLoad", "Preheating"]
+# climate of a location, averaged over the year in the static data set, and its seasonal amplitude
+CLIMATE_AMPLITUDES = {"OutsideRelativeHumidity": -0.1, "OutsideTemperatureDegrees": 10.0}
+# time step spacing and number of time steps of the dynamic data set (01.01. 00:00:00 h to 31.12. 24:00:00 h)
+TIMESTEP_SECONDS = 3603.6
+N_TIMESTEPS = 8761
+DYNAMIC_INDEX_NAME = "timestep (s)"
+# kinds of the temporal course of the data points in the dynamic data set
+KIND_ENERGY, KIND_CONSTANT, KIND_CLIMATE, KIND_COMPONENT, KIND_TEMPERATURE = range(5)
+
+
+def _datapointKind(datapoint: str):
+    """Kind of the temporal course of a data point in the dynamic data set"""
+    if datapoint in ENERGY_DATAPOINTS:
+        return KIND_ENERGY
+    if datapoint in CONSTANT_DATAPOINTS:
+        return KIND_CONSTANT
+    if datapoint in CLIMATE_AMPLITUDES:
+        return KIND_CLIMATE
+    if "Temperature" in datapoint:
+        return KIND_TEMPERATURE
+    return KIND_COMPONENT
+
+
+def _locationCodes(nLocations: int, reservedCodes: set):
+    """Two letter location codes (as expected by helperFuncs.extendStaticDF) not used by the real data set"""
+    letters = string.ascii_uppercase + string.ascii_lowercase
+    codes = [a + b for a in letters for b in letters if a + b not in reservedCodes]
+    if nLocations > len(codes):
+        raise ValueError("At most {} synthetic locations are available, got {}".format(len(codes), nLocations))
+    return codes[:nLocations]
+
+
+def generateStaticResults(dfTemplate: pd.DataFrame, scale: float = 1, seed: int = 0):
+    """
+    Synthetic static result data set with about scale times the rows of the template. Every synthetic location is
+    derived from a real location of the template: its climate is shifted randomly, its energy demands and component
+    values are scaled with the shift of the temperature and perturbed, and the grid of ScalingFactorS is refined
+    (linear interpolation between the simulated values) once the two letter location codes are used up.
+    :param dfTemplate: pd.DataFrame: static result data set as read from automateSimulationStaticResults.csv
+    :param scale: float: size relative to the template e.g. 1, 10, 100 or 1000
+    :param seed: int: seed of the random generator
+    :return: pd.DataFrame with the columns and dtypes of the template
+    """
+    rng = np.random.default_rng(seed)
+    dfTemplate = dfTemplate.reset_index(drop=True)
+    templateLocations = dfTemplate["locationVariant"].str[:2]
+    realLocations = list(dict.fromkeys(templateLocations))
+    nRowsTarget = max(1, int(round(len(dfTemplate) * scale)))
+    nLocations = max(1, int(round(len(realLocations) * scale)))
+    nLocations = min(nLocations, len(string.ascii_letters) ** 2 - len(realLocations))
+    # refinement of the ScalingFactorS grid for the rows that do not fit into distinct locations
+    gridSizes = dfTemplate[templateLocations == realLocations[0]].groupby("LoadScalingFactor").size().to_numpy()
+    refinement = 1
+    while nLocations * ((gridSizes - 1) * refinement + 1).sum() < nRowsTarget:
+        refinement += 1
+    codes = _locationCodes(nLocations, set(realLocations))
+    numericColumns = [col for col in dfTemplate.columns if col != "locationVariant"]
+    scaledColumns = [col for col in numericColumns if _datapointKind(col) in (KIND_ENERGY, KIND_COMPONENT)]
+
+    frames = []
+    for i, code in enumerate(codes):
+        dfLocation = dfTemplate[templateLocations == realLocations[i % len(realLocations)]]
+        if refinement > 1:
+            dfLocation = _refineScalingFactorGrid(dfLocation, numericColumns, refinement)
+        dfLocation = dfLocation.copy()
+        temperatureShift = rng.normal(0, 3)
+        dfLocation["OutsideTemperatureDegrees"] += temperatureShift
+        dfLocation["OutsideRelativeHumidity"] = np.clip(dfLocation["OutsideRelativeHumidity"]
+                                                        + rng.normal(0, 0.05), 0.05, 0.98)
+        # warmer and more humid locations need more cooling and dehumidification
+        locationFactor = np.exp(rng.normal(0.02 * temperatureShift, 0.05))
+        noise = np.exp(rng.normal(0, 0.01, size=(len(dfLocation), len(scaledColumns))))
+        dfLocation[scaledColumns] = dfLocation[scaledColumns].to_numpy() * locationFactor * noise
+        dfLocation["locationVariant"] = ["{}-{}".format(code, variant + 1) for variant in range(len(dfLocation))]
+        frames.append(dfLocation)
+    dfSynthetic = pd.concat(frames, ignore_index=True).iloc[:nRowsTarget]
+    return dfSynthetic.astype(dfTemplate.dtypes.to_dict())
+
+
+def _refineScalingFactorGrid(dfLocation: pd.DataFrame, numericColumns: list, refinement: int):
+    """Insert refinement - 1 linearly interpolated ScalingFactorS values between the simulated ones per load group"""
+    frames = []
+    for _, groupDF in dfLocation.groupby("LoadScalingFactor", sort=False):
+        groupDF = groupDF.sort_values("ScalingFactorS")
+        gridS = groupDF["ScalingFactorS"].to_numpy()
+        refinedS = np.interp(np.linspace(0, len(gridS) - 1, (len(gridS) - 1) * refinement + 1),
+                             np.arange(len(gridS)), gridS)
+        frames.append(pd.DataFrame({col: np.interp(refinedS, gridS, groupDF[col].to_numpy())
+                                    for col in numericColumns}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def writeStaticResults(dfStaticResults: pd.DataFrame, csvPath: str):
+    """
+    Write a (synthetic) static result data set in the format of automateSimulationStaticResults.csv
+    :param dfStaticResults: pd.DataFrame: static result data set
+    :param csvPath: str: path of the CSV file
+    """
+    if os.path.dirname(csvPath) and not os.path.exists(os.path.dirname(csvPath)):
+        os.makedirs(os.path.dirname(csvPath))
+    dfStaticResults.reset_index(drop=True).to_csv(csvPath)
+
+
+def _yearProfiles(nTimesteps: int):
+    """Hourly profiles of the year: production pattern (five-day week) and seasonal cooling load in [-1, 1]"""
+    hours = np.arange(nTimesteps - 1) * (8760 / (nTimesteps - 1))
+    weekday = (hours // 24).astype(np.int64) % 7
+    hourOfDay = hours % 24
+    production = np.where((weekday < 5) & (hourOfDay >= 6) & (hourOfDay < 22), 1.0, 0.6)
+    seasonal = -np.cos(2 * np.pi * (hours - 24 * 15) / 8760)
+    return production, seasonal
+
+
+def generateDynamicResults(dfStaticResults: pd.DataFrame, csvPath: str, nTimesteps: int = N_TIMESTEPS,
+                           chunkRows: int = 512, seed: int = 0):
+    """
+    Write a synthetic dynamic result data set matching the given static data set (one column per locationVariant and
+    data point of the static data set, see automateSimulationDynamicResults.csv). The cumulative energy data points end
+    at the annual demands of the static data set, component values follow the production and seasonal profile with
+    the static value as maximum and the climate oscillates around the averaged static values. Only chunkRows rows are
+    held in memory at once.
+    :param dfStaticResults: pd.DataFrame: (synthetic) static result data set, not extended
+    :param csvPath: str: path of the CSV file
+    :param nTimesteps: int: number of time steps
+    :param chunkRows: int: number of rows written at once
+    :param seed: int: seed of the random generator
+    """
+    rng = np.random.default_rng(seed)
+    datapoints = [col for col in dfStaticResults.columns if col not in ("locationVariant", "location", "finalEnergy",
+                                                                        "OutsideDewPointTemperatureDegrees")]
+    staticValues = dfStaticResults[datapoints].to_numpy(dtype=np.float64)
+    nVariants = len(dfStaticResults)
+    columnNames = ["{}-{}".format(locationVariant, datapoint) for locationVariant in dfStaticResults["locationVariant"]
+                   for datapoint in datapoints]
+    # per column: static value and kind of the temporal course
+    baseValues = staticValues.ravel()
+    kinds = np.tile([_datapointKind(datapoint) for datapoint in datapoints], nVariants)
+    amplitudes = np.tile([CLIMATE_AMPLITUDES.get(datapoint, 0.0) for datapoint in datapoints], nVariants)
+    seasonalWeights = np.repeat(rng.uniform(0.1, 0.4, nVariants), len(datapoints))
+    energy, constant, climate = kinds == KIND_ENERGY, kinds == KIND_CONSTANT, kinds == KIND_CLIMATE
+    component, temperature = kinds == KIND_COMPONENT, kinds == KIND_TEMPERATURE
+
+    production, seasonal = _yearProfiles(nTimesteps)
+    # cumulative energy of a column: base * (P(t) + w * S(t)) / (P(end) + w * S(end)) with the cumulated profiles
+    cumulativeProduction = np.concatenate([[0], np.cumsum(production)])
+    cumulativeSeasonalProduction = np.concatenate([[0], np.cumsum(production * seasonal)])
+    energyNorm = cumulativeProduction[-1] + seasonalWeights * cumulativeSeasonalProduction[-1]
+    intervalProduction = np.concatenate([production, production[-1:]])
+    intervalSeasonal = np.concatenate([seasonal, seasonal[-1:]])
+
+    if os.path.dirname(csvPath) and not os.path.exists(os.path.dirname(csvPath)):
+        os.makedirs(os.path.dirname(csvPath))
+    with open(csvPath, "w", newline="") as f:
+        for start in range(0, nTimesteps, chunkRows):
+            rows = np.arange(start, min(start + chunkRows, nTimesteps))
+            values = np.empty((len(rows), len(baseValues)))
+            values[:, energy] = baseValues[energy] * (
+                cumulativeProduction[rows, None] + seasonalWeights[energy] * cumulativeSeasonalProduction[rows, None]
+            ) / energyNorm[energy]
+            values[:, constant] = baseValues[constant]
+            values[:, climate] = baseValues[climate] + amplitudes[climate] * intervalSeasonal[rows, None]
+            # relative load in [0, 1] reaching 1 at production in summer, the static values are the maxima
+            load = np.clip(intervalProduction[rows, None] * (1 + seasonalWeights * intervalSeasonal[rows, None])
+                           / (1 + seasonalWeights) + rng.normal(0, 0.02, size=values.shape), 0, 1)
+            values[:, component] = baseValues[component] * load[:, component]
+            values[:, temperature] = baseValues[temperature] - 5 * (1 - load[:, temperature])
+            dfChunk = pd.DataFrame(values, index=pd.Index(rows * TIMESTEP_SECONDS, name=DYNAMIC_INDEX_NAME),
+                                   columns=columnNames)
+            dfChunk.to_csv(f, header=start == 0, float_format="%.7g")
@@ -17,44 +17,87 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import helpers.helperFuncs as helperFuncs
+from helpers.staticResultIndex import loadStaticResultIndex
+from helpers.dynamicResultStore import DynamicResultStore, convertDynamicResults
+from helpers.figureRendering import FigureSpec, renderFigures
+
+
+def energyDemandBoxplot(groupDF: pd.DataFrame, loadScalingFactor: float):
+    """
+    Boxplot of the electric energy demand per location for one LoadScalingFactor
+    :param groupDF: pd.DataFrame: static results of one LoadScalingFactor ordered from cool to warm regions
+    :param loadScalingFactor: float: LoadScalingFactor of the group shown in the title
+    :return: matplotlib figure
+    """
+    fig = plt.figure()
+    sns.boxplot(x="location", y="electricEnergyKwh", data=groupDF, palette="coolwarm") #y="electricEnergyKwh" or "finalEnergy"
+    fig.suptitle(r"LoadScalingFactor: {}".format(loadScalingFactor))
+    plt.xlabel(r'Location')
+    plt.ylabel(r'Electric energy demand [$kWh$]') #r'Electric energy demand [$kWh$]' or r'Final energy demand [$kWh$]'
+    plt.tight_layout()
+    return fig
+
 
 if __name__ == "__main__":
     ########### input declarations ############
     createPublicationPlots = True
     savePlots = True
     withDynamic = False
+    # render and save the boxplots headless in a process pool (savePlots) instead of showing them, unchanged figures of
+    # the last run are skipped
+    renderInBatch = False
+    # locale of the axes formatter of the publication plots e.g. "english" or "german" (decimal comma)
+    plotLocale = "english"
     current_dir = os.path.dirname(os.path.realpath(__file__))
     staticResultPath = os.path.join(current_dir, "data", "automateSimulationStaticResults.csv")
     dynamicResultPath = os.path.join(current_dir, "data", "automateSimulationDynamicResults.csv")
-    dfStaticResults = pd.read_csv(staticResultPath, index_col=0)
+    # columnar store created once from the dynamic CSV file, afterwards opened via memory mapping
+    dynamicStoreDir = os.path.join(current_dir, "data", "dynamicStore")
+    dfStaticResults = loadStaticResultIndex(staticResultPath).dfStaticResults
     # Todo: 1) First download automateSimulationDynamicResults.csv from Mendeley data and insert into the data folder
     #  2) Adapt the list below for other values to be plotted over time from this data set
     columnList2PlotDynamic = ["JK-1-electricEnergyKwh", "JK-7-naturalGasEnergyKwh"]
     nrowsDynamicDataSet = 10000
+    imageDir = os.path.join(current_dir, "images")
     ########### boxplot generation ############
+    rcParams = {}
+    localeName = None
     if createPublicationPlots:
         import helpers.rc_parameters_matplotlib as rc_params
-        plt.rcParams.update(rc_params.latex_largeColumn)
+        localeName = plotLocale
+        rc_params.applyLocale(localeName)
+        rcParams = rc_params.latex_largeColumn
+        plt.rcParams.update(rcParams)
 
-    dfStaticResults = helperFuncs.extendStaticDF(dfStaticResults)
     # get DataFrames per group of LoadScalingFactor
     dfStaticResultsGrouped = dfStaticResults.groupby(by="LoadScalingFactor")
 
-    figDict = {}
+    figureSpecs = []
     for name, groupDF in dfStaticResultsGrouped:
         # order data set from cool to warm regions
-        groupDF.sort_values(by=['OutsideDewPointTemperatureDegrees'], inplace=True, ascending=True) # "OutsideDewPointTemperatureDegrees" or "OutsideTemperatureDegrees"
-        fig = plt.figure()
-        sns.boxplot(x="location", y="electricEnergyKwh", data=groupDF, palette="coolwarm") #y="electricEnergyKwh" or "finalEnergy"
-        fig.suptitle(r"LoadScalingFactor: {}".format(name))
-        plt.xlabel(r'Location')
-        plt.ylabel(r'Electric energy demand [$kWh$]') #r'Electric energy demand [$kWh$]' or r'Final energy demand [$kWh$]'
-        plt.tight_layout()
-        figDict[name] = fig
+        groupDF = groupDF.sort_values(by=['OutsideDewPointTemperatureDegrees'], ascending=True) # "OutsideDewPointTemperatureDegrees" or "OutsideTemperatureDegrees"
+        nameWithoutPoint = str(name).replace(".", ",")
+        figureSpecs.append(FigureSpec(fileName="LoadScaling{}EnergyDemandLocations".format(nameWithoutPoint),
+                                      plotFunction=energyDemandBoxplot,
+                                      data=groupDF[["location", "electricEnergyKwh"]],
+                                      plotKwargs={"loadScalingFactor": name}, rcParams=rcParams,
+                                      localeName=localeName))
+
+    figDict = {}
+    if renderInBatch and savePlots:
+        renderedFigures, skippedFigures = renderFigures(figureSpecs, savedir=imageDir)
+        print("Rendered {} figures, {} unchanged figures skipped".format(len(renderedFigures), len(skippedFigures)))
+    else:
+        for spec in figureSpecs:
+            figDict[spec.fileName] = spec.plotFunction(spec.data, **spec.plotKwargs)
 
     ########### plotting of temporal results ############
     if withDynamic:
-        dfDynamicResults = pd.read_csv(dynamicResultPath, index_col=0, nrows=nrowsDynamicDataSet)
+        if DynamicResultStore.exists(dynamicStoreDir):
+            dynamicStore = DynamicResultStore(dynamicStoreDir)
+        else:
+            dynamicStore = convertDynamicResults(dynamicResultPath, dynamicStoreDir)
+        dfDynamicResults = dynamicStore.toDataFrame(columnList2PlotDynamic, rows=slice(0, nrowsDynamicDataSet))
         fig2, ax2 = plt.subplots()
         sns.lineplot(data=dfDynamicResults[columnList2PlotDynamic], ax=ax2)
         plt.tight_layout()
@@ -62,8 +105,5 @@ if __name__ == "__main__":
     plt.show()
 
     if savePlots:
-        for name in figDict:
-            nameWithoutPoint = str(name).replace(".", ",")
-            helperFuncs.save_plot_to_file(file_name="LoadScaling{}EnergyDemandLocations".format(nameWithoutPoint),
-                                          fig=figDict[name],
-                                          savedir=os.path.join(os.path.dirname(os.path.realpath(__file__)), "images"))
\ No newline at end of file
+        for fileName in figDict:
+            helperFuncs.save_plot_to_file(file_name=fileName, fig=figDict[fileName], savedir=imageDir)
\ No newline at end of file
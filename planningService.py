@@ -0,0 +1,248 @@
+"""
+-------------------------------------------------------------------------------
+Name:        planningService
+Purpose:     Long-running local HTTP service answering interpolation, surrogate prediction and relocation ranking
+             requests with the static data set and the fitted surrogate model kept in memory
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import os
+import json
+import math
+import asyncio
+import numpy as np
+import pandas as pd
+import energeticEvaluations as enEval
+import energeticEvaluationsMultiOutputRegression as enEvalMOR
+from helpers.staticResultIndex import StaticResultIndex, loadStaticResultIndex
+from helpers.modelRegistry import ModelRegistry
+from helpers.requestBatching import RequestBatcher
+
+# numeric fields of the requests of each endpoint
+INTERPOLATION_FIELDS = ["scalingFactorS", "maxWasteHeatRoomW", "maxMoistureLoad"]
+PREDICTION_FIELDS = ["averageOutsideRelativeHumidity", "averageOutsideTemperature", "scalingFactorS",
+                     "maxWasteHeatRoomW", "maxMoistureLoad"]
+RANKING_FIELDS = ["scalingFactorS", "maxWasteHeatRoomW", "maxMoistureLoad"]
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                500: "Internal Server Error"}
+MAX_BODY_BYTES = 1 << 20
+
+
+class RequestError(ValueError):
+    """Invalid request, answered with status 400"""
+
+
+def _jsonRecords(df: pd.DataFrame):
+    """Rows of a DataFrame as JSON compatible dictionaries (missing and infinite values as null)"""
+    columns = [str(column) for column in df.columns]
+    return [{column: (None if isinstance(value, float) and not math.isfinite(value) else value)
+             for column, value in zip(columns, row)}
+            for row in df.to_numpy(dtype=object).tolist()]
+
+
+def _numericFields(request: dict, fields: list):
+    values = {}
+    for field in fields:
+        if field not in request:
+            raise RequestError("Missing field {}".format(field))
+        try:
+            values[field] = float(request[field])
+        except (TypeError, ValueError):
+            raise RequestError("Field {} must be a number, got {!r}".format(field, request[field]))
+        if not math.isfinite(values[field]):
+            raise RequestError("Field {} must be a finite number, got {!r}".format(field, request[field]))
+    return values
+
+
+class PlanningService:
+    """
+    Planning service keeping the static result index and the compiled surrogate model in memory. Concurrent
+    requests of one endpoint are coalesced into one vectorized evaluation (see helpers/requestBatching.py).
+    Endpoints (JSON body with one query, JSON response):
+    POST /interpolate: consideredLocation, scalingFactorS, maxWasteHeatRoomW, maxMoistureLoad
+                       -> interpolated results of the static data set
+    POST /predict: averageOutsideRelativeHumidity in %, averageOutsideTemperature in °C, scalingFactorS,
+                   maxWasteHeatRoomW, maxMoistureLoad -> energy demands predicted by the surrogate model
+    POST /rank: scalingFactorS, maxWasteHeatRoomW, maxMoistureLoad, optional sortBy and top
+                -> relocation ranking of the locations of the static data set
+    GET /health -> number of locations and availability of the surrogate model
+    """
+
+    def __init__(self, staticResultIndex: StaticResultIndex, model=None, maxBatchSize: int = 1024,
+                 maxDelaySeconds: float = 0.001):
+        """
+        :param staticResultIndex: StaticResultIndex: loaded static result data set and its grids
+        :param model: fitted or compiled multi-output regression model, None disables /predict
+        :param maxBatchSize: int: maximum number of coalesced requests per evaluation
+        :param maxDelaySeconds: float: maximum time a request waits for further requests to coalesce with
+        """
+        self.grids = staticResultIndex.grids
+        self.rankingGrids = self.grids.selectColumns(enEval.RANKING_COLUMNS)
+        self.locations = set(self.grids.locations)
+        self.model = model
+        self.batchers = {path: RequestBatcher(batchFunction, maxBatchSize, maxDelaySeconds) for path, batchFunction in (
+            ("/interpolate", self._interpolateBatch), ("/predict", self._predictBatch), ("/rank", self._rankBatch))}
+
+    @classmethod
+    def fromFiles(cls, staticResultPath: str, modelRegistryDir: str = None, **kwargs):
+        """
+        Load the static result index (cached) and, if a model registry is given, the fitted surrogate model
+        :param staticResultPath: str: path of automateSimulationStaticResults.csv
+        :param modelRegistryDir: str: directory of the model registry, the model is fitted if it is not stored yet
+        :param kwargs: further arguments of PlanningService
+        """
+        staticResultIndex = loadStaticResultIndex(staticResultPath)
+        model = None
+        if modelRegistryDir is not None:
+            from helpers.compiledInference import CompiledMultiOutputRegression
+
+            fittedModel, _ = enEvalMOR.getFittedMultiOutputRegressionModel(staticResultIndex.dfStaticResults,
+                                                                           ModelRegistry(modelRegistryDir))
+            model = CompiledMultiOutputRegression(fittedModel)
+        return cls(staticResultIndex, model, **kwargs)
+
+    def _interpolateBatch(self, requests: list):
+        dfResults = self.grids.interpolate(np.asarray([request["consideredLocation"] for request in requests],
+                                                      dtype=object),
+                                           *([request[field] for request in requests] for field in INTERPOLATION_FIELDS))
+        return _jsonRecords(dfResults)
+
+    def _predictBatch(self, requests: list):
+        dfPredicted = enEvalMOR.predictMultiOutputRegression(
+            self.model, *([request[field] for request in requests] for field in PREDICTION_FIELDS))
+        return _jsonRecords(dfPredicted)
+
+    def _rankBatch(self, requests: list):
+        rankings = enEval.rankLocationsBatch(self.rankingGrids,
+                                             *([request[field] for request in requests] for field in RANKING_FIELDS),
+                                             sortBy=[request["sortBy"] for request in requests])
+        return [_jsonRecords(dfRanking.head(request["top"]).reset_index())
+                for request, dfRanking in zip(requests, rankings)]
+
+    def parseRequest(self, path: str, request):
+        """
+        Validate the JSON body of a request, so that invalid requests do not reach the batches
+        :return: dict: query with numeric fields converted to float
+        """
+        if not isinstance(request, dict):
+            raise RequestError("The request body must be a JSON object")
+        if path == "/interpolate":
+            query = _numericFields(request, INTERPOLATION_FIELDS)
+            query["consideredLocation"] = request.get("consideredLocation")
+            if query["consideredLocation"] not in self.locations:
+                raise RequestError("Unknown consideredLocation {!r}".format(query["consideredLocation"]))
+        elif path == "/predict":
+            if self.model is None:
+                raise RequestError("The service was started without surrogate model")
+            query = _numericFields(request, PREDICTION_FIELDS)
+        else:
+            query = _numericFields(request, RANKING_FIELDS)
+            query["sortBy"] = request.get("sortBy", "finalEnergy")
+            if query["sortBy"] not in enEval.RANKING_COLUMNS:
+                raise RequestError("sortBy must be one of {}".format(enEval.RANKING_COLUMNS))
+            query["top"] = request.get("top")
+            # bool is a subclass of int, but JSON true/false is no number of locations
+            if query["top"] is not None and not (isinstance(query["top"], int) and
+                                                 not isinstance(query["top"], bool) and query["top"] > 0):
+                raise RequestError("top must be a positive integer")
+        return query
+
+    async def handle(self, method: str, path: str, body: bytes):
+        """
+        Answer one request
+        :return: tuple of HTTP status and JSON compatible payload
+        """
+        if path == "/health":
+            return 200, {"status": "ok", "locations": len(self.locations), "surrogate": self.model is not None}
+        if path not in self.batchers:
+            return 404, {"error": "Unknown endpoint {}".format(path)}
+        if method != "POST":
+            return 405, {"error": "Use POST for {}".format(path)}
+        try:
+            query = self.parseRequest(path, json.loads(body or b"null"))
+            result = await self.batchers[path].submit(query)
+        except ValueError as exception:
+            # invalid JSON, invalid fields or values rejected by the evaluation
+            return 400, {"error": str(exception)}
+        except Exception as exception:
+            return 500, {"error": "{}: {}".format(type(exception).__name__, exception)}
+        if path == "/rank":
+            return 200, {"ranking": result}
+        return 200, result
+
+    async def _handleConnection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Minimal HTTP/1.1 with keep-alive: one JSON request after the other per connection"""
+        try:
+            while True:
+                requestLine = await reader.readline()
+                if not requestLine:
+                    break
+                try:
+                    method, target, version = requestLine.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Malformed request line"}, keepAlive=False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                contentLength = int(headers.get("content-length", 0) or 0)
+                if contentLength > MAX_BODY_BYTES:
+                    await self._respond(writer, 400, {"error": "Request body too large"}, keepAlive=False)
+                    break
+                body = await reader.readexactly(contentLength) if contentLength else b""
+                keepAlive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                status, payload = await self.handle(method, target.split("?")[0], body)
+                await self._respond(writer, status, payload, keepAlive)
+                if not keepAlive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload, keepAlive: bool):
+        # NaN and Infinity are not valid JSON
+        body = json.dumps(payload, allow_nan=False).encode()
+        writer.write("HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\nConnection: {}\r\n\r\n"
+                     .format(status, HTTP_REASONS[status], len(body), "keep-alive" if keepAlive else "close")
+                     .encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765):
+        """Serve requests until the task is cancelled"""
+        server = await asyncio.start_server(self._handleConnection, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for batcher in self.batchers.values():
+                batcher.close()
+
+
+if __name__ == "__main__":
+
+    ########### service parameters ############
+    host = "127.0.0.1"  # only reachable from this machine
+    port = 8765
+    withSurrogate = True  # load (or fit once) the multi-output regression model for /predict
+
+    current_dir = os.path.dirname(os.path.realpath(__file__))
+    staticResultPath = os.path.join(current_dir, "data", "automateSimulationStaticResults.csv")
+    modelRegistryDir = os.path.join(current_dir, "data", "cache", "models") if withSurrogate else None
+    service = PlanningService.fromFiles(staticResultPath, modelRegistryDir)
+    print("Planning service listening on http://{}:{}".format(host, port))
+    try:
+        asyncio.run(service.serve(host, port))
+    except KeyboardInterrupt:
+        pass
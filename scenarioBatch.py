@@ -0,0 +1,343 @@
+"""
+-------------------------------------------------------------------------------
+Name:        scenarioBatch
+Purpose:     Command-line evaluation of large scenario files (CSV or Parquet) streamed in chunks through the batch
+             interpolation or the surrogate model, restartable from the last completed chunk
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, wait
+import numpy as np
+import pandas as pd
+import energeticEvaluations as enEval
+import energeticEvaluationsMultiOutputRegression as enEvalMOR
+import helpers.helperFuncs as helperFuncs
+import helpers.profiling as profiling
+from helpers.staticResultIndex import loadStaticResultIndex
+from helpers.compactStaticResults import loadCompactStaticResults
+from helpers.modelRegistry import ModelRegistry
+from helpers.scenarioColumns import BOUNDARY_PARAMETERS, OUTPUT_COLUMNS
+
+# scenario columns: the scaling factor and moisture load directly or the boundary parameters they are computed from,
+# plus a location of the static data set (interpolation) or a climate (surrogate model)
+DIRECT_COLUMNS = ["scalingFactorS", "maxWasteHeatRoomW", "maxMoistureLoad"]
+LOCATION_COLUMN = "consideredLocation"
+CLIMATE_COLUMNS = ["averageOutsideRelativeHumidity", "averageOutsideTemperature"]
+METHODS = ("interpolation", "surrogate")
+MANIFEST_FILE = "manifest.json"
+
+# static result grids or compiled surrogate model of the worker processes, set once per worker by _initWorker
+_workerState = {}
+
+
+def scenarioMethod(columns: list, method: str = "auto"):
+    """
+    Check the columns of a scenario file and resolve the evaluation method
+    :param columns: list of str: columns of the scenario file
+    :param method: str: "interpolation", "surrogate" or "auto" (interpolation if a location column is given)
+    :return: str: "interpolation" or "surrogate"
+    """
+    if method not in METHODS + ("auto",):
+        raise ValueError("method must be one of {} or auto, got {}".format(METHODS, method))
+    if not (set(DIRECT_COLUMNS) <= set(columns) or set(BOUNDARY_PARAMETERS) <= set(columns)):
+        raise ValueError("Scenarios need the columns {} or {}".format(DIRECT_COLUMNS, BOUNDARY_PARAMETERS))
+    if method == "auto":
+        method = "interpolation" if LOCATION_COLUMN in columns else "surrogate"
+    if method == "interpolation" and LOCATION_COLUMN not in columns:
+        raise ValueError("Interpolation needs the column {}".format(LOCATION_COLUMN))
+    if method == "surrogate" and not set(CLIMATE_COLUMNS) <= set(columns):
+        raise ValueError("The surrogate model needs the columns {}".format(CLIMATE_COLUMNS))
+    return method
+
+
+def evaluateScenarios(dfScenarios: pd.DataFrame, method: str, grids=None, model=None):
+    """
+    Energy demands of a chunk of scenarios
+    :param dfScenarios: pd.DataFrame: scenarios, see scenarioMethod for the columns
+    :param method: str: "interpolation" or "surrogate"
+    :param grids: StaticResultGrids restricted to OUTPUT_COLUMNS (interpolation)
+    :param model: fitted or compiled multi-output regression model (surrogate)
+    :return: pd.DataFrame: scenarios with scalingFactorS, maxMoistureLoad and the energy demands in kWh appended
+    """
+    dfResults = dfScenarios.reset_index(drop=True)
+    if not set(DIRECT_COLUMNS) <= set(dfResults.columns):
+        dfResults["scalingFactorS"], dfResults["maxMoistureLoad"] = \
+            enEval.boundaryParameters2scalingFactorMoistureLoadBatch(
+                *(dfResults[parameter].to_numpy(dtype=np.float64) for parameter in BOUNDARY_PARAMETERS[:-1]))
+    loads = [dfResults[column].to_numpy(dtype=np.float64) for column in DIRECT_COLUMNS]
+    if method == "interpolation":
+        dfEnergy = grids.interpolate(dfResults[LOCATION_COLUMN].to_numpy(dtype=object), *loads)[OUTPUT_COLUMNS]
+    else:
+        dfEnergy = enEvalMOR.predictMultiOutputRegression(model, dfResults[CLIMATE_COLUMNS[0]].to_numpy(),
+                                                          dfResults[CLIMATE_COLUMNS[1]].to_numpy(), *loads)
+        dfEnergy["finalEnergy"] = dfEnergy.sum(axis=1)
+    for column in OUTPUT_COLUMNS:
+        dfResults[column] = dfEnergy[column].to_numpy()
+    return dfResults
+
+
+def readScenarioChunks(scenarioPath: str, chunkRows: int):
+    """
+    Stream a CSV or Parquet scenario file in chunks
+    :return: generator of pd.DataFrame with at most chunkRows rows
+    """
+    if scenarioPath.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(scenarioPath).iter_batches(batch_size=chunkRows):
+            yield batch.to_pandas()
+    else:
+        # only empty fields are missing, "NA" is a location code
+        yield from pd.read_csv(scenarioPath, chunksize=chunkRows, keep_default_na=False, na_values=[""],
+                               dtype={LOCATION_COLUMN: str})
+
+
+def countScenarios(scenarioPath: str):
+    """
+    Number of scenarios of a file without parsing it (rows of the Parquet metadata, lines of a CSV file). Blank lines
+    and line breaks within quoted fields are counted as well, so for CSV files it is an upper bound used for the
+    progress only; the chunks are those of readScenarioChunks.
+    """
+    if scenarioPath.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(scenarioPath).metadata.num_rows
+    nLines, lastByte = 0, b"\n"
+    with open(scenarioPath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 24), b""):
+            nLines += block.count(b"\n")
+            lastByte = block[-1:]
+    # header line, last line without line break
+    return nLines - 1 + (lastByte != b"\n")
+
+
+def _partPath(outputDir: str, chunk: int, outputFormat: str):
+    return os.path.join(outputDir, "part-{:06d}.{}".format(chunk, outputFormat))
+
+
+def _writeAtomic(dfResults: pd.DataFrame, path: str, outputFormat: str):
+    """Write a part file under a temporary name first, so that only complete parts count as done on a restart"""
+    fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        if outputFormat == "parquet":
+            dfResults.to_parquet(tmpPath, index=False)
+        else:
+            dfResults.to_csv(tmpPath, index=False)
+        os.replace(tmpPath, path)
+    except BaseException:
+        os.remove(tmpPath)
+        raise
+
+
+def _initWorker(method: str, source, modelRegistryDir: str):
+    """
+    Load the interpolation grids or the compiled surrogate model of a worker once
+    :param method: str: "interpolation" or "surrogate"
+    :param source: CompactStaticResults of the static data set (interpolation, pickled as its store directory, the
+                   workers map the columns they need) or str: registry key of the fitted model (surrogate)
+    """
+    if method == "interpolation":
+        _workerState["grids"] = source.toGrids(OUTPUT_COLUMNS)
+    else:
+        # the ML stack is only imported by workers that predict
+        from helpers.compiledInference import CompiledMultiOutputRegression
+
+        fittedModel, _ = ModelRegistry(modelRegistryDir).get(source)
+        _workerState["model"] = CompiledMultiOutputRegression(fittedModel)
+
+
+def _evaluateChunk(dfScenarios: pd.DataFrame, method: str, partPath: str, outputFormat: str):
+    """Evaluate one chunk in a worker and write its part file, returns the number of scenarios"""
+    dfResults = evaluateScenarios(dfScenarios, method, grids=_workerState.get("grids"),
+                                  model=_workerState.get("model"))
+    _writeAtomic(dfResults, partPath, outputFormat)
+    return len(dfResults)
+
+
+def _checkManifest(outputDir: str, manifest: dict):
+    """Store the settings of a run, a restart has to use the same scenario file and chunking"""
+    manifestPath = os.path.join(outputDir, MANIFEST_FILE)
+    if os.path.exists(manifestPath):
+        with open(manifestPath) as f:
+            storedManifest = json.load(f)
+        if storedManifest != manifest:
+            raise ValueError("{} contains the results of another run ({}), use another output directory or "
+                             "--fresh".format(outputDir, storedManifest))
+    else:
+        with open(manifestPath, "w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+
+
+def _printProgress(doneRows: int, totalRows: int, doneChunks: int, startTime: float, skippedRows: int):
+    elapsed = max(time.perf_counter() - startTime, 1e-9)
+    rate = (doneRows - skippedRows) / elapsed
+    eta = (totalRows - doneRows) / rate if rate > 0 else float("nan")
+    sys.stderr.write("\r{} chunks, {}/{} scenarios ({:.1f} %), {:.0f} scenarios/s, ETA {:.0f} s   ".format(
+        doneChunks, doneRows, totalRows, 100 * doneRows / max(totalRows, 1), rate, eta))
+    sys.stderr.flush()
+
+
+def runScenarioBatch(scenarioPath: str, outputDir: str, staticResultPath: str, method: str = "auto",
+                     modelRegistryDir: str = None, chunkRows: int = 100000, outputFormat: str = "csv",
+                     n_jobs: int = -1, fresh: bool = False, progress: bool = True):
+    """
+    Evaluate all scenarios of a file chunk by chunk in a process pool. Every chunk is written to its own part file in
+    outputDir as soon as it is finished; chunks whose part file exists are skipped, so an interrupted run continues
+    with the chunks that are not done yet.
+    :param scenarioPath: str: CSV or Parquet file of scenarios, see scenarioMethod for the columns
+    :param outputDir: str: directory of the part files
+    :param staticResultPath: str: path of automateSimulationStaticResults.csv
+    :param method: str: "interpolation", "surrogate" or "auto"
+    :param modelRegistryDir: str: directory of the model registry (surrogate), the model is fitted if not stored yet
+    :param chunkRows: int: number of scenarios per chunk
+    :param outputFormat: str: "csv" or "parquet"
+    :param n_jobs: int: number of worker processes, -1 uses all cores of the compute budget (see
+                   helperFuncs.setComputeBudget), 1 runs in the calling process
+    :param fresh: bool: delete the results of a previous run in outputDir first
+    :param progress: bool: print the progress to stderr
+    :return: tuple of list of str: paths of the part files in chunk order and int: number of scenarios read
+    """
+    columns = list(next(readScenarioChunks(scenarioPath, 1)).columns)
+    method = scenarioMethod(columns, method)
+    if fresh and os.path.exists(outputDir):
+        shutil.rmtree(outputDir)
+    if not os.path.exists(outputDir):
+        os.makedirs(outputDir)
+    stat = os.stat(scenarioPath)
+    _checkManifest(outputDir, {"scenarioPath": os.path.abspath(scenarioPath), "size": stat.st_size,
+                               "mtime": stat.st_mtime, "chunkRows": chunkRows, "method": method,
+                               "outputFormat": outputFormat})
+    if method == "surrogate":
+        # fit the model once (if it is not stored yet), the workers load it by its registry key
+        _, modelMetadata = enEvalMOR.getFittedMultiOutputRegressionModel(
+            loadStaticResultIndex(staticResultPath).dfStaticResults, ModelRegistry(modelRegistryDir))
+        source = modelMetadata["key"]
+    else:
+        # written once, the workers share the memory-mapped columns instead of each loading the data set
+        source = loadCompactStaticResults(staticResultPath)
+    # the chunks are those parsed by readScenarioChunks, the counted rows only estimate the progress and the workers
+    totalRows = countScenarios(scenarioPath)
+    nChunks = -(-totalRows // chunkRows)
+    nPendingChunks = sum(not os.path.exists(_partPath(outputDir, chunk, outputFormat)) for chunk in range(nChunks))
+    partPaths, readRows, skippedRows, doneRows, doneChunks = [], 0, 0, 0, 0
+    startTime = time.perf_counter()
+
+    def chunks():
+        """Chunks of the file with their part paths; chunks whose part file exists count as done"""
+        nonlocal readRows, skippedRows, doneRows, doneChunks
+        for chunk, dfScenarios in enumerate(readScenarioChunks(scenarioPath, chunkRows)):
+            partPaths.append(_partPath(outputDir, chunk, outputFormat))
+            readRows += len(dfScenarios)
+            if os.path.exists(partPaths[-1]):
+                skippedRows += len(dfScenarios)
+                doneRows += len(dfScenarios)
+                doneChunks += 1
+            else:
+                yield dfScenarios, partPaths[-1]
+
+    nWorkers = helperFuncs.effectiveNJobs(n_jobs, nPendingChunks)
+    if nWorkers <= 1:
+        _initWorker(method, source, modelRegistryDir)
+        for dfScenarios, partPath in chunks():
+            doneRows += _evaluateChunk(dfScenarios, method, partPath, outputFormat)
+            doneChunks += 1
+            if progress:
+                _printProgress(doneRows, totalRows, doneChunks, startTime, skippedRows)
+    else:
+        with helperFuncs.createProcessPool(nWorkers, initializer=_initWorker,
+                                           initargs=(method, source, modelRegistryDir)) as executor:
+            running = set()
+            for dfScenarios, partPath in chunks():
+                # at most two chunks per worker are held in memory
+                while len(running) >= 2 * nWorkers:
+                    finished, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        doneRows += future.result()
+                        doneChunks += 1
+                    if progress:
+                        _printProgress(doneRows, totalRows, doneChunks, startTime, skippedRows)
+                running.add(executor.submit(_evaluateChunk, dfScenarios, method, partPath, outputFormat))
+            for future in wait(running).done:
+                doneRows += future.result()
+                doneChunks += 1
+    if progress:
+        _printProgress(doneRows, readRows, doneChunks, startTime, skippedRows)
+        sys.stderr.write("\n")
+    return partPaths, readRows
+
+
+def mergeCsvParts(partPaths: list, outputPath: str, chunkRows: int = 1 << 20):
+    """
+    Concatenate CSV part files into one CSV file without parsing them (header of the first part only)
+    :return: int: number of rows of the merged file, read back in chunks of chunkRows rows
+    """
+    with open(outputPath, "wb") as out:
+        for i, partPath in enumerate(partPaths):
+            with open(partPath, "rb") as part:
+                if i > 0:
+                    part.readline()
+                shutil.copyfileobj(part, out)
+    return sum(len(dfChunk) for dfChunk in pd.read_csv(outputPath, usecols=[0], chunksize=chunkRows,
+                                                       keep_default_na=False))
+
+
+def parseArguments(argv=None):
+    current_dir = os.path.dirname(os.path.realpath(__file__))
+    parser = argparse.ArgumentParser(description="Evaluate a CSV or Parquet file of planning scenarios in chunks. "
+                                     "Scenarios need the columns {} or the boundary parameters {}, plus {} "
+                                     "(interpolation) or {} (surrogate model, relative humidity in %)."
+                                     .format(DIRECT_COLUMNS, BOUNDARY_PARAMETERS, LOCATION_COLUMN, CLIMATE_COLUMNS))
+    parser.add_argument("scenarios", help="CSV or Parquet file of scenarios")
+    parser.add_argument("outputDir", help="directory of the result part files (and of the merged result)")
+    parser.add_argument("--method", choices=("auto",) + METHODS, default="auto",
+                        help="interpolation of the static data set or surrogate model (default: by the columns)")
+    parser.add_argument("--static-results", dest="staticResultPath",
+                        default=os.path.join(current_dir, "data", "automateSimulationStaticResults.csv"))
+    parser.add_argument("--model-registry", dest="modelRegistryDir",
+                        default=os.path.join(current_dir, "data", "cache", "models"))
+    parser.add_argument("--chunk-rows", dest="chunkRows", type=int, default=100000)
+    parser.add_argument("--format", dest="outputFormat", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--n-jobs", dest="n_jobs", type=int, default=-1, help="worker processes, -1 uses all cores")
+    parser.add_argument("--cores", type=int, help="cores of the compute budget (default: all)")
+    parser.add_argument("--inner-threads", dest="innerThreads", type=int, default=1,
+                        help="threads per worker, --n-jobs -1 starts cores / inner-threads workers")
+    parser.add_argument("--fresh", action="store_true", help="discard the results of a previous run")
+    parser.add_argument("--merge", action="store_true", help="concatenate the CSV parts into results.csv")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    parser.add_argument("--profile", metavar="PREFIX",
+                        help="record timing spans and write PREFIX.json, PREFIX.trace.json and PREFIX.folded")
+    args = parser.parse_args(argv)
+    if args.merge and args.outputFormat != "csv":
+        parser.error("--merge is only supported with --format csv")
+    return args
+
+
+if __name__ == "__main__":
+    args = parseArguments()
+    try:
+        helperFuncs.setComputeBudget(args.cores, args.innerThreads)
+        with profiling.profileRun(args.profile) if args.profile else nullcontext():
+            partPaths, nScenarios = runScenarioBatch(args.scenarios, args.outputDir, args.staticResultPath,
+                                                     method=args.method, modelRegistryDir=args.modelRegistryDir,
+                                                     chunkRows=args.chunkRows, outputFormat=args.outputFormat,
+                                                     n_jobs=args.n_jobs, fresh=args.fresh, progress=not args.quiet)
+    except ValueError as exception:
+        sys.exit("error: {}".format(exception))
+    if args.merge:
+        mergedRows = mergeCsvParts(partPaths, os.path.join(args.outputDir, "results.csv"))
+        if mergedRows != nScenarios:
+            sys.exit("error: results.csv has {} rows, {} scenarios were read".format(mergedRows, nScenarios))
+    print("{} result parts in {}".format(len(partPaths), args.outputDir))
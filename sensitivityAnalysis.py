@@ -0,0 +1,323 @@
+"""
+-------------------------------------------------------------------------------
+Name:        sensitivityAnalysis
+Purpose:     Monte Carlo uncertainty propagation and variance-based sensitivity analysis of the boundary parameters
+
+Author:      Marcus Vogt
+
+Created:     17.10.2026
+Copyright:   Chair of Sustainable Manufacturing and Life Cycle Engineering, Institute of Machine Tools and Production Technology, Technische Universität Braunschweig, Langer Kamp 19b, 38106 Braunschweig, Germany
+Licence:     CC BY-SA 4.0
+-------------------------------------------------------------------------------
+"""
+
+import os
+from collections import deque
+import numpy as np
+import pandas as pd
+import energeticEvaluations as enEval
+import energeticEvaluationsMultiOutputRegression as enEvalMOR
+import helpers.helperFuncs as helperFuncs
+from helpers.interpolationGrids import StaticResultGrids
+from helpers.staticResultIndex import loadStaticResultIndex
+from helpers.modelRegistry import ModelRegistry
+# uncertain inputs: boundary parameters of boundaryParameters2scalingFactorMoistureLoad and the waste heat
+from helpers.scenarioColumns import BOUNDARY_PARAMETERS, OUTPUT_COLUMNS
+
+# evaluation model of the worker processes, set once per worker by _initWorker
+_workerModel = {}
+
+
+class InterpolationModel:
+    """Energy demands of boundary parameter samples by batch interpolation of the static data set at one location"""
+
+    def __init__(self, grids: StaticResultGrids, consideredLocation: str):
+        """
+        :param grids: StaticResultGrids: grids of the static result data set
+        :param consideredLocation: str: considered available location without case number e.g. "OS"
+        """
+        self.grids = grids.selectColumns(OUTPUT_COLUMNS)
+        self.consideredLocation = consideredLocation
+
+    def __call__(self, samples: dict):
+        scalingFactorS, maxMoistureLoad = _scalingFactorMoistureLoad(samples)
+        dfResults = self.grids.interpolate(self.consideredLocation, scalingFactorS, samples["maxWasteHeatRoomW"],
+                                           maxMoistureLoad)
+        return dfResults[OUTPUT_COLUMNS].to_numpy()
+
+
+class SurrogateModel:
+    """Energy demands of boundary parameter samples predicted by the fitted multi-output regression model"""
+
+    def __init__(self, model, averageOutsideRelativeHumidity: float, averageOutsideTemperature: float):
+        """
+        :param model: fitted multi-output regression model, see getFittedMultiOutputRegressionModel
+        :param averageOutsideRelativeHumidity: float: average outside relative humidity in %
+        :param averageOutsideTemperature: float: average outside temperature in °C
+        """
+        self.model = model
+        self.averageOutsideRelativeHumidity = averageOutsideRelativeHumidity
+        self.averageOutsideTemperature = averageOutsideTemperature
+
+    def __call__(self, samples: dict):
+        scalingFactorS, maxMoistureLoad = _scalingFactorMoistureLoad(samples)
+        yhat = enEvalMOR.predictMultiOutputRegression(self.model, self.averageOutsideRelativeHumidity,
+                                                      self.averageOutsideTemperature, scalingFactorS,
+                                                      samples["maxWasteHeatRoomW"], maxMoistureLoad).to_numpy()
+        return np.column_stack([yhat, yhat.sum(axis=1)])
+
+
+def _scalingFactorMoistureLoad(samples: dict):
+    return enEval.boundaryParameters2scalingFactorMoistureLoadBatch(
+        samples["maxHumansInAirFlow"], samples["maxHumansInRoom"], samples["roomDewPointDegrees"],
+        samples["inletDewPointDegrees"], samples["inletTemperatureDegrees"], samples["leakagesSuctionVolumeFlowM3H"])
+
+
+def sampleBoundaryParameters(distributions: dict, nSamples: int, rng: np.random.Generator):
+    """
+    Draw independent samples of the boundary parameters
+    :param distributions: dict: parameter name -> distribution given as tuple of the name of a method of
+                          np.random.Generator and its arguments, e.g. ("normal", -50, 2), ("uniform", 400, 700) or
+                          ("integers", 2, 7), or a plain number for a fixed parameter
+    :param nSamples: int: number of samples
+    :param rng: np.random.Generator: random generator
+    :return: dict: parameter name -> np.ndarray of shape (nSamples,)
+    """
+    samples = {}
+    for parameter in BOUNDARY_PARAMETERS:
+        distribution = distributions[parameter]
+        if np.isscalar(distribution):
+            samples[parameter] = np.full(nSamples, distribution, dtype=np.float64)
+        else:
+            method, *arguments = distribution
+            samples[parameter] = getattr(rng, method)(*arguments, size=nSamples).astype(np.float64)
+    return samples
+
+
+def uncertainParameters(distributions: dict):
+    """Parameters with a distribution, i.e. those whose sensitivity indices are computed"""
+    return [parameter for parameter in BOUNDARY_PARAMETERS if not np.isscalar(distributions[parameter])]
+
+
+def _initWorker(model):
+    _workerModel["model"] = model
+
+
+def _evaluateChunk(distributions: dict, nSamples: int, seed: int, chunk: int, sensitivity: bool,
+                   reservoirSize: int, returnSamples: bool):
+    """
+    Evaluate one chunk of samples and reduce it to statistics that are merged across chunks. The samples are drawn in
+    the worker from a generator seeded by (seed, chunk), so only the seed is sent to the worker and the results do not
+    depend on the number of workers.
+    :return: dict with the statistics of the energy demands of the chunk (see StreamingStatistics.add), the sums of
+             the sensitivity estimators (or None) and the inputs and outputs of all samples if returnSamples
+    """
+    model = _workerModel["model"]
+    rng = np.random.default_rng([seed, chunk])
+    samplesA = sampleBoundaryParameters(distributions, nSamples, rng)
+    sums = None
+    if not sensitivity:
+        outputsA = model(samplesA)
+    else:
+        # Saltelli scheme: matrices A and B and for each uncertain parameter i the matrix A with column i taken
+        # from B, all evaluated in one call of the model
+        samplesB = sampleBoundaryParameters(distributions, nSamples, rng)
+        parameters = uncertainParameters(distributions)
+        stacked = {}
+        for parameter in BOUNDARY_PARAMETERS:
+            stacked[parameter] = np.concatenate([samplesA[parameter], samplesB[parameter]] +
+                                                [samplesB[parameter] if parameter == varied else samplesA[parameter]
+                                                 for varied in parameters])
+        outputs = model(stacked).reshape(len(parameters) + 2, nSamples, -1)
+        outputsA, outputsB, outputsAB = outputs[0], outputs[1], outputs[2:]
+        sums = {"n": 2 * nSamples,
+                "sum": outputsA.sum(axis=0) + outputsB.sum(axis=0),
+                "sumSquares": (outputsA ** 2).sum(axis=0) + (outputsB ** 2).sum(axis=0),
+                # first order (Saltelli 2010): E[f(B) * (f(AB_i) - f(A))], total order (Jansen):
+                # E[(f(A) - f(AB_i))^2] / 2
+                "firstOrder": (outputsB[None] * (outputsAB - outputsA[None])).sum(axis=1),
+                "totalOrder": 0.5 * ((outputsA[None] - outputsAB) ** 2).sum(axis=1)}
+    # random priorities of the samples (drawn last, the samples do not depend on them), the reservoir keeps the
+    # samples with the smallest priorities of all chunks
+    priorities = rng.random(nSamples)
+    kept = np.argsort(priorities, kind="stable")[:reservoirSize]
+    return {"n": nSamples,
+            "mean": outputsA.mean(axis=0),
+            "m2": ((outputsA - outputsA.mean(axis=0)) ** 2).sum(axis=0),
+            "min": outputsA.min(axis=0),
+            "max": outputsA.max(axis=0),
+            "priorities": priorities[kept],
+            "reservoir": outputsA[kept],
+            "sums": sums,
+            "samples": (samplesA, outputsA) if returnSamples else None}
+
+
+class StreamingStatistics:
+    """
+    Statistics of the energy demands merged chunk by chunk in constant memory: count, mean and variance (pairwise
+    update of Chan et al.), minimum and maximum exactly, the percentiles from a uniform random subsample of at most
+    reservoirSize samples (the samples with the smallest random priorities over all chunks). With nSamples <=
+    reservoirSize the subsample holds all samples and the percentiles are exact as well.
+    """
+
+    def __init__(self, reservoirSize: int):
+        """
+        :param reservoirSize: int: maximum number of samples kept for the percentiles
+        """
+        self.reservoirSize = reservoirSize
+        self.n = 0
+        self.mean = self.m2 = self.min = self.max = None
+        self.priorities = np.empty(0)
+        self.reservoir = None
+
+    def add(self, chunkStatistics: dict):
+        """
+        Merge the statistics of one chunk
+        :param chunkStatistics: dict with n, mean, m2 (sum of squared deviations from the mean), min, max and the
+                                priorities and outputs of the reservoir samples of the chunk
+        """
+        n = chunkStatistics["n"]
+        if self.n == 0:
+            self.mean, self.m2 = chunkStatistics["mean"].copy(), chunkStatistics["m2"].copy()
+            self.min, self.max = chunkStatistics["min"].copy(), chunkStatistics["max"].copy()
+            self.reservoir = chunkStatistics["reservoir"][:0]
+        else:
+            delta = chunkStatistics["mean"] - self.mean
+            total = self.n + n
+            self.mean = self.mean + delta * n / total
+            self.m2 = self.m2 + chunkStatistics["m2"] + delta ** 2 * self.n * n / total
+            self.min = np.minimum(self.min, chunkStatistics["min"])
+            self.max = np.maximum(self.max, chunkStatistics["max"])
+        self.n += n
+        priorities = np.concatenate([self.priorities, chunkStatistics["priorities"]])
+        reservoir = np.concatenate([self.reservoir, chunkStatistics["reservoir"]])
+        kept = np.argsort(priorities, kind="stable")[:self.reservoirSize]
+        self.priorities, self.reservoir = priorities[kept], reservoir[kept]
+
+    def describe(self, percentiles, columns: list):
+        """
+        Statistics in the layout of pd.DataFrame.describe
+        :param percentiles: sequence of percentiles in %
+        :param columns: list: names of the outputs
+        :return: pd.DataFrame with one row per output
+        """
+        statistics = {"count": np.full(len(columns), float(self.n)), "mean": self.mean,
+                      "std": np.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else np.full(len(columns), np.nan),
+                      "min": self.min}
+        for percentile, values in zip(percentiles, np.percentile(self.reservoir, percentiles, axis=0)):
+            statistics["{:g}%".format(percentile)] = values
+        statistics["max"] = self.max
+        return pd.DataFrame(statistics, index=columns)
+
+
+def runMonteCarlo(model, distributions: dict, nSamples: int = 100000, sensitivity: bool = True,
+                  percentiles=(5, 25, 50, 75, 95), chunkSize: int = 10000, n_jobs: int = -1, seed: int = 0,
+                  reservoirSize: int = 100000, returnSamples: bool = False):
+    """
+    Propagate the uncertainty of the boundary parameters to the energy demands and compute the variance-based (Sobol)
+    sensitivity indices. The samples are processed in chunks in a process pool; every chunk is reduced to mergeable
+    statistics in its worker (see StreamingStatistics) and merged as soon as it arrives, with at most two chunks per
+    worker in flight. Unless returnSamples, the memory is bounded by the number of workers times the chunk size (times
+    the number of uncertain parameters + 2 for the sensitivity indices) plus the reservoir, independent of nSamples.
+    :param model: InterpolationModel or SurrogateModel (any picklable callable mapping a dict of sample arrays to an
+                  array of shape (n, len(OUTPUT_COLUMNS)))
+    :param distributions: dict: distribution of each boundary parameter, see sampleBoundaryParameters
+    :param nSamples: int: number of Monte Carlo samples (the sensitivity indices need nSamples * (d + 2) evaluations
+                     for d uncertain parameters)
+    :param sensitivity: bool: compute the sensitivity indices
+    :param percentiles: sequence of percentiles of the energy distributions in %
+    :param chunkSize: int: number of samples per task
+    :param n_jobs: int: number of worker processes, -1 uses all cores, 1 runs in the calling process
+    :param seed: int: seed of the random generator
+    :param reservoirSize: int: number of samples the percentiles are computed from, exact up to this many samples
+    :param returnSamples: bool: also return the inputs and energy demands of all samples (memory grows with nSamples)
+    :return: tuple (dfSamples: inputs and energy demands of all samples or None, dfDistribution: statistics of the
+             energy demands, dfSensitivity: first and total order indices per parameter and output or None)
+    """
+    missingParameters = set(BOUNDARY_PARAMETERS) - set(distributions)
+    if missingParameters:
+        raise ValueError("Distributions missing for the parameters: {}".format(sorted(missingParameters)))
+    chunks = [(chunk, min(chunkSize, nSamples - start)) for chunk, start in enumerate(range(0, nSamples, chunkSize))]
+    statistics = StreamingStatistics(reservoirSize)
+    sensitivitySums, sampleFrames = None, []
+
+    def merge(result):
+        nonlocal sensitivitySums
+        statistics.add(result)
+        if result["sums"] is not None:
+            sensitivitySums = dict(result["sums"]) if sensitivitySums is None else \
+                {key: sensitivitySums[key] + value for key, value in result["sums"].items()}
+        if result["samples"] is not None:
+            samples, outputs = result["samples"]
+            dfChunk = pd.DataFrame(samples)
+            dfChunk[OUTPUT_COLUMNS] = outputs
+            sampleFrames.append(dfChunk)
+
+    nWorkers = helperFuncs.effectiveNJobs(n_jobs, len(chunks))
+    if nWorkers <= 1:
+        _initWorker(model)
+        for chunk, size in chunks:
+            merge(_evaluateChunk(distributions, size, seed, chunk, sensitivity, reservoirSize, returnSamples))
+    else:
+        with helperFuncs.createProcessPool(nWorkers, initializer=_initWorker, initargs=(model,)) as executor:
+            # merged in chunk order, so the results do not depend on the order in which the chunks finish
+            running = deque()
+            for chunk, size in chunks:
+                if len(running) >= 2 * nWorkers:
+                    merge(running.popleft().result())
+                running.append(executor.submit(_evaluateChunk, distributions, size, seed, chunk, sensitivity,
+                                               reservoirSize, returnSamples))
+            while running:
+                merge(running.popleft().result())
+
+    dfSamples = pd.concat(sampleFrames, ignore_index=True) if returnSamples else None
+    dfDistribution = statistics.describe(percentiles, OUTPUT_COLUMNS)
+
+    dfSensitivity = None
+    if sensitivity:
+        mean = sensitivitySums["sum"] / sensitivitySums["n"]
+        variance = sensitivitySums["sumSquares"] / sensitivitySums["n"] - mean ** 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            firstOrder = sensitivitySums["firstOrder"] / nSamples / variance
+            totalOrder = sensitivitySums["totalOrder"] / nSamples / variance
+        parameters = uncertainParameters(distributions)
+        index = pd.MultiIndex.from_product([parameters, OUTPUT_COLUMNS], names=["parameter", "output"])
+        dfSensitivity = pd.DataFrame({"firstOrder": firstOrder.ravel(), "totalOrder": totalOrder.ravel()}, index=index)
+    return dfSamples, dfDistribution, dfSensitivity
+
+
+if __name__ == "__main__":
+    ########### read in data set ############
+    current_dir = os.path.dirname(os.path.realpath(__file__))
+    staticResultPath = os.path.join(current_dir, "data", "automateSimulationStaticResults.csv")
+    staticResultIndex = loadStaticResultIndex(staticResultPath)
+
+    ########### uncertain boundary parameters ############
+    consideredLocation = "OS"  # considered available location without case number e.g. "OS"
+    useSurrogate = False  # predict with the regression model for an arbitrary climate instead of interpolating
+    averageOutsideRelativeHumidity = 77.77662949012851
+    averageOutsideTemperatureDegrees = 27.769243088784297
+    distributions = {
+        "maxHumansInAirFlow": ("integers", 2, 6),  # 2 to 5 humans in air flow zones
+        "maxHumansInRoom": ("integers", 5, 9),  # 5 to 8 humans in the room
+        "roomDewPointDegrees": ("normal", -50, 1.5),  # dew point temperature in °C
+        "inletDewPointDegrees": ("normal", -60, 1.5),  # dew point temperature in °C
+        "inletTemperatureDegrees": ("uniform", 19, 21),  # inlet temperature in °C
+        "leakagesSuctionVolumeFlowM3H": ("triangular", 300, 500, 800),  # volume flow in m^3/h
+        "maxWasteHeatRoomW": ("uniform", 2500, 3500),  # max waste heat in W
+    }
+    nSamples = 100000
+
+    ########### evaluations ############
+    if useSurrogate:
+        modelRegistry = ModelRegistry(os.path.join(current_dir, "data", "cache", "models"))
+        fittedModel, _ = enEvalMOR.getFittedMultiOutputRegressionModel(staticResultIndex.dfStaticResults,
+                                                                        modelRegistry)
+        model = SurrogateModel(fittedModel, averageOutsideRelativeHumidity, averageOutsideTemperatureDegrees)
+    else:
+        model = InterpolationModel(staticResultIndex.grids, consideredLocation)
+    dfSamples, dfDistribution, dfSensitivity = runMonteCarlo(model, distributions, nSamples=nSamples)
+    print("Distribution of the energy demands in kWh:")
+    print(dfDistribution)
+    print("Variance-based sensitivity indices:")
+    print(dfSensitivity.unstack("output"))